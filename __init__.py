@@ -30,11 +30,16 @@ from .core.texture_set_settings import RYMAT_texture_set_settings, RYMAT_OT_set_
 from .core.shaders import RYMAT_shader_name, RYMAT_shader_material_channel, RYMAT_shader_unlayered_property, RYMAT_shader_info, RYMAT_OT_set_shader, RYMAT_OT_new_shader, RYMAT_OT_save_shader, RYMAT_OT_delete_shader, RYMAT_OT_add_shader_channel, RYMAT_OT_delete_shader_channel, RYMAT_OT_create_shader_from_nodetree, update_shader_list, apply_default_shader
 
 # Material Layers
-from .core.material_layers import RYMAT_layer_stack, RYMAT_layers, RYMAT_OT_add_material_layer,RYMAT_OT_add_decal_material_layer, RYMAT_OT_add_image_layer, RYMAT_OT_delete_layer, RYMAT_OT_duplicate_layer, RYMAT_OT_move_material_layer_up, RYMAT_OT_move_material_layer_down,RYMAT_OT_toggle_material_channel_preview, RYMAT_OT_toggle_hide_layer, RYMAT_OT_set_layer_projection,RYMAT_OT_change_material_channel_value_node, RYMAT_OT_isolate_material_channel,RYMAT_OT_show_compiled_material, RYMAT_OT_toggle_image_alpha_blending, RYMAT_OT_set_material_channel, RYMAT_OT_set_matchannel_crgba_output, RYMAT_OT_set_layer_blending_mode, RYMAT_OT_merge_with_layer_below, RYMAT_OT_add_material_channel_nodes, RYMAT_OT_delete_material_channel_nodes, refresh_layer_stack, shader_node_tree_update
+from .core.material_layers import RYMAT_layer_stack, RYMAT_layers, RYMAT_OT_add_material_layer,RYMAT_OT_add_decal_material_layer, RYMAT_OT_add_image_layer, RYMAT_OT_delete_layer, RYMAT_OT_duplicate_layer, RYMAT_OT_move_material_layer_up, RYMAT_OT_move_material_layer_down,RYMAT_OT_toggle_material_channel_preview, RYMAT_OT_toggle_hide_layer, RYMAT_OT_set_layer_projection,RYMAT_OT_change_material_channel_value_node, RYMAT_OT_isolate_material_channel,RYMAT_OT_show_compiled_material, RYMAT_OT_toggle_image_alpha_blending, RYMAT_OT_set_material_channel, RYMAT_OT_set_matchannel_crgba_output, RYMAT_OT_set_layer_blending_mode, RYMAT_OT_merge_with_layer_below, RYMAT_OT_add_material_channel_nodes, RYMAT_OT_delete_material_channel_nodes, refresh_layer_stack, shader_node_tree_update, clear_material_node_index, clear_updated_node_index
 
 # Layer Masks
 from .core.layer_masks import RYMAT_mask_stack, RYMAT_masks, RYMAT_UL_mask_list, RYMAT_OT_move_layer_mask_up, RYMAT_OT_move_layer_mask_down, RYMAT_OT_duplicate_layer_mask, RYMAT_OT_delete_layer_mask, RYMAT_OT_add_empty_layer_mask, RYMAT_OT_add_black_layer_mask, RYMAT_OT_add_white_layer_mask, RYMAT_OT_add_linear_gradient_mask, RYMAT_OT_add_decal_mask, RYMAT_OT_add_ambient_occlusion_mask, RYMAT_OT_add_curvature_mask, RYMAT_OT_add_thickness_mask, RYMAT_OT_add_world_space_normals_mask,  RYMAT_OT_add_grunge_mask, RYMAT_OT_add_edge_wear_mask, RYMAT_OT_add_decal_mask, RYMAT_OT_set_mask_projection_uv, RYMAT_OT_set_mask_projection_triplanar, RYMAT_OT_set_mask_crgba_channel, RYMAT_OT_isolate_mask
 
+# Compiled Materials
+from .core.material_compiler import RYMAT_OT_swap_compiled_materials
+from .core.layer_cache import RYMAT_OT_toggle_layer_cache, check_layer_cache_updates
+from .core.layer_stack_model import clear_layer_stack_models
+
 # Material Filters
 from .core.material_filters import RYMAT_OT_add_material_filter, RYMAT_OT_delete_material_filter
 
@@ -45,7 +50,7 @@ from .core.material_slots import RYMAT_OT_add_material_slot, RYMAT_OT_remove_mat
 from .core.mesh_map_baking import RYMAT_mesh_map_anti_aliasing, RYMAT_baking_settings, RYMAT_OT_batch_bake, RYMAT_OT_set_mesh_map_folder, RYMAT_OT_open_mesh_map_folder, RYMAT_OT_preview_mesh_map, RYMAT_OT_disable_mesh_map_preview, RYMAT_OT_delete_mesh_map, RYMAT_OT_create_baking_cage, RYMAT_OT_delete_baking_cage
 
 # Exporting
-from .core.export_textures import RYMAT_pack_textures, RYMAT_RGBA_pack_channels, RYMAT_texture_export_settings, RYMAT_texture_export_settings, RYMAT_texture_set_export_settings, RYMAT_OT_export, RYMAT_OT_set_export_folder, RYMAT_OT_open_export_folder, RYMAT_OT_set_export_template, RYMAT_OT_save_export_template, RYMAT_OT_refresh_export_template_list, RYMAT_OT_delete_export_template, RYMAT_OT_add_export_texture, RYMAT_OT_remove_export_texture, RYMAT_export_template_names, ExportTemplateMenu
+from .core.export_textures import RYMAT_pack_textures, RYMAT_RGBA_pack_channels, RYMAT_texture_export_settings, RYMAT_texture_export_settings, RYMAT_export_output_resolution, RYMAT_texture_set_export_settings, RYMAT_OT_export, RYMAT_OT_set_export_folder, RYMAT_OT_open_export_folder, RYMAT_OT_set_export_template, RYMAT_OT_save_export_template, RYMAT_OT_refresh_export_template_list, RYMAT_OT_delete_export_template, RYMAT_OT_add_export_texture, RYMAT_OT_remove_export_texture, RYMAT_OT_add_export_output_resolution, RYMAT_OT_remove_export_output_resolution, RYMAT_export_template_names, ExportTemplateMenu
 
 # Utilities
 from .core.image_utilities import RYMAT_OT_save_all_textures, RYMAT_OT_add_texture_node_image, RYMAT_OT_import_texture_node_image, RYMAT_OT_edit_texture_node_image_externally, RYMAT_OT_reload_texture_node_image, RYMAT_OT_duplicate_texture_node_image, RYMAT_OT_delete_texture_node_image, RYMAT_OT_image_edit_uvs, auto_save_images
@@ -97,6 +102,7 @@ classes = (
     RYMAT_pack_textures,
     RYMAT_RGBA_pack_channels,
     RYMAT_texture_export_settings,
+    RYMAT_export_output_resolution,
     RYMAT_texture_set_export_settings,
     RYMAT_export_template_names,
     RYMAT_OT_export,
@@ -106,6 +112,8 @@ classes = (
     RYMAT_OT_delete_export_template,
     RYMAT_OT_add_export_texture,
     RYMAT_OT_remove_export_texture,
+    RYMAT_OT_add_export_output_resolution,
+    RYMAT_OT_remove_export_output_resolution,
     RYMAT_OT_set_export_folder,
     RYMAT_OT_open_export_folder,
     ExportTemplateMenu,
@@ -139,6 +147,8 @@ classes = (
     RYMAT_OT_change_material_channel_value_node,
     RYMAT_OT_isolate_material_channel,
     RYMAT_OT_show_compiled_material,
+    RYMAT_OT_swap_compiled_materials,
+    RYMAT_OT_toggle_layer_cache,
     RYMAT_OT_toggle_image_alpha_blending,
     RYMAT_OT_set_material_channel,
     RYMAT_OT_set_matchannel_crgba_output,
@@ -249,6 +259,15 @@ def depsgraph_change_handler(scene, depsgraph):
         if update.id.name == "Shader Nodetree":
             shader_node_tree_update()
 
+        # Nodes in materials or node trees may have been removed outside of this add-on, clear indexed node references to them.
+        # Layer stack models read node values, they are rebuilt after any change.
+        if isinstance(update.id, (bpy.types.Material, bpy.types.NodeTree)):
+            clear_updated_node_index(update.id.original)
+            clear_layer_stack_models()
+
+    # Clear the layer cache when layers frozen in it are edited.
+    check_layer_cache_updates(scene, depsgraph)
+
 @persistent
 def on_file_load(dummy):
     '''Function for performing tasks when the file is loaded.'''
@@ -256,6 +275,9 @@ def on_file_load(dummy):
     # Log when a new file is loaded for debugging purposes.
     debug_logging.log("File load detected...")
 
+    # Node references indexed for the previous file are invalid in the loaded file.
+    clear_material_node_index()
+
     # Add an app handler to run updates for add-on properties when properties on the active object are changed.
     bpy.app.handlers.depsgraph_update_post.clear()
     bpy.app.handlers.depsgraph_update_post.append(depsgraph_change_handler)
@@ -302,6 +324,13 @@ def on_file_load(dummy):
     # Update the shader list when a new blend file is loaded.
     update_shader_list()
 
+@persistent
+def on_undo_redo(scene):
+    '''Function for performing tasks after an undo or redo.'''
+
+    # Undo and redo reload Blender data, which invalidates all indexed node references.
+    clear_material_node_index()
+
 @persistent
 def post_first_depsgraph_update(scene):
     '''Function for performing tasks after the first depsgraph update.'''
@@ -378,6 +407,10 @@ def register():
     # Add a handler to run right after the depsgraph update.
     bpy.app.handlers.depsgraph_update_post.append(post_first_depsgraph_update)
 
+    # Add handlers to run functions after undo and redo.
+    bpy.app.handlers.undo_post.append(on_undo_redo)
+    bpy.app.handlers.redo_post.append(on_undo_redo)
+
 def unregister():
     for cls in classes:
         bpy.utils.unregister_class(cls)
@@ -396,6 +429,15 @@ def unregister():
     if post_first_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.remove(post_first_depsgraph_update)
 
+    # Unregister the undo and redo handlers.
+    if on_undo_redo in bpy.app.handlers.undo_post:
+        bpy.app.handlers.undo_post.remove(on_undo_redo)
+    if on_undo_redo in bpy.app.handlers.redo_post:
+        bpy.app.handlers.redo_post.remove(on_undo_redo)
+
+    # Release indexed node references.
+    clear_material_node_index()
+
     # Unregister image auto saving.
     if bpy.app.timers.is_registered(auto_save_images):
         bpy.app.timers.unregister(auto_save_images)
@@ -0,0 +1,214 @@
+# This file contains a public Python API for building materials with this add-on from scripts.
+# API functions take an explicit material, layer index and material channel instead of reading the active object, active material and selected layer from the user interface.
+# Materials are edited without calling operators or changing the active object, which makes it practical to generate large numbers of materials from a script.
+# The material being edited is bound for add-on functions (see blender_addon_utils.bind_material), which edit the bound material in place of the active object's active material.
+#
+# Example:
+#     from rymat import api
+#     material = api.create_material("Rust")
+#     with api.edit(material):
+#         base_layer = api.add_layer(material, name="Base")
+#         rust_layer = api.add_layer(material, name="Rust")
+#         api.set_projection(material, rust_layer, 'TRIPLANAR')
+#         api.add_mask(material, rust_layer, 'EDGE_WEAR')
+
+import bpy
+from contextlib import contextmanager
+from .core import material_layers
+from .core import layer_masks
+from .core import export_textures
+from .core import blender_addon_utils as bau
+
+class APIError(Exception):
+    '''Raised when an API call can't be completed. The message is the error reported by the add-on.'''
+
+class StatusReport:
+    '''Collects status messages from add-on functions that would normally be reported by an operator.'''
+    def __init__(self):
+        self.messages = []
+
+    def report(self, type, message):
+        self.messages.append((type, message))
+
+    def raise_errors(self):
+        '''Raises an API error for the first error reported since the last check.'''
+        errors = [message for type, message in self.messages if 'ERROR' in type]
+        self.messages.clear()
+        if errors:
+            raise APIError(errors[0])
+
+# The material (and optionally an object using it) bound by the open API edit, API calls made inside an open edit reuse it.
+api_edit = {
+    "material": None,
+    "object": None,
+    "report": None
+}
+
+def resize_slots(slots, slot_count):
+    '''Adds or removes slots from the end of the provided collection until it contains the provided number of slots.'''
+    for i in range(len(slots) - 1, slot_count - 1, -1):
+        slots.remove(i)
+
+    for i in range(len(slots), slot_count):
+        slots.add()
+
+def sync_stack_slots():
+    '''Matches the number of layer and mask slots to the material in the current context, without running layer or mask selection updates.'''
+    scene = bpy.context.scene
+    layer_count = material_layers.count_layers()
+    resize_slots(scene.rymat_layers, layer_count)
+
+    # Selected indices are written as ID properties, which doesn't call their update functions.
+    selected_layer_index = min(scene.rymat_layer_stack.selected_layer_index, layer_count - 1)
+    scene.rymat_layer_stack["selected_layer_index"] = selected_layer_index
+
+    mask_count = 0
+    if selected_layer_index >= 0:
+        mask_count = layer_masks.count_masks(selected_layer_index)
+    resize_slots(scene.rymat_masks, mask_count)
+    scene.rymat_mask_stack["selected_index"] = mask_count - 1
+
+def select_layer(layer_index):
+    '''Selects the layer at the provided index in the material being edited, raises an API error if the layer doesn't exist.'''
+    layer_count = material_layers.count_layers()
+    if layer_index < 0 or layer_index >= layer_count:
+        raise APIError("Layer index {0} is out of range, the material has {1} layers.".format(layer_index, layer_count))
+    bpy.context.scene.rymat_layer_stack["selected_layer_index"] = layer_index
+    sync_stack_slots()
+
+@contextmanager
+def edit(material, obj=None):
+    '''Binds the provided material for API calls made inside the block. Relinking and organizing nodes is deferred until the block ends, so many edits to one material only relink it once.
+    An object using the material can be provided so add-on functions that read mesh data (mesh maps, decals, exporting) use it.'''
+    if not bau.verify_addon_material(material):
+        raise APIError("Material {0} wasn't created with this add-on.".format(material.name if material else None))
+
+    # Nested edits of the same material share the open edit.
+    if api_edit["material"] != None:
+        if api_edit["material"] != material or (obj != None and api_edit["object"] != obj):
+            raise APIError("Nested API edits must use the same material and object.")
+        yield api_edit["report"]
+        return
+
+    original_active_material_index = -1
+    if obj != None:
+        material_index = obj.material_slots.find(material.name)
+        if material_index == -1:
+            raise APIError("Object {0} doesn't use material {1}.".format(obj.name, material.name))
+        original_active_material_index = obj.active_material_index
+        obj.active_material_index = material_index
+
+    scene = bpy.context.scene
+    original_pause_auto_updates = scene.pause_auto_updates
+    original_selected_layer_index = scene.rymat_layer_stack.selected_layer_index
+    original_selected_mask_index = scene.rymat_mask_stack.selected_index
+
+    report = StatusReport()
+    api_edit["material"] = material
+    api_edit["object"] = obj
+    api_edit["report"] = report
+
+    # Pause automatic updates while layer and mask slots are resized for the edited material, the user interface is restored when the edit ends.
+    scene.pause_auto_updates = True
+    try:
+        with bau.bind_material(material, from_script=True, obj=obj):
+            sync_stack_slots()
+            with material_layers.edit_layers(report, material):
+                yield report
+            report.raise_errors()
+
+    finally:
+        api_edit["material"] = None
+        api_edit["object"] = None
+        api_edit["report"] = None
+        if original_active_material_index != -1:
+            obj.active_material_index = original_active_material_index
+
+        # Restore layer and mask slots for the material the user is editing.
+        scene.rymat_layer_stack["selected_layer_index"] = original_selected_layer_index
+        sync_stack_slots()
+        scene.rymat_mask_stack["selected_index"] = min(original_selected_mask_index, len(scene.rymat_masks) - 1)
+        scene.pause_auto_updates = original_pause_auto_updates
+
+def create_material(name):
+    '''Creates and returns a new material using the shader selected in the add-on settings. The material has no layers.'''
+    material = material_layers.create_default_material_setup()
+    if not material:
+        raise APIError("Missing blank material setup.")
+    material.name = name
+    return material
+
+def count_layers(material):
+    '''Returns the number of layers in the provided material.'''
+    return material_layers.count_layers(material)
+
+def add_layer(material, layer_type='NORMAL', name=""):
+    '''Adds a layer of the provided type ('NORMAL', 'DECAL' or 'IMAGE') to the top of the material's layer stack. Returns the index of the new layer.'''
+    with edit(material) as report:
+        layer_count = material_layers.count_layers()
+        if layer_count > 0:
+            select_layer(layer_count - 1)
+        material_layers.add_material_layer(layer_type, report)
+        report.raise_errors()
+
+        layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
+        if name != "":
+            material_layers.get_material_layer_node('LAYER', layer_index).label = name
+        return layer_index
+
+def delete_layer(material, layer_index):
+    '''Deletes the layer at the provided index, and all of it's masks.'''
+    with edit(material) as report:
+        select_layer(layer_index)
+        material_layers.delete_layer(report)
+        report.raise_errors()
+
+def set_projection(material, layer_index, projection_mode):
+    '''Sets the projection ('UV', 'TRIPLANAR' or 'TRIPLANAR_HEX_GRID') used by all material channels of the layer at the provided index.'''
+    with edit(material) as report:
+        select_layer(layer_index)
+        material_layers.set_layer_projection(projection_mode, report)
+        report.raise_errors()
+
+def set_blending_mode(material, layer_index, blending_mode, channel_name='COLOR'):
+    '''Sets the blending mode used to blend the provided material channel of the layer at the provided index with the layers below it.'''
+    with edit(material) as report:
+        select_layer(layer_index)
+        material_layers.set_layer_blending_mode(layer_index, blending_mode, channel_name)
+        report.raise_errors()
+
+def set_channel_node(material, layer_index, channel_name, node_type):
+    '''Replaces the node providing the value for the provided material channel of the layer at the provided index ('VALUE' or 'TEXTURE').'''
+    with edit(material) as report:
+        select_layer(layer_index)
+        material_layers.replace_material_channel_node(channel_name, node_type)
+        report.raise_errors()
+
+def get_channel_node(material, layer_index, channel_name, node_number=1):
+    '''Returns the node providing the value for the provided material channel of the layer at the provided index, so it's inputs can be edited directly.'''
+    with edit(material):
+        select_layer(layer_index)
+        return material_layers.get_material_layer_node('VALUE', layer_index, channel_name, node_number)
+
+def add_mask(material, layer_index, mask_type='EMPTY'):
+    '''Adds a mask of the provided type (for example 'EMPTY', 'BLACK', 'WHITE', 'EDGE_WEAR' or 'GRUNGE') to the top of the mask stack of the layer at the provided index. Returns the index of the new mask.'''
+    with edit(material) as report:
+        select_layer(layer_index)
+        layer_masks.add_layer_mask(mask_type, report)
+        report.raise_errors()
+        return bpy.context.scene.rymat_mask_stack.selected_index
+
+def export(obj, material=None):
+    '''Bakes, channel packs and saves textures for the provided material (the object's active material if no material is provided) using the scene's export settings. The object must be in the view layer, with a UV map.
+    Baking runs synchronously through Blender's bake operator, which is the only way Blender provides to bake. Returns the export manifest.'''
+    if material == None:
+        material = obj.active_material
+
+    # Blender's bake operator bakes the selected objects, so exporting runs with the object as the active and selected object.
+    with edit(material, obj) as report:
+        with bpy.context.temp_override(active_object=obj, object=obj, selected_objects=[obj], selected_editable_objects=[obj]):
+            exported = export_textures.export_active_material_textures(report)
+        report.raise_errors()
+        if not exported:
+            raise APIError("Textures weren't exported for material {0}.".format(material.name))
+    return export_textures.export_manifest
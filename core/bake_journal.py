@@ -0,0 +1,134 @@
+# This file contains functions for recording the progress of long baking operations (exporting, batch baking) to a journal file.
+# If Blender crashes part way through a bake, the journal allows the operation to be resumed from the first unfinished job.
+
+import os
+import json
+import numpy
+import bpy
+from ..core import debug_logging
+from ..core import image_utilities
+
+JOURNAL_FOLDER_NAME = "Bake Journal"
+
+def get_journal_folder_path():
+    '''Returns the folder where bake journals and cached bake results are stored, next to the blend file. Returns an empty string if the blend file isn't saved.'''
+    blend_folder = bpy.path.abspath("//")
+    if blend_folder == "":
+        return ""
+    journal_folder = os.path.join(blend_folder, JOURNAL_FOLDER_NAME)
+    if not os.path.exists(journal_folder):
+        os.mkdir(journal_folder)
+    return journal_folder
+
+def get_journal_path(operation):
+    '''Returns the file path for the journal of the provided operation (e.g. 'EXPORT', 'BATCH_BAKE').'''
+    journal_folder = get_journal_folder_path()
+    if journal_folder == "":
+        return ""
+    return os.path.join(journal_folder, "{0}.json".format(operation.lower()))
+
+def journal_exists(operation):
+    '''Returns true if there is an unfinished journal for the provided operation that can be resumed.'''
+    blend_folder = bpy.path.abspath("//")
+    if blend_folder == "":
+        return False
+    return os.path.exists(os.path.join(blend_folder, JOURNAL_FOLDER_NAME, "{0}.json".format(operation.lower())))
+
+def read_journal(operation):
+    '''Reads the journal for the provided operation. Returns None if no journal exists.'''
+    if not journal_exists(operation):
+        return None
+    journal_path = get_journal_path(operation)
+    try:
+        with open(journal_path, "r") as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        debug_logging.log("Failed to read bake journal: {0}".format(journal_path), message_type='WARNING')
+        return None
+
+def write_journal(operation, journal):
+    '''Writes the provided journal data for the operation. The journal is written to a temporary file first so a crash while writing can't corrupt it.'''
+    journal_path = get_journal_path(operation)
+    if journal_path == "":
+        return
+    temp_journal_path = journal_path + ".tmp"
+    with open(temp_journal_path, "w") as json_file:
+        json.dump(journal, json_file)
+    os.replace(temp_journal_path, journal_path)
+
+def start_journal(operation, settings, resume=False):
+    '''Starts a journal for the operation. When resuming, the existing journal is kept if it was recorded with the same settings. Returns the number of jobs already completed.'''
+    if resume:
+        journal = read_journal(operation)
+        if journal and journal.get("settings") == settings:
+            debug_logging.log("Resuming {0} from bake journal, {1} job(s) already completed.".format(operation, len(journal["jobs"])))
+            return len(journal["jobs"])
+        debug_logging.log("Bake journal doesn't match the current settings, starting {0} from the beginning.".format(operation), message_type='WARNING')
+
+    delete_journal(operation)
+    write_journal(operation, {"settings": settings, "jobs": {}})
+    return 0
+
+def record_job(operation, job_key, filepath=""):
+    '''Records a completed job in the journal, along with the file path where the result of the job is stored.'''
+    journal = read_journal(operation)
+    if journal == None:
+        return
+    journal["jobs"][job_key] = filepath
+    write_journal(operation, journal)
+
+def get_completed_job(operation, job_key):
+    '''Returns the file path of the result for a completed job in the journal. Returns None if the job isn't completed, or it's result no longer exists.'''
+    journal = read_journal(operation)
+    if journal == None:
+        return None
+    filepath = journal["jobs"].get(job_key)
+    if filepath == None:
+        return None
+    if filepath != "" and not os.path.exists(filepath):
+        return None
+    return filepath
+
+def delete_cached_result(filepath):
+    '''Deletes the cached result of a job, results stored outside of the journal folder (e.g. saved mesh maps) are kept.'''
+    if filepath and os.path.dirname(filepath) == get_journal_folder_path() and os.path.exists(filepath):
+        os.remove(filepath)
+
+def remove_jobs(operation, job_keys):
+    '''Removes the provided jobs and their cached results from the journal, so only the remaining jobs are resumed.'''
+    journal = read_journal(operation)
+    if journal == None:
+        return
+    for job_key in job_keys:
+        delete_cached_result(journal["jobs"].pop(job_key, None))
+    write_journal(operation, journal)
+
+def delete_journal(operation):
+    '''Deletes the journal and all cached results for the provided operation.'''
+    journal = read_journal(operation)
+    if journal:
+        for filepath in journal["jobs"].values():
+            delete_cached_result(filepath)
+    journal_path = get_journal_path(operation)
+    if journal_path != "" and os.path.exists(journal_path):
+        os.remove(journal_path)
+
+def save_cached_image(image, operation, job_key):
+    '''Saves a copy of the pixels of the provided image to the journal folder and records the job as completed. Float images are cached as float pixels, 8-bit images are cached as (smaller) 8-bit pixels.
+    Pixels are written uncompressed with NumPy instead of saving the image, saving would turn generated bake images into file images that can't be returned to the bake image pool.'''
+    journal_folder = get_journal_folder_path()
+    if journal_folder == "":
+        return
+    pixels = image_utilities.get_image_pixels(image)
+    if not image.is_float:
+        pixels = numpy.round(numpy.clip(pixels, 0.0, 1.0) * 255.0).astype(numpy.uint8)
+    filepath = os.path.join(journal_folder, "{0}_{1}.npy".format(operation.lower(), bpy.path.clean_name(image.name)))
+    numpy.save(filepath, pixels)
+    record_job(operation, job_key, filepath)
+
+def load_cached_image(filepath, image):
+    '''Copies the pixels of the cached image stored at the file path into the provided image.'''
+    pixels = numpy.load(filepath)
+    if pixels.dtype == numpy.uint8:
+        pixels = pixels.astype(numpy.float32) / 255.0
+    image_utilities.set_image_pixels(image, pixels)
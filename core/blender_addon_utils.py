@@ -9,10 +9,43 @@ import re
 import platform
 import subprocess
 from pathlib import Path
+from contextlib import contextmanager
 from ..core import texture_set_settings as tss
 from ..core import debug_logging
 from .. import preferences
 
+# Materials bound for editing, the most recently bound material is last. While a material is bound, add-on functions edit it instead of the active object's active material.
+# Materials bound by scripts (through the API) are edited without an active object (an object using the material can optionally be bound with it), and without running layer and mask selection updates.
+bound_materials = []
+
+@contextmanager
+def bind_material(material, from_script=False, obj=None):
+    '''Binds the provided material (and optionally an object using it) for editing inside the block. Add-on functions called inside the block edit the bound material instead of the active material.'''
+    bound_materials.append((material, from_script, obj))
+    try:
+        yield
+    finally:
+        bound_materials.pop()
+
+def get_active_material():
+    '''Returns the material add-on functions should edit, the most recently bound material, or the active object's active material if no material is bound. Returns None if there is no material to edit.'''
+    if bound_materials:
+        return bound_materials[-1][0]
+    active_object = getattr(bpy.context, "active_object", None)
+    if active_object == None:
+        return None
+    return active_object.active_material
+
+def get_active_object():
+    '''Returns the object using the material being edited, which is the object bound with the material when editing from a script (None if no object was bound), or the active object.'''
+    if editing_from_script():
+        return bound_materials[-1][2]
+    return getattr(bpy.context, "active_object", None)
+
+def editing_from_script():
+    '''Returns true if the material being edited was bound by a script. Scripts edit materials without an active object, and without running selection updates for the user interface.'''
+    return len(bound_materials) > 0 and bound_materials[-1][1]
+
 def check_blend_saved():
     if bpy.path.abspath("//") == "":
         return False
@@ -49,7 +82,11 @@ def set_valid_material_shading_mode(context):
 
 def verify_material_operation_context(self=None, display_message=True, check_active_object=True, check_mesh=True, check_active_material=True):
     '''Runs checks to verify that a material editing operation can be ran without errors. Returns True if the all conditions are correct for a material editing operation to be ran.'''
-    
+
+    # Materials bound by scripts are edited without an active object.
+    if editing_from_script():
+        return get_active_material() != None or not check_active_material
+
     # Check for an active object.
     if check_active_object:
         attribute_exists = getattr(bpy.context, "active_object", None)
@@ -224,6 +261,20 @@ def append_material(material_name, append_missing=True):
     else:
         return material
 
+def append_materials(material_names):
+    '''Appends all of the provided materials that don't exist from the blend asset file for this add-on in a single library load. Returns a list of the materials.'''
+    missing_material_names = [material_name for material_name in material_names if not bpy.data.materials.get(material_name)]
+    if len(missing_material_names) > 0:
+        old_node_groups = [group for group in bpy.data.node_groups]
+
+        blend_assets_path = get_blend_assets_path()
+        with bpy.data.libraries.load(blend_assets_path, link=False) as (data_from, data_to):
+            data_to.materials = missing_material_names
+
+        cleanse_duplicated_node_groups(old_node_groups, cleanse_node_groups=True, cleanse_materials=True)
+
+    return [bpy.data.materials.get(material_name) for material_name in material_names]
+
 def append_image(image_name):
     '''Appends the specified texture from the blend asset file for this add-on.'''
     image = bpy.data.images.get(image_name)
@@ -289,17 +340,17 @@ def create_image(new_image_name, image_width=-1, image_height=-1, base_color=(0.
     else:
         h = image_height
 
-    bpy.ops.image.new(name=new_image_name, 
-                      width=w, 
-                      height=h,
-                      color=base_color, 
-                      alpha=alpha_channel, 
-                      generated_type=generate_type,
-                      float=thirty_two_bit,
-                      use_stereo_3d=False, 
-                      tiled=False)
-
-    return bpy.data.images.get(new_image_name)
+    # Images are created through blend data instead of the image operator, so they can be created without a user interface context.
+    new_image = bpy.data.images.new(name=new_image_name,
+                                    width=w,
+                                    height=h,
+                                    alpha=alpha_channel,
+                                    float_buffer=thirty_two_bit,
+                                    stereo3d=False,
+                                    tiled=False)
+    new_image.generated_type = generate_type
+    new_image.generated_color = base_color
+    return new_image
     
 def create_data_image(image_name, image_width, image_height, alpha_channel=False, thirty_two_bit=False, data=False, delete_existing=True):
     '''Creates a new data based image in the blend file.'''
@@ -354,13 +405,20 @@ def unlink_node(node, node_tree, unlink_inputs=True, unlink_outputs=True):
 
 def set_texture_paint_image(image):
     '''Sets the image being actively edited using Blender's texture paint mode to the provided image if it exists within the texture paint slots from the active material.'''
+    # Scripts don't change the image being painted in the user interface.
+    if editing_from_script():
+        return
+
     if image:
         bpy.context.scene.tool_settings.image_paint.canvas = image
         bpy.context.scene.tool_settings.image_paint.mode = 'IMAGE'
-        texture_paint_images = bpy.context.active_object.active_material.texture_paint_images
+        active_material = get_active_material()
+        if active_material == None:
+            return
+        texture_paint_images = active_material.texture_paint_images
         texture_paint_slot_index = texture_paint_images.find(image.name)
         if texture_paint_slot_index >= 0 and texture_paint_slot_index < len(texture_paint_images):
-            bpy.context.object.active_material.paint_active_slot = texture_paint_slot_index
+            active_material.paint_active_slot = texture_paint_slot_index
     else:
         debug_logging.log("Can't set texture paint image, invalid image provided.")
 
@@ -371,6 +429,8 @@ def get_image_file_extension(file_format):
             return 'tga'
         case 'OPEN_EXR':
             return 'exr'
+        case 'DDS_BC1' | 'DDS_BC3' | 'DDS_BC4' | 'DDS_BC5':
+            return 'dds'
         case _:
             return file_format.lower()
 
@@ -503,6 +563,53 @@ def verify_bake_object(self, check_active_material=False):
         return False
     return True
 
+def get_node_tree_images(node_tree, images=None, visited_node_trees=None):
+    '''Returns a set of all images referenced by nodes in the provided node tree, including images in all node groups nested within it.'''
+    if images == None:
+        images = set()
+    if visited_node_trees == None:
+        visited_node_trees = set()
+    if node_tree == None or node_tree.name in visited_node_trees:
+        return images
+    visited_node_trees.add(node_tree.name)
+
+    for node in node_tree.nodes:
+        image = getattr(node, "image", None)
+        if image:
+            images.add(image)
+        if node.type == 'GROUP' and node.node_tree:
+            get_node_tree_images(node.node_tree, images, visited_node_trees)
+    return images
+
+def get_material_images(materials):
+    '''Returns a set of all images used in the provided materials, found by walking their node trees and the layer and mask node groups within them.'''
+    images = set()
+    visited_node_trees = set()
+    for material in materials:
+        if material and material.use_nodes:
+            get_node_tree_images(material.node_tree, images, visited_node_trees)
+    return images
+
+def save_images(images):
+    '''Saves the provided images if they have unsaved changes. Images with unsaved changes that have no file path are packed into the blend file if the default texture save method is pack.'''
+    addon_preferences = bpy.context.preferences.addons[preferences.ADDON_NAME].preferences
+    saved_image_count = 0
+    for image in images:
+        if image.is_dirty and image.has_data:
+            if image.filepath != '':
+                image.save()
+                saved_image_count += 1
+
+            # Temporary bake target images from the bake image pool are skipped.
+            elif addon_preferences.default_texture_save_method == 'PACK' and "rymat_bake_image_alpha" not in image:
+                image.pack()
+                saved_image_count += 1
+    debug_logging.log("Saved {0} image(s) with unsaved changes.".format(saved_image_count), sub_process=True)
+
+def save_material_images(materials):
+    '''Saves unsaved changes to only the images used in the provided materials. This is much faster than saving all images in the blend file before baking.'''
+    save_images(get_material_images(materials))
+
 def force_save_all_textures():
     '''Force saves all texture in the blend file.'''
     for image in bpy.data.images:
@@ -640,6 +747,35 @@ def safe_node_link(output_socket, input_socket, node_tree):
     if output_socket and input_socket:
         node_tree.links.new(output_socket, input_socket)
 
+def get_node_link_key(output_socket, input_socket):
+    '''Returns a key that identifies a link between the provided sockets, used to compare existing and desired links.'''
+    return (output_socket.node.name, output_socket.identifier, input_socket.node.name, input_socket.identifier)
+
+def sync_node_links(node_tree, existing_links, desired_links):
+    '''Adds and removes links so the provided existing links match the desired (output socket, input socket) links. Links that already exist are left untouched to avoid unnecessary shader recompiles.'''
+    existing_link_keys = {}
+    for link in existing_links:
+        existing_link_keys[get_node_link_key(link.from_socket, link.to_socket)] = link
+
+    desired_link_keys = {}
+    for output_socket, input_socket in desired_links:
+        if output_socket and input_socket:
+            desired_link_keys[get_node_link_key(output_socket, input_socket)] = (output_socket, input_socket)
+
+    removed_link_count = 0
+    for link_key, link in existing_link_keys.items():
+        if link_key not in desired_link_keys:
+            node_tree.links.remove(link)
+            removed_link_count += 1
+
+    added_link_count = 0
+    for link_key, (output_socket, input_socket) in desired_link_keys.items():
+        if link_key not in existing_link_keys:
+            node_tree.links.new(output_socket, input_socket)
+            added_link_count += 1
+
+    return added_link_count, removed_link_count
+
 def safe_node_delete(node_tree, node):
     '''Verifies the provided node exists, before deleting it from the node tree.'''
     if node:
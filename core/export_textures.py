@@ -5,16 +5,22 @@ import time
 import numpy
 import json
 import copy
+import shutil
+import hashlib
 from pathlib import Path
 from bpy.utils import resource_path
 import bpy
 from bpy.types import Operator, Menu, PropertyGroup
 from bpy.props import StringProperty, IntProperty, BoolProperty, EnumProperty, PointerProperty, CollectionProperty
 from ..core import mesh_map_baking
+from ..core import image_utilities
+from ..core import bake_journal
+from ..core import texture_compression
 from ..core import texture_set_settings as tss
 from ..core import debug_logging
 from ..core import blender_addon_utils as bau
 from ..core import material_layers
+from ..core import layer_cache
 from ..core import shaders
 from ..preferences import ADDON_NAME
 
@@ -29,10 +35,17 @@ default_output_texture = {
     "output_pack_channels": ["R", "G", "B", "A"]
 }
 
+default_output_resolution = {
+    "resolution": "TWO_K",
+    "name_suffix": "_2K",
+    "image_format": "PNG"
+}
+
 default_export_template_json = {
     "name": "Default Export Preset",
     "roughness_map_mode": "ROUGHNESS",
     "normal_map_mode": "OPEN_GL",
+    "output_resolutions": [],
     "output_textures": [
         {
             "export_name_format": "/MeshName_Color",
@@ -315,7 +328,11 @@ TEXTURE_EXPORT_FORMAT = [
     ("PNG", "png", "Exports the selected material channel in png texture format. This is a non-compressed format, and generally a good default"),
     ("JPEG", "jpg", "Exports the selected material channel in JPG texture format. This is a compressed format, which could be used for textures applied to models that will be shown in a web browser"),
     ("TARGA", "tga", "Exports the selected material channel in TARGA texture format"),
-    ("OPEN_EXR", "exr", "Exports the selected material channel in open exr texture format")
+    ("OPEN_EXR", "exr", "Exports the selected material channel in open exr texture format"),
+    ("DDS_BC1", "dds (BC1)", "Exports the selected material channel as a block compressed DDS texture (with mipmaps) using BC1 compression. Use for RGB textures without alpha"),
+    ("DDS_BC3", "dds (BC3)", "Exports the selected material channel as a block compressed DDS texture (with mipmaps) using BC3 compression. Use for RGBA textures"),
+    ("DDS_BC4", "dds (BC4)", "Exports the selected material channel as a block compressed DDS texture (with mipmaps) using BC4 compression. Only the red channel is exported, use for single channel textures (e.g. roughness, metallic)"),
+    ("DDS_BC5", "dds (BC5)", "Exports the selected material channel as a block compressed DDS texture (with mipmaps) using BC5 compression. Only the red and green channels are exported, use for normal maps (the blue channel is reconstructed in the shader)")
 ]
 
 EXPORT_MODE = [
@@ -336,6 +353,15 @@ NORMAL_BAKE_CHANNELS = [
     'NORMAL_HEIGHT-MIX'
 ]
 
+# File paths of textures written during the current export keyed by a hash of their pixels, used to write identical textures only once.
+exported_texture_hashes = {}
+
+# Timings and sizes recorded for each stage of the last export, written to the export manifest when the export finishes.
+export_manifest = {}
+
+# File name of the manifest written to the export folder.
+EXPORT_MANIFEST_FILE_NAME = "export_manifest.json"
+
 
 #----------------------------- CHANNEL PACKING / IMAGE EDITING FUNCTIONS -----------------------------#
 
@@ -359,8 +385,9 @@ def enumerate_color_channel(color_channel):
         case 'A':
             return 3
 
-def channel_pack(pack_textures, input_packing, output_packing, image_name_format, color_bit_depth, file_format, export_colorspace):
+def channel_pack(pack_textures, input_packing, output_packing, image_name_format, color_bit_depth, file_format, export_colorspace, texture_set_name=""):
     '''Channel packs the provided images into RGBA channels of a single image. Accepts None.'''
+    start_pack_time = time.time()
 
     # Create an array of output pixels using the first valid input texture.
     # Initialize full size empty arrays to avoid using dynamic arrays (caused by appending) which is much much slower.
@@ -414,10 +441,142 @@ def channel_pack(pack_textures, input_packing, output_packing, image_name_format
 
     # Create an image using the packed pixels.
     image_name = format_export_image_name(image_name_format)
+    pack_time = time.time() - start_pack_time
+    packed_image = save_packed_pixels(image_name, output_pixels, w, h, has_alpha, use_thirty_two_bit, file_format, export_colorspace)
+    record_exported_texture(
+        image_name,
+        texture_set=texture_set_name,
+        pack_time=pack_time,
+        pixel_buffer_bytes=source_pixels.nbytes + output_pixels.nbytes
+    )
+
+    # Save additional lower resolution copies of the packed texture defined in the export template.
+    # These are downsampled from the packed pixels so no material channels need to be baked again.
+    texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+    if len(texture_export_settings.output_resolutions) > 0:
+        packed_pixels = output_pixels.reshape(h, w, 4)
+        use_srgb = export_colorspace == 'SRGB' and not use_thirty_two_bit
+        for output_resolution in texture_export_settings.output_resolutions:
+            output_width = tss.get_resolution_value(output_resolution.resolution)
+            if output_width >= w:
+                debug_logging.log("Skipped exporting {0} at {1} pixels, output resolutions must be lower than the texture set resolution.".format(image_name, output_width), message_type='WARNING')
+                continue
+            output_height = max(1, round(h * output_width / w))
+            start_downsample_time = time.time()
+            downsampled_pixels = image_utilities.downsample_pixels(packed_pixels, output_width, output_height, srgb=use_srgb)
+            record_exported_texture(
+                image_name + output_resolution.name_suffix,
+                texture_set=texture_set_name,
+                pack_time=time.time() - start_downsample_time,
+                pixel_buffer_bytes=packed_pixels.nbytes + downsampled_pixels.nbytes
+            )
+            downsampled_image = save_packed_pixels(
+                image_name + output_resolution.name_suffix,
+                downsampled_pixels.ravel(),
+                output_width,
+                output_height,
+                has_alpha,
+                use_thirty_two_bit,
+                output_resolution.image_format,
+                export_colorspace
+            )
+
+            # Downsampled images are only required as files, remove them from the blend data to free memory.
+            if downsampled_image:
+                bpy.data.images.remove(downsampled_image)
+        debug_logging.log("Exported {0} additional output resolution(s) for: {1}".format(len(texture_export_settings.output_resolutions), image_name))
+
+    return packed_image
+
+def get_packed_pixels_hash(pixels, width, height, has_alpha, use_thirty_two_bit, file_format, export_colorspace):
+    '''Returns a hash of the packed pixels and every setting that changes how they are written to a file. Textures with the same hash produce identical files.'''
+    pixel_hash = hashlib.blake2b(numpy.ascontiguousarray(pixels, dtype=numpy.float32).data, digest_size=16)
+    pixel_hash.update("{0}_{1}_{2}_{3}_{4}_{5}".format(width, height, has_alpha, use_thirty_two_bit, file_format, export_colorspace).encode())
+    return pixel_hash.hexdigest()
+
+def link_duplicate_texture(source_filepath, filepath):
+    '''Links the file path of a duplicate exported texture to an identical texture that was already written. Files are hardlinked where possible, and copied otherwise.'''
+    if os.path.normcase(os.path.abspath(source_filepath)) == os.path.normcase(os.path.abspath(filepath)):
+        return
+    if os.path.exists(filepath):
+        os.remove(filepath)
+    try:
+        os.link(source_filepath, filepath)
+    except OSError:
+        shutil.copyfile(source_filepath, filepath)
+
+def clear_exported_texture_hashes():
+    '''Clears the record of textures written during an export, so identical textures in a new export are written again.'''
+    exported_texture_hashes.clear()
+
+def save_packed_pixels(image_name, pixels, width, height, has_alpha, use_thirty_two_bit, file_format, export_colorspace):
+    '''Creates an image from the provided packed pixels and saves it to the export folder in the defined format and colorspace. Returns None if no image is created (for block compressed formats, and textures identical to one already exported).'''
+    export_path = bau.get_texture_folder_path(folder='EXPORT_TEXTURES')
+    filepath = "{0}/{1}.{2}".format(export_path, image_name, bau.get_image_file_extension(file_format))
+
+    # Textures with a single color can optionally be collapsed to a tiny 4x4 texture.
+    texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+    if texture_export_settings.collapse_solid_textures and (width > 4 or height > 4):
+        texel_pixels = pixels.reshape(-1, 4)
+        if numpy.all(texel_pixels == texel_pixels[0]):
+            debug_logging.log("Collapsed single color texture to 4x4 pixels: {0}".format(image_name))
+            packed_image = save_packed_pixels(image_name, numpy.tile(texel_pixels[0], 16), 4, 4, has_alpha, use_thirty_two_bit, file_format, export_colorspace)
+            record_exported_texture(image_name, collapsed=True)
+            return packed_image
+
+    # Only write the first copy of identical textures, duplicates are linked to it.
+    start_encode_time = time.time()
+    pixels_hash = get_packed_pixels_hash(pixels, width, height, has_alpha, use_thirty_two_bit, file_format, export_colorspace)
+    source_filepath = exported_texture_hashes.get(pixels_hash)
+    if source_filepath and os.path.exists(source_filepath):
+        link_duplicate_texture(source_filepath, filepath)
+        debug_logging.log("Linked duplicate texture {0} to identical texture {1}".format(image_name, os.path.basename(source_filepath)))
+        record_exported_texture(
+            image_name,
+            file=os.path.basename(filepath),
+            resolution=[width, height],
+            format=file_format,
+            encode_time=time.time() - start_encode_time,
+            bytes_written=0,
+            duplicate_of=os.path.basename(source_filepath)
+        )
+        return None
+    exported_texture_hashes[pixels_hash] = filepath
+    packed_image = write_packed_pixels(filepath, image_name, pixels, width, height, has_alpha, use_thirty_two_bit, file_format, export_colorspace)
+    record_exported_texture(
+        image_name,
+        file=os.path.basename(filepath),
+        resolution=[width, height],
+        format=file_format,
+        encode_time=time.time() - start_encode_time,
+        bytes_written=os.path.getsize(filepath) if os.path.exists(filepath) else 0
+    )
+    return packed_image
+
+def write_packed_pixels(filepath, image_name, pixels, width, height, has_alpha, use_thirty_two_bit, file_format, export_colorspace):
+    '''Writes the provided packed pixels to a texture file in the defined format and colorspace. Returns None for block compressed formats, which are written directly without creating an image.'''
+
+    # The file could be hardlinked to duplicate textures from a previous export, files are written in place, so unlink the file first to avoid changing it's linked copies.
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+    # Block compressed textures are compressed directly from the packed pixels, Blender can't save these formats.
+    if texture_compression.is_block_compressed_format(file_format):
+        compressed_pixels = pixels.reshape(height, width, 4)
+        use_srgb = export_colorspace == 'SRGB' and file_format in ('DDS_BC1', 'DDS_BC3')
+
+        # Block compressed formats store 8-bit values, encode linear 32-bit colors to sRGB before compressing them.
+        if use_srgb and use_thirty_two_bit:
+            compressed_pixels = compressed_pixels.copy()
+            compressed_pixels[..., :3] = image_utilities.linear_to_srgb(compressed_pixels[..., :3])
+
+        texture_compression.save_dds(filepath, compressed_pixels, file_format, srgb=use_srgb)
+        return None
+
     packed_image = bau.create_data_image(
         image_name,
-        image_width=w,
-        image_height=h,
+        image_width=width,
+        image_height=height,
         alpha_channel=has_alpha,
         thirty_two_bit=use_thirty_two_bit,
         data=True,
@@ -432,11 +591,9 @@ def channel_pack(pack_textures, input_packing, output_packing, image_name_format
             packed_image.colorspace_settings.name = 'Non-Color'
 
     # Define a file format, filepath and fill the image pixels with the packed pixel data.
-    file_extension = bau.get_image_file_extension(file_format)
-    export_path = bau.get_texture_folder_path(folder='EXPORT_TEXTURES')
     packed_image.file_format = file_format
-    packed_image.filepath = "{0}/{1}.{2}".format(export_path, image_name, file_extension)
-    packed_image.pixels.foreach_set(output_pixels)
+    packed_image.filepath = filepath
+    packed_image.pixels.foreach_set(pixels)
     packed_image.save()
    
     # Save the packed image to a folder in the correct color space.
@@ -469,6 +626,74 @@ def invert_image(image, invert_r = False, invert_g = False, invert_b = False, in
     else:
         debug_logging.log("Error: No image provided to invert.")
 
+def pad_baked_material_channels(image_names, material_indices=None):
+    '''Extends pixels in the provided baked material channel images out of the UV islands of the active object.'''
+    for image_name in image_names:
+        image = bpy.data.images.get(image_name)
+        if image:
+            mesh_map_baking.pad_baked_image(image, bpy.context.active_object, material_indices)
+
+def start_export_manifest():
+    '''Clears statistics recorded in the previous export, and records the settings used for the new export.'''
+    texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+    export_manifest.clear()
+    export_manifest["export_preset"] = texture_export_settings.export_preset_name
+    export_manifest["export_mode"] = texture_export_settings.export_mode
+    export_manifest["samples"] = texture_export_settings.samples
+    export_manifest["resolution"] = [tss.get_texture_width(), tss.get_texture_height()]
+    export_manifest["total_time"] = 0.0
+    export_manifest["texture_sets"] = {}
+    export_manifest["textures"] = {}
+
+def record_baked_channel(texture_set_name, material_channel_name, bake_time, bake_image, from_cache=False):
+    '''Records the time taken to bake (or restore) a material channel for a texture set in the export manifest. Bake times accumulate when multiple materials are baked to a single texture set.'''
+    if "texture_sets" not in export_manifest:
+        return
+    texture_set = export_manifest["texture_sets"].setdefault(texture_set_name, {"channels": {}})
+    channel = texture_set["channels"].setdefault(material_channel_name, {
+        "bake_time": 0.0,
+        "bake_count": 0,
+        "samples": export_manifest["samples"],
+        "resolution": list(bake_image.size),
+        "image_buffer_bytes": bake_image.size[0] * bake_image.size[1] * 4 * (4 if bake_image.is_float else 1),
+        "from_cache": from_cache
+    })
+    channel["bake_time"] += bake_time
+    channel["bake_count"] += 1
+    channel["from_cache"] = channel["from_cache"] and from_cache
+
+def record_exported_texture(image_name, **statistics):
+    '''Records statistics (pack time, encode time, bytes written...) for an exported texture in the export manifest.'''
+    if "textures" not in export_manifest:
+        return
+    export_manifest["textures"].setdefault(image_name, {}).update(statistics)
+
+def write_export_manifest(total_time):
+    '''Writes the statistics recorded for the export to a json manifest in the export folder.'''
+    if "textures" not in export_manifest:
+        return
+    export_manifest["total_time"] = total_time
+    manifest_path = os.path.join(bau.get_texture_folder_path(folder='EXPORT_TEXTURES'), EXPORT_MANIFEST_FILE_NAME)
+    with open(manifest_path, "w") as json_file:
+        json.dump(export_manifest, json_file, indent=2)
+    debug_logging.log("Wrote export manifest: {0}".format(manifest_path))
+
+def get_export_stage_times():
+    '''Returns the total time spent in each export stage, and a list of (label, time) for each baked channel and written texture sorted from slowest to fastest.'''
+    stage_times = {"Bake": 0.0, "Pack": 0.0, "Encode": 0.0}
+    item_times = []
+    for texture_set_name, texture_set in export_manifest.get("texture_sets", {}).items():
+        for channel_name, channel in texture_set["channels"].items():
+            stage_times["Bake"] += channel["bake_time"]
+            item_times.append(("Bake {0} / {1}".format(texture_set_name, channel_name), channel["bake_time"]))
+    for image_name, texture in export_manifest.get("textures", {}).items():
+        stage_times["Pack"] += texture.get("pack_time", 0.0)
+        stage_times["Encode"] += texture.get("encode_time", 0.0)
+        item_times.append(("Pack {0}".format(image_name), texture.get("pack_time", 0.0)))
+        item_times.append(("Encode {0}".format(image_name), texture.get("encode_time", 0.0)))
+    item_times.sort(key=lambda item: item[1], reverse=True)
+    return stage_times, item_times
+
 def channel_pack_textures(texture_set_name):
     '''Creates channel packed textures using pre-baked textures.'''
 
@@ -541,16 +766,17 @@ def channel_pack_textures(texture_set_name):
             image_name_format=export_texture.name_format,
             color_bit_depth=export_texture.bit_depth,
             file_format=export_texture.image_format,
-            export_colorspace=export_texture.colorspace
+            export_colorspace=export_texture.colorspace,
+            texture_set_name=texture_set_name
         )
 
-    # Delete temp material channel bake images, they are no longer needed because they are packed into new textures now.
+    # Return temp material channel bake images to the bake image pool, they are no longer needed because they are packed into new textures now.
     shader_info = bpy.context.scene.rymat_shader_info
     for channel in shader_info.material_channels:
         temp_material_channel_image_name = format_baked_material_channel_name(texture_set_name, channel.name )
         temp_material_channel_image = bpy.data.images.get(temp_material_channel_image_name)
         if temp_material_channel_image:
-            bpy.data.images.remove(temp_material_channel_image)
+            image_utilities.release_bake_image(temp_material_channel_image)
 
     debug_logging.log("Channel packed textures.")
 
@@ -650,61 +876,134 @@ def set_export_template(export_preset_name):
                 export_texture.output_rgba_channels.b_color_channel = texture['output_pack_channels'][2]
                 export_texture.output_rgba_channels.a_color_channel = texture['output_pack_channels'][3]
 
+            # Export templates saved before output resolutions were supported won't define any.
+            texture_export_settings.output_resolutions.clear()
+            for resolution in template.get('output_resolutions', []):
+                output_resolution = texture_export_settings.output_resolutions.add()
+                output_resolution.resolution = resolution['resolution']
+                output_resolution.name_suffix = resolution['name_suffix']
+                output_resolution.image_format = resolution['image_format']
+
             debug_logging.log("Applied export template: {0}".format(export_preset_name))
             return
     
     debug_logging.log("Error export template was not found in the json file and can't be applied")
     return
 
-def bake_material_channel(material_channel_name, single_texture_set=False):
-    '''Bakes the defined material channel to an image texture and stores it in Blender's data. Returns true if baking was successful.'''
+def get_material_channel_bake_bit_depth(material_channel_name):
+    '''Returns the smallest bit depth ('EIGHT' or 'THIRTY_TWO') the material channel can be baked to without losing precision in the exported textures that use it.'''
+
+    # Channels with values outside of a 0 - 1 range, or vector data can't be stored in 8-bit images.
+    socket_name = shaders.get_shader_channel_socket_name(material_channel_name)
+    shader_channel = bpy.context.scene.rymat_shader_info.material_channels.get(socket_name)
+    if shader_channel == None:
+        return 'THIRTY_TWO'
+
+    match shader_channel.socket_type:
+        case 'NodeSocketColor':
+            pass
+        case 'NodeSocketFloat':
+            if shader_channel.socket_float_min < 0.0 or shader_channel.socket_float_max > 1.0:
+                return 'THIRTY_TWO'
+        case _:
+            return 'THIRTY_TWO'
+
+    # 8-bit bake images only lose no precision when every texture the channel is packed into is exported as 8-bit non-color data.
+    # Color managed (sRGB) exports are converted from linear values when saved, which requires more precision than 8-bits in dark values.
+    texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+    for export_texture in texture_export_settings.export_textures:
+        for key in export_texture.pack_textures.__annotations__.keys():
+            texture_channel = getattr(export_texture.pack_textures, key)
+            if texture_channel == 'NORMAL_HEIGHT':
+                texture_channel = 'NORMAL'
+            if texture_channel == material_channel_name:
+                if export_texture.bit_depth != 'EIGHT' or export_texture.colorspace != 'NON_COLOR':
+                    return 'THIRTY_TWO'
+    return 'EIGHT'
+
+def get_material_channel_bake_image(material_channel_name, single_texture_set=False):
+    '''Returns the image the defined material channel should be baked to for the active material, creating it if required.'''
 
-    # Ensure the material channel name provided is valid to bake.
-    static_channel_list = shaders.get_static_shader_channel_list()
-    if material_channel_name not in static_channel_list:
-        debug_logging.log("Can't bake invalid material channel: {0}".format(material_channel_name))
-        return ""
-    
     # Assign normal map image background color the default RGB color for 'UP' in Blender.
     if material_channel_name == 'NORMAL':
         background_color = (0.735337, 0.735337, 1.0, 1.0)
     else:
         background_color = (0.0, 0.0, 0.0, 1.0)
 
+    # Bake to the smallest image format that doesn't lose precision in the exported textures.
+    use_thirty_two_bit = get_material_channel_bake_bit_depth(material_channel_name) == 'THIRTY_TWO'
+
     # For baking multiple materials to a single texture set use one image that uses the name of the active object.
     if single_texture_set:
         object_name = bpy.context.active_object.name.replace('_', '')
         image_name = format_baked_material_channel_name(object_name, material_channel_name)
         export_image = bpy.data.images.get(image_name)
         if export_image == None:
-            export_image = bau.create_image(
-                new_image_name=image_name,
-                image_width=tss.get_texture_width(),
-                image_height=tss.get_texture_height(),
+            export_image = image_utilities.acquire_bake_image(
+                image_name,
+                tss.get_texture_width(),
+                tss.get_texture_height(),
                 base_color=background_color,
-                generate_type='BLANK',
                 alpha_channel=False,
-                thirty_two_bit=True,
-                add_unique_id=False,
-                delete_existing=True
+                thirty_two_bit=use_thirty_two_bit
             )
 
-    # For baking individual materials to textures, create new images to bake to for each material.
+    # For baking individual materials to textures, use a new (pooled) image to bake to for each material.
     else:
         material_name = bpy.context.active_object.active_material.name.replace('_', '')
         image_name = format_baked_material_channel_name(material_name, material_channel_name)
-        export_image = bau.create_image(
-            new_image_name=image_name,
-            image_width=tss.get_texture_width(),
-            image_height=tss.get_texture_height(),
+        export_image = image_utilities.acquire_bake_image(
+            image_name,
+            tss.get_texture_width(),
+            tss.get_texture_height(),
             base_color=background_color,
-            generate_type='BLANK',
             alpha_channel=False,
-            thirty_two_bit=True,
-            add_unique_id=False,
-            delete_existing=True
+            thirty_two_bit=use_thirty_two_bit
         )
+
+    # 8-bit images are color managed by default, store the baked values without conversion so they match the exported values.
+    if not export_image.is_float:
+        export_image.colorspace_settings.name = 'Non-Color'
+    return export_image
+
+def get_export_job_key(material_channel_name):
+    '''Returns the key used to record baking the defined material channel for the active material in the export journal.'''
+    return "{0}/{1}/{2}".format(bpy.context.active_object.name, bpy.context.active_object.active_material.name, material_channel_name)
+
+def get_export_journal_settings():
+    '''Returns the settings an export journal is valid for, an export can only be resumed if these settings haven't changed.'''
+    texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+    return [
+        bpy.context.active_object.name,
+        texture_export_settings.export_mode,
+        texture_export_settings.samples,
+        tss.get_texture_width(),
+        tss.get_texture_height(),
+        get_texture_channel_bake_list()
+    ]
+
+def restore_material_channel(material_channel_name, cached_filepath, single_texture_set=False):
+    '''Restores a material channel baked in a previous (interrupted) export from the export journal instead of baking it again. Returns the name of the restored image.'''
+    export_image = get_material_channel_bake_image(material_channel_name, single_texture_set)
+    bake_journal.load_cached_image(cached_filepath, export_image)
+    debug_logging.log("Restored baked material channel from the export journal: {0}".format(export_image.name))
+    return export_image.name
+
+def bake_material_channel(material_channel_name, single_texture_set=False, bake_mode='INVOKE_DEFAULT', last_layer_index=-1, bake_image=None):
+    '''Bakes the defined material channel to an image texture and stores it in Blender's data. Returns the name of the baked image, or an empty string if baking failed. Baking runs as a background job unless the bake mode is 'EXEC_DEFAULT'.
+    When a last layer index is provided, only the composite of layers up to and including that layer is baked. When a bake image is provided, it's baked to instead of an image from the bake image pool.'''
+
+    # Ensure the material channel name provided is valid to bake.
+    static_channel_list = shaders.get_static_shader_channel_list()
+    if material_channel_name not in static_channel_list:
+        debug_logging.log("Can't bake invalid material channel: {0}".format(material_channel_name))
+        return ""
     
+    if bake_image:
+        export_image = bake_image
+    else:
+        export_image = get_material_channel_bake_image(material_channel_name, single_texture_set)
+
     # Add the baking image to the bake texture node.
     material_nodes = bpy.context.active_object.active_material.node_tree.nodes
     image_node = material_nodes.get('BAKE_IMAGE')
@@ -720,7 +1019,9 @@ def bake_material_channel(material_channel_name, single_texture_set=False):
 
     output_socket_name = shaders.get_shader_channel_socket_name(material_channel_name)
     total_layers = material_layers.count_layers(bpy.context.active_object.active_material)
-    for i in range(total_layers, 0, -1):
+    if last_layer_index == -1:
+        last_layer_index = total_layers - 1
+    for i in range(last_layer_index + 1, 0, -1):
         layer_node = material_layers.get_material_layer_node('LAYER', i - 1)
         if bau.get_node_active(layer_node):
             if material_channel_name == 'NORMAL':
@@ -733,14 +1034,75 @@ def bake_material_channel(material_channel_name, single_texture_set=False):
 
     # Trigger a baking operation based on the material channel being baked.
     if material_channel_name == 'NORMAL':
-        bpy.ops.object.bake('INVOKE_DEFAULT', type='NORMAL')
+        bpy.ops.object.bake(bake_mode, type='NORMAL')
     else:
         bpy.context.scene.render.bake.use_pass_direct = False
         bpy.context.scene.render.bake.use_pass_indirect = False
-        bpy.ops.object.bake('INVOKE_DEFAULT', type='DIFFUSE')
+        bpy.ops.object.bake(bake_mode, type='DIFFUSE')
     
     return export_image.name
 
+def export_active_material_textures(self):
+    '''Bakes, channel packs and saves textures for the active material on the active object. Unlike the export operator, material channels are baked one after another without returning control to Blender, so this can be called from scripts. Returns true if textures were exported.'''
+    export_folder = bau.get_texture_folder_path(folder='EXPORT_TEXTURES')
+    if not bau.verify_folder(export_folder):
+        debug_logging.log_status("Define a valid export folder before exporting, or reset the folder path to 'Default'.", self, type='ERROR')
+        return False
+
+    if bau.verify_bake_object(self, check_active_material=True) == False:
+        return False
+
+    if bpy.app.is_job_running('OBJECT_BAKE') == True:
+        debug_logging.log_status("Bake job already in process, cancel or wait until the bake is finished before starting another.", self)
+        return False
+
+    # Layer caches replace frozen layers with baked images of their composite, remove them so the full layer stack is baked.
+    layer_cache.clear_object_layer_caches(self)
+
+    start_bake_time = time.time()
+    clear_exported_texture_hashes()
+    start_export_manifest()
+    image_utilities.clear_uv_coverage_cache()
+
+    # Apply baking settings for exporting textures.
+    texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+    original_render_engine_name = bpy.context.scene.render.engine
+    bpy.context.scene.render.engine = 'CYCLES'
+    bpy.context.scene.render.bake.use_clear = True
+    bpy.context.scene.render.bake.margin = mesh_map_baking.get_bake_margin()
+    bpy.context.scene.render.bake.use_selected_to_active = False
+    bpy.context.scene.cycles.samples = texture_export_settings.samples
+
+    active_object = bpy.context.active_object
+    active_material = active_object.active_material
+    bau.save_material_images([active_material])
+    add_bake_texture_nodes()
+
+    try:
+        baked_image_names = []
+        for texture_channel in get_texture_channel_bake_list():
+            start_channel_bake_time = time.time()
+            bake_image_name = bake_material_channel(texture_channel, bake_mode='EXEC_DEFAULT')
+            bake_image = bpy.data.images.get(bake_image_name)
+            if bake_image:
+                baked_image_names.append(bake_image_name)
+                record_baked_channel(active_material.name, texture_channel, time.time() - start_channel_bake_time, bake_image)
+
+        pad_baked_material_channels(baked_image_names, [active_object.active_material_index])
+        channel_pack_textures(active_material.name)
+        material_layers.show_layer()
+
+    finally:
+        bpy.context.scene.render.engine = original_render_engine_name
+        remove_bake_texture_nodes()
+        delete_bake_node()
+        image_utilities.clear_bake_image_pool()
+
+    total_bake_time = time.time() - start_bake_time
+    write_export_manifest(total_bake_time)
+    debug_logging.log("Exported textures for {0} in {1} seconds.".format(active_material.name, round(total_bake_time, 1)))
+    return True
+
 def add_bake_texture_nodes():
     '''Adds a bake texture node to all materials in all material slots on the active object.'''
 
@@ -881,14 +1243,23 @@ class RYMAT_texture_export_settings(PropertyGroup):
     input_rgba_channels: PointerProperty(type=RYMAT_RGBA_pack_channels, name="Input Pack Channels")
     output_rgba_channels: PointerProperty(type=RYMAT_RGBA_pack_channels, name="Output Pack Channels")
 
+class RYMAT_export_output_resolution(PropertyGroup):
+    '''Settings for an additional lower resolution copy of every exported texture.'''
+    resolution: EnumProperty(items=tss.TEXTURE_SET_RESOLUTIONS, name="Resolution", default='TWO_K', description="Width of the additional output texture in pixels, the height is scaled to keep the aspect ratio of the texture set")
+    name_suffix: StringProperty(name="Name Suffix", default="_2K", description="Suffix added to the names of textures exported at this resolution")
+    image_format: EnumProperty(items=TEXTURE_EXPORT_FORMAT, name="Image Format", default='PNG')
+
 class RYMAT_texture_set_export_settings(PropertyGroup):
     '''Settings that define how textures are exported from this add-on.'''
     export_preset_name: StringProperty(name="Export Preset Name", default="PBR Metallic Roughness")
     export_textures: CollectionProperty(type=RYMAT_texture_export_settings)
+    output_resolutions: CollectionProperty(type=RYMAT_export_output_resolution)
     roughness_mode: EnumProperty(name="Roughness Mode", items=ROUGHNESS_MODE, default='ROUGHNESS')
     normal_map_mode: EnumProperty(name="Normal Map Mode", items=NORMAL_MAP_MODE, default='OPEN_GL')
     export_mode: EnumProperty(name="Export Active Material", items=EXPORT_MODE, description="Exports only the active material using the defined export settings", default='SINGLE_TEXTURE_SET')
     samples: IntProperty(name="Samples", default=32, description="Sample count for baking export textures. Higher counts result in exported textures that are baked from materials that rely on sampling (blurred materials, procedural materials) being less noisy.")
+    collapse_solid_textures: BoolProperty(name="Collapse Solid Textures", default=False, description="Exports textures that contain only a single color (e.g. solid black metallic textures) as tiny 4x4 pixel textures to reduce file size")
+    show_export_statistics: BoolProperty(name="Show Export Statistics", default=False, description="Shows the time spent in each stage of the last export")
 
 class RYMAT_export_template_names(PropertyGroup):
     name: bpy.props.StringProperty()
@@ -905,7 +1276,18 @@ class RYMAT_OT_export(Operator):
     _mesh_map_channels_to_bake = []
     _original_render_engine_name = ""
     _bake_image_name = ""
+    _bake_image_restored = False
+    _baked_image_names = []
+    _use_journal = False
     _start_bake_time = 0
+    _start_channel_bake_time = 0
+
+    resume: BoolProperty(
+        name="Resume",
+        description="Continue an interrupted export from the export journal, skipping material channels that were already baked",
+        default=False,
+        options={'SKIP_SAVE'}
+    )
 
     # Users must have an object selected to call this operator.
     @ classmethod
@@ -922,22 +1304,48 @@ class RYMAT_OT_export(Operator):
             # Detect when baking is finished...
             if not bpy.app.is_job_running('OBJECT_BAKE'):
 
-                # If an image was baked, pack it in the blend files data.
+                # If an image was baked, record the bake time in the export manifest, then record it in the export journal.
+                # The bake time is taken before journaling so it doesn't include the time to write the journal.
+                # Baked images aren't packed, they are only used for channel packing after which they are returned to the bake image pool.
+                texture_export_settings = bpy.context.scene.rymat_texture_export_settings
                 bake_image = bpy.data.images.get(self._bake_image_name)
                 if bake_image != None:
-                    if not bake_image.packed_file:
-                        bake_image.pack()
+                    bake_time = time.time() - self._start_channel_bake_time
+                    texture_channel = self._texture_channels_to_bake[self._texture_channel_index]
+                    if texture_export_settings.export_mode == 'SINGLE_TEXTURE_SET':
+                        texture_set_name = bpy.context.active_object.name
+                    else:
+                        texture_set_name = bpy.context.active_object.active_material.name
+                    record_baked_channel(texture_set_name, texture_channel, bake_time, bake_image, self._bake_image_restored)
+
+                    if not self._bake_image_restored:
+                        if self._use_journal:
+                            bake_journal.save_cached_image(bake_image, 'EXPORT', get_export_job_key(texture_channel))
                         debug_logging.log("Baked - (texture channel - active material): {0} - {1}".format(self._bake_image_name, bpy.context.active_object.active_material.name))
                 
                 # Start baking the next material channel.
-                texture_export_settings = bpy.context.scene.rymat_texture_export_settings
                 if self._texture_channel_index < len(self._texture_channels_to_bake) - 1:
                     self._texture_channel_index += 1
                     self._bake_image_name = ""
-                    if texture_export_settings.export_mode == 'SINGLE_TEXTURE_SET':
-                        self._bake_image_name = bake_material_channel(self._texture_channels_to_bake[self._texture_channel_index], single_texture_set=True)
+                    texture_channel = self._texture_channels_to_bake[self._texture_channel_index]
+                    single_texture_set = texture_export_settings.export_mode == 'SINGLE_TEXTURE_SET'
+
+                    # When resuming an export, restore material channels baked before the export was interrupted instead of baking them again.
+                    cached_filepath = None
+                    if self._use_journal and self.resume:
+                        cached_filepath = bake_journal.get_completed_job('EXPORT', get_export_job_key(texture_channel))
+
+                    self._start_channel_bake_time = time.time()
+                    if cached_filepath:
+                        self._bake_image_name = restore_material_channel(texture_channel, cached_filepath, single_texture_set)
+                        self._bake_image_restored = True
                     else:
-                        self._bake_image_name = bake_material_channel(self._texture_channels_to_bake[self._texture_channel_index], single_texture_set=False)
+                        self._bake_image_name = bake_material_channel(texture_channel, single_texture_set)
+                        self._bake_image_restored = False
+
+                    # Remember baked images so UV padding can be applied to them before they are channel packed.
+                    if self._bake_image_name != "" and self._bake_image_name not in self._baked_image_names:
+                        self._baked_image_names.append(self._bake_image_name)
 
                 else:
                     # If all of the textures are baked for the active material...
@@ -946,6 +1354,8 @@ class RYMAT_OT_export(Operator):
 
                         # Channel pack baked textures after baking each material unless we are baking to a single texture set.
                         if texture_export_settings.export_mode != 'SINGLE_TEXTURE_SET':
+                            pad_baked_material_channels(self._baked_image_names, [bpy.context.active_object.active_material_index])
+                            self._baked_image_names.clear()
                             channel_pack_textures(bpy.context.active_object.active_material.name)
 
                         # Move to baking the next material.
@@ -955,7 +1365,9 @@ class RYMAT_OT_export(Operator):
                             bpy.context.active_object.active_material_index += 1
 
                         # Reset the texture channel index so all material channels are baked for the next material.
+                        # Forget the last baked image so it isn't recorded again for the next material.
                         self._texture_channel_index = -1
+                        self._bake_image_name = ""
 
                         # Link the export UV map for the next material.
                         active_material = bpy.context.active_object.active_material
@@ -966,9 +1378,12 @@ class RYMAT_OT_export(Operator):
                     else:
                         # Channel pack textures.
                         if texture_export_settings.export_mode == 'SINGLE_TEXTURE_SET':
+                            pad_baked_material_channels(self._baked_image_names)
                             channel_pack_textures(bpy.context.active_object.name)
                         else:
+                            pad_baked_material_channels(self._baked_image_names, [bpy.context.active_object.active_material_index])
                             channel_pack_textures(bpy.context.active_object.active_material.name)
+                        self._baked_image_names.clear()
                         
                         # De-isolating materials directly after their finished baking will cause errors.
                         # De-isolate all materials at the end of baking.
@@ -1000,9 +1415,16 @@ class RYMAT_OT_export(Operator):
             debug_logging.log_status("Bake job already in process, cancel or wait until the bake is finished before starting another.", self)
             return {'FINISHED'}
         
+        # Layer caches replace frozen layers with baked images of their composite, remove them so the full layer stack is baked.
+        layer_cache.clear_object_layer_caches(self)
+
         # Record the starting time before baking.
         self._start_bake_time = time.time()
 
+        # Forget textures written in previous exports, only identical textures within this export are linked.
+        clear_exported_texture_hashes()
+        start_export_manifest()
+
         # Pause auto updating for add-on properties, they will cause errors while baking.
         bpy.context.scene.pause_auto_updates = True
         
@@ -1011,6 +1433,10 @@ class RYMAT_OT_export(Operator):
 
         # Compile a list of material channels that require baking based on settings.
         self._texture_channels_to_bake = get_texture_channel_bake_list()
+        self._baked_image_names = []
+
+        # Object UVs may have changed since the last bake, clear cached UV coverage masks.
+        image_utilities.clear_uv_coverage_cache()
 
         # Get the number of materials to bake and export.
         texture_export_settings = bpy.context.scene.rymat_texture_export_settings
@@ -1043,12 +1469,18 @@ class RYMAT_OT_export(Operator):
                     image_name = format_baked_material_channel_name(object_name, channel_name)
                     export_image = bpy.data.images.get(image_name)
                     if export_image:
-                        bpy.data.images.remove(export_image)
+                        image_utilities.release_bake_image(export_image)
 
         # If there are no texture channels to bake, channel pack and finish.
         if len(self._texture_channels_to_bake) <= 0:
             debug_logging.log_status("No texture channels to bake.", self, type='INFO')
             return {'FINISHED'}
+
+        # Record progress to a journal so the export can be resumed if it's interrupted.
+        addon_preferences = bpy.context.preferences.addons[ADDON_NAME].preferences
+        self._use_journal = addon_preferences.bake_journal and bau.check_blend_saved()
+        if self._use_journal:
+            bake_journal.start_journal('EXPORT', get_export_journal_settings(), resume=self.resume)
         
         # Add texture nodes to bake to.
         add_bake_texture_nodes()
@@ -1059,12 +1491,15 @@ class RYMAT_OT_export(Operator):
 
         # Apply baking settings for exporting textures.
         baking_settings = bpy.context.scene.rymat_baking_settings
-        bpy.context.scene.render.bake.margin = baking_settings.uv_padding
+        bpy.context.scene.render.bake.margin = mesh_map_baking.get_bake_margin()
         bpy.context.scene.render.bake.use_selected_to_active = False
         bpy.context.scene.cycles.samples = texture_export_settings.samples
 
-        # Force save all textures (unsaved textures will be cleared and not bake properly).
-        bau.force_save_all_textures()
+        # Save textures used in the materials being exported (unsaved textures will be cleared and not bake properly).
+        if texture_export_settings.export_mode == 'ONLY_ACTIVE_MATERIAL':
+            bau.save_material_images([bpy.context.active_object.active_material])
+        else:
+            bau.save_material_images([material_slot.material for material_slot in bpy.context.active_object.material_slots])
 
         # Add a timer to provide periodic timer events.
         wm = context.window_manager
@@ -1083,6 +1518,7 @@ class RYMAT_OT_export(Operator):
         bpy.context.scene.render.engine = self._original_render_engine_name
         remove_bake_texture_nodes()
         delete_bake_node()
+        image_utilities.clear_bake_image_pool()
         material_layers.refresh_layer_stack()
         bpy.context.scene.pause_auto_updates = False
         self.report({'INFO'}, "Exporting textures was manually cancelled.")
@@ -1096,12 +1532,18 @@ class RYMAT_OT_export(Operator):
         bpy.context.scene.render.engine = self._original_render_engine_name
         remove_bake_texture_nodes()
         delete_bake_node()
+        image_utilities.clear_bake_image_pool()
         material_layers.refresh_layer_stack()
         bpy.context.scene.pause_auto_updates = False
 
+        # The export completed, cached material channels are no longer needed to resume it.
+        if self._use_journal:
+            bake_journal.delete_journal('EXPORT')
+
         # Log the completion exporting textures.
         end_bake_time = time.time()
         total_bake_time = end_bake_time - self._start_bake_time
+        write_export_manifest(total_bake_time)
         debug_logging.log_status("Exporting texture(s) completed, total bake time: {0} seconds.".format(round(total_bake_time), 1), self, 'INFO')
 
 class RYMAT_OT_set_export_template(Operator):
@@ -1168,6 +1610,14 @@ class RYMAT_OT_save_export_template(Operator):
             new_export_template['output_textures'][i]['output_pack_channels'][2] = export_texture.output_rgba_channels.b_color_channel
             new_export_template['output_textures'][i]['output_pack_channels'][3] = export_texture.output_rgba_channels.a_color_channel
 
+        new_export_template['output_resolutions'] = []
+        for output_resolution in texture_export_settings.output_resolutions:
+            resolution = copy.deepcopy(default_output_resolution)
+            resolution['resolution'] = output_resolution.resolution
+            resolution['name_suffix'] = output_resolution.name_suffix
+            resolution['image_format'] = output_resolution.image_format
+            new_export_template['output_resolutions'].append(resolution)
+
         # Save the new template to the json file.
         if template_existed:
             debug_logging.log_status("Export template settings updated.", self, type='INFO')
@@ -1242,6 +1692,28 @@ class RYMAT_OT_remove_export_texture(Operator):
         texture_export_settings.export_textures.remove(self.export_texture_index)
         return {'FINISHED'}
 
+class RYMAT_OT_add_export_output_resolution(Operator):
+    bl_idname = "rymat.add_export_output_resolution"
+    bl_label = "Add Output Resolution"
+    bl_description = "Adds an additional resolution all textures are exported at. Additional resolutions are downsampled from the exported textures without baking them again"
+    
+    def execute(self, context):
+        texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+        texture_export_settings.output_resolutions.add()
+        return {'FINISHED'}
+
+class RYMAT_OT_remove_export_output_resolution(Operator):
+    bl_idname = "rymat.remove_export_output_resolution"
+    bl_label = "Remove Output Resolution"
+    bl_description = "Removes the related additional output resolution"
+
+    output_resolution_index: IntProperty(default=0)
+    
+    def execute(self, context):
+        texture_export_settings = bpy.context.scene.rymat_texture_export_settings
+        texture_export_settings.output_resolutions.remove(self.output_resolution_index)
+        return {'FINISHED'}
+
 class RYMAT_OT_set_export_folder(Operator):
     bl_idname = "rymat.set_export_folder"
     bl_label = "Set Export Folder"
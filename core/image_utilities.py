@@ -12,6 +12,35 @@ from .. import preferences
 import random
 import os
 import shutil
+import numpy
+
+# Filters available for resampling image pixel buffers.
+RESAMPLE_FILTERS = [
+    ("BOX", "Box", "Averages all source pixels covered by each output pixel. Fast, and ideal for integer downsampling used in anti-aliasing"),
+    ("LANCZOS", "Lanczos", "Windowed sinc filter which keeps more detail when scaling images at the cost of slightly longer resampling times")
+]
+
+# Number of output pixel rows resampled at once, this limits the memory used by intermediate resampling buffers.
+RESAMPLE_TILE_ROWS = 256
+
+# Pixel offsets to the 8 neighbours of a pixel, used when dilating pixels out of UV islands.
+NEIGHBOUR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Standard deviations of differences in pixel values and guide normals at which neighbouring pixels stop contributing to denoised pixels.
+DENOISE_RANGE_SIGMA = 0.2
+DENOISE_NORMAL_SIGMA = 0.15
+
+# Number of pixel rows denoised at once, small bands keep intermediate denoising buffers in the CPU cache.
+DENOISE_TILE_ROWS = 64
+
+# UV coverage masks are expensive to compute for dense meshes, cache them so they are only computed once per object for each batch operation.
+uv_coverage_cache = {}
+
+# Bake target images that are no longer in use, keyed by resolution, format and alpha so their pixel buffers can be reused for the next bake.
+bake_image_pool = {}
+
+# Prefix used to name bake target images while they wait in the bake image pool.
+BAKE_IMAGE_POOL_PREFIX = "RY_BakeImagePool"
 
 def get_random_image_id():
     '''Generates a random image id number.'''
@@ -65,9 +94,10 @@ def save_all_textures():
 
     # If the default save method is pack,
     # pack all images in the blend file that have no filepath, and unsaved data.
+    # Temporary bake target images from the bake image pool are skipped.
     if addon_preferences.default_texture_save_method == 'PACK':
         for image in bpy.data.images:
-            if image.filepath == '' and image.is_dirty and image.has_data:
+            if image.filepath == '' and image.is_dirty and image.has_data and "rymat_bake_image_alpha" not in image:
                 image.pack()
 
     # If the default save method if saving externally, trigger a save
@@ -93,6 +123,410 @@ def auto_save_images():
     # Return None to unregister the timer (effecitvely stops image auto saving).
     return None
 
+def get_image_pixels(image):
+    '''Reads all pixels from the provided image into a (height, width, 4) float numpy array.'''
+    w, h = image.size
+    pixels = numpy.empty(w * h * 4, dtype=numpy.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(h, w, 4)
+
+def set_image_pixels(image, pixels):
+    '''Writes a (height, width, 4) float numpy array to the provided image, resizing the image buffer to match the pixel array if required.'''
+    h, w = pixels.shape[0], pixels.shape[1]
+    if image.size[0] != w or image.size[1] != h:
+        resize_image_buffer(image, w, h)
+    image.pixels.foreach_set(numpy.ascontiguousarray(pixels, dtype=numpy.float32).ravel())
+    image.update()
+
+def resize_image_buffer(image, width, height):
+    '''Resizes the provided image without preserving it's pixels. Generated images are regenerated at the new size which avoids the cost of resampling pixels that will be overwritten.'''
+    if image.source == 'GENERATED':
+        image.generated_width = width
+        image.generated_height = height
+    else:
+        image.scale(width, height)
+
+def get_bake_image_pool_key(width, height, alpha_channel, thirty_two_bit):
+    '''Returns the key bake target images with the provided resolution, format and alpha are pooled under.'''
+    return (width, height, alpha_channel, thirty_two_bit)
+
+def fill_image(image, color):
+    '''Fills all pixels in the provided image with a single color, writing into the existing pixel buffer.'''
+    w, h = image.size
+    pixels = numpy.empty((w * h, 4), dtype=numpy.float32)
+    pixels[:] = color
+    image.pixels.foreach_set(pixels.ravel())
+    image.update()
+
+def acquire_bake_image(image_name, width, height, base_color=(0.0, 0.0, 0.0, 1.0), alpha_channel=False, thirty_two_bit=True):
+    '''Returns a bake target image cleared to the base color, reusing a pooled image with the same resolution, format and alpha when one is available.'''
+
+    # Remove an existing image with the same name so the bake target can use it.
+    existing_image = bpy.data.images.get(image_name)
+    if existing_image:
+        bpy.data.images.remove(existing_image)
+
+    # Reuse a pooled image if one exists, pooled images may have been removed from the blend data since they were released.
+    pooled_image_names = bake_image_pool.get(get_bake_image_pool_key(width, height, alpha_channel, thirty_two_bit), [])
+    while pooled_image_names:
+        image = bpy.data.images.get(pooled_image_names.pop())
+        if image:
+            image.name = image_name
+            fill_image(image, base_color)
+            return image
+
+    # Create a new image using the data API, which avoids the overhead of running the new image operator.
+    image = bau.create_data_image(image_name, width, height, alpha_channel=alpha_channel, thirty_two_bit=thirty_two_bit, delete_existing=False)
+    image.generated_color = base_color
+
+    # Remember if the image was created with an alpha channel so it can be returned to the correct pool.
+    image["rymat_bake_image_alpha"] = alpha_channel
+    return image
+
+def release_bake_image(image):
+    '''Returns a bake target image to the bake image pool so it's pixel buffer can be reused by the next bake.'''
+    if image == None:
+        return
+
+    # Only images created by the pool are reused, packed images can't be reused as bake targets without their packed data going stale.
+    if "rymat_bake_image_alpha" not in image or image.packed_file or image.source != 'GENERATED':
+        bpy.data.images.remove(image)
+        return
+
+    w, h = image.size
+    pool_key = get_bake_image_pool_key(w, h, bool(image["rymat_bake_image_alpha"]), image.is_float)
+    pooled_image_names = bake_image_pool.setdefault(pool_key, [])
+    image.name = "{0}_{1}".format(BAKE_IMAGE_POOL_PREFIX, get_random_image_id())
+    pooled_image_names.append(image.name)
+
+def clear_bake_image_pool():
+    '''Removes all images waiting in the bake image pool from the blend data.'''
+    for pooled_image_names in bake_image_pool.values():
+        for image_name in pooled_image_names:
+            image = bpy.data.images.get(image_name)
+            if image:
+                bpy.data.images.remove(image)
+    bake_image_pool.clear()
+
+def get_resample_weights(source_size, target_size, filter_type='BOX'):
+    '''Returns source pixel indices and normalized weights (both shaped [target_size, taps]) for resampling a single image axis.'''
+    scale = target_size / source_size
+
+    # When upscaling a box filter only copies the nearest pixel, use linear interpolation instead.
+    match filter_type:
+        case 'LANCZOS':
+            support = 3.0
+            kernel = lambda x: numpy.where(numpy.abs(x) < 3.0, numpy.sinc(x) * numpy.sinc(x / 3.0), 0.0)
+        case _:
+            if scale < 1.0:
+                support = 0.5
+                kernel = lambda x: (numpy.abs(x) <= 0.5).astype(numpy.float64)
+            else:
+                support = 1.0
+                kernel = lambda x: numpy.maximum(1.0 - numpy.abs(x), 0.0)
+
+    # Widen the filter when downsampling so every source pixel contributes to the output.
+    filter_scale = max(1.0 / scale, 1.0)
+    support *= filter_scale
+
+    # Center of each output pixel in source pixel coordinates.
+    centers = (numpy.arange(target_size) + 0.5) / scale
+    taps = int(numpy.ceil(support * 2.0)) + 1
+    indices = numpy.floor(centers - support).astype(numpy.int64)[:, None] + numpy.arange(taps)[None, :]
+    weights = kernel((indices + 0.5 - centers[:, None]) / filter_scale)
+
+    # Clamp samples outside of the image to the edge pixels and normalize the weights for each output pixel.
+    indices = numpy.clip(indices, 0, source_size - 1)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return indices, weights.astype(numpy.float32)
+
+def resample_pixels(pixels, target_width, target_height, filter_type='BOX', tile_rows=RESAMPLE_TILE_ROWS):
+    '''Resamples a (height, width, 4) pixel array to the target resolution. Output is computed in bands of rows to limit the size of intermediate buffers.'''
+    source_height, source_width = pixels.shape[0], pixels.shape[1]
+    output_pixels = numpy.empty((target_height, target_width, 4), dtype=numpy.float32)
+
+    # Integer downsampling with a box filter is a plain average of pixel blocks, which can be done by reshaping the source pixels.
+    factor_x = source_width // target_width
+    factor_y = source_height // target_height
+    if (filter_type == 'BOX'
+        and factor_x >= 1 and factor_y >= 1
+        and factor_x * target_width == source_width
+        and factor_y * target_height == source_height):
+        for row_start in range(0, target_height, tile_rows):
+            row_end = min(row_start + tile_rows, target_height)
+            source_band = pixels[row_start * factor_y:row_end * factor_y]
+            source_band = source_band.reshape(row_end - row_start, factor_y, target_width, factor_x, 4)
+            output_pixels[row_start:row_end] = source_band.mean(axis=(1, 3), dtype=numpy.float32)
+        return output_pixels
+
+    # Otherwise resample with a separable filter, horizontally then vertically.
+    x_indices, x_weights = get_resample_weights(source_width, target_width, filter_type)
+    y_indices, y_weights = get_resample_weights(source_height, target_height, filter_type)
+    for row_start in range(0, target_height, tile_rows):
+        row_end = min(row_start + tile_rows, target_height)
+        band_indices = y_indices[row_start:row_end]
+        band_weights = y_weights[row_start:row_end]
+
+        # Only the source rows used by this band of output rows are filtered horizontally.
+        first_row = band_indices.min()
+        last_row = band_indices.max() + 1
+        source_band = pixels[first_row:last_row]
+        horizontal = numpy.zeros((last_row - first_row, target_width, 4), dtype=numpy.float32)
+        for tap in range(x_indices.shape[1]):
+            horizontal += source_band[:, x_indices[:, tap]] * x_weights[:, tap, None]
+
+        output_band = numpy.zeros((row_end - row_start, target_width, 4), dtype=numpy.float32)
+        for tap in range(band_indices.shape[1]):
+            output_band += horizontal[band_indices[:, tap] - first_row] * band_weights[:, tap, None, None]
+        output_pixels[row_start:row_end] = output_band
+
+    return output_pixels
+
+def srgb_to_linear(values):
+    '''Converts sRGB encoded values to linear values.'''
+    values = numpy.clip(values, 0.0, 1.0)
+    return numpy.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4).astype(numpy.float32)
+
+def linear_to_srgb(values):
+    '''Converts linear values to sRGB encoded values.'''
+    values = numpy.clip(values, 0.0, 1.0)
+    return numpy.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1.0 / 2.4) - 0.055).astype(numpy.float32)
+
+def downsample_pixels(pixels, target_width, target_height, srgb=False):
+    '''Downsamples a (height, width, 4) pixel array by averaging pixels. When the pixels are sRGB encoded, color channels are averaged in linear space so the downsampled image doesn't darken.'''
+    if not srgb:
+        return resample_pixels(pixels, target_width, target_height, filter_type='BOX')
+    linear_pixels = numpy.empty_like(pixels, dtype=numpy.float32)
+    linear_pixels[..., :3] = srgb_to_linear(pixels[..., :3])
+    linear_pixels[..., 3] = pixels[..., 3]
+    output_pixels = resample_pixels(linear_pixels, target_width, target_height, filter_type='BOX')
+    output_pixels[..., :3] = linear_to_srgb(output_pixels[..., :3])
+    return output_pixels
+
+def resample_image(image, target_width, target_height, filter_type='BOX', tile_rows=RESAMPLE_TILE_ROWS):
+    '''Resamples the provided image to the target resolution, reading and writing the image pixels only once.'''
+    if image.size[0] == target_width and image.size[1] == target_height:
+        return
+    pixels = get_image_pixels(image)
+    output_pixels = resample_pixels(pixels, target_width, target_height, filter_type, tile_rows)
+    del pixels
+    set_image_pixels(image, output_pixels)
+
+def get_uv_triangles(obj, material_indices=None):
+    '''Returns the active UV map coordinates for all triangles of the provided object's evaluated mesh as a (triangles, 3, 2) array. If material indices are provided, only triangles using those materials are returned.'''
+    uv_layer = obj.data.uv_layers.active
+    if uv_layer == None:
+        return numpy.empty((0, 3, 2), dtype=numpy.float32)
+
+    # Bakes use the evaluated mesh (with modifiers applied), read UVs from the evaluated mesh to match.
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated_object = obj.evaluated_get(depsgraph)
+    mesh = evaluated_object.to_mesh()
+    mesh.calc_loop_triangles()
+
+    triangle_count = len(mesh.loop_triangles)
+    triangle_loops = numpy.empty(triangle_count * 3, dtype=numpy.int32)
+    mesh.loop_triangles.foreach_get('loops', triangle_loops)
+    triangle_loops = triangle_loops.reshape(triangle_count, 3)
+
+    if material_indices != None:
+        triangle_materials = numpy.empty(triangle_count, dtype=numpy.int32)
+        mesh.loop_triangles.foreach_get('material_index', triangle_materials)
+        triangle_loops = triangle_loops[numpy.isin(triangle_materials, material_indices)]
+
+    evaluated_uv_layer = mesh.uv_layers.get(uv_layer.name)
+    if evaluated_uv_layer == None:
+        evaluated_uv_layer = mesh.uv_layers.active
+    loop_uvs = numpy.empty(len(mesh.loops) * 2, dtype=numpy.float32)
+    evaluated_uv_layer.data.foreach_get('uv', loop_uvs)
+    evaluated_object.to_mesh_clear()
+
+    return loop_uvs.reshape(-1, 2)[triangle_loops]
+
+def rasterize_uv_triangles(uv_triangles, width, height):
+    '''Returns a (height, width) boolean mask of pixels whose centers are covered by the provided UV triangles.'''
+    points = uv_triangles.astype(numpy.float64) * (width, height)
+    a = points[:, 0]
+    b = points[:, 1]
+    c = points[:, 2]
+
+    # Orient all triangles counter-clockwise so the inside of every triangle is to the left of each edge, and skip degenerate triangles.
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    clockwise = area < 0
+    b[clockwise], c[clockwise] = c[clockwise].copy(), b[clockwise].copy()
+    valid = area != 0
+    a, b, c = a[valid], b[valid], c[valid]
+
+    # Find the rows of pixel centers each triangle covers.
+    min_y = numpy.minimum(numpy.minimum(a[:, 1], b[:, 1]), c[:, 1])
+    max_y = numpy.maximum(numpy.maximum(a[:, 1], b[:, 1]), c[:, 1])
+    first_row = numpy.clip(numpy.ceil(min_y - 0.5), 0, height).astype(numpy.int64)
+    last_row = numpy.clip(numpy.floor(max_y - 0.5), -1, height - 1).astype(numpy.int64)
+    row_counts = numpy.maximum(last_row - first_row + 1, 0)
+
+    # Each edge crosses a row at x = offset + y * slope. For counter-clockwise triangles, edges going up bound the right side of the triangle
+    # and edges going down bound the left side. Horizontal edges can be skipped because rows are already limited to the triangle's height.
+    end_offsets = numpy.full((len(a), 3), numpy.inf, dtype=numpy.float32)
+    end_slopes = numpy.zeros((len(a), 3), dtype=numpy.float32)
+    start_offsets = numpy.full((len(a), 3), -numpy.inf, dtype=numpy.float32)
+    start_slopes = numpy.zeros((len(a), 3), dtype=numpy.float32)
+    for edge_index, (p, q) in enumerate(((a, b), (b, c), (c, a))):
+        dx = q[:, 0] - p[:, 0]
+        dy = q[:, 1] - p[:, 1]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            slope = dx / dy
+            offset = p[:, 0] - p[:, 1] * slope
+        upward = dy > 0
+        downward = dy < 0
+        end_offsets[upward, edge_index] = offset[upward]
+        end_slopes[upward, edge_index] = slope[upward]
+        start_offsets[downward, edge_index] = offset[downward]
+        start_slopes[downward, edge_index] = slope[downward]
+
+    # Expand every triangle into one scanline per covered row, and find the span of pixel centers each scanline covers.
+    row_offsets = numpy.arange(row_counts.sum()) - numpy.repeat(numpy.cumsum(row_counts) - row_counts, row_counts)
+    rows = numpy.repeat(first_row, row_counts) + row_offsets
+    center_y = (rows + 0.5).astype(numpy.float32)[:, None]
+    span_end = (numpy.repeat(end_offsets, row_counts, axis=0) + center_y * numpy.repeat(end_slopes, row_counts, axis=0)).min(axis=1)
+    span_start = (numpy.repeat(start_offsets, row_counts, axis=0) + center_y * numpy.repeat(start_slopes, row_counts, axis=0)).max(axis=1)
+
+    first_column = numpy.clip(numpy.ceil(span_start - 0.5), 0, width).astype(numpy.int64)
+    last_column = numpy.clip(numpy.floor(span_end - 0.5), -1, width - 1).astype(numpy.int64)
+    filled_span = last_column >= first_column
+    rows = rows[filled_span]
+    first_column = first_column[filled_span]
+    last_column = last_column[filled_span]
+
+    # Fill spans using a difference array, a running sum along each row marks all pixels within a span.
+    row_stride = width + 1
+    size = height * row_stride
+    span_edges = numpy.bincount(rows * row_stride + first_column, minlength=size).astype(numpy.int32)
+    span_edges -= numpy.bincount(rows * row_stride + last_column + 1, minlength=size).astype(numpy.int32)
+    span_edges = span_edges.reshape(height, row_stride)[:, :width]
+    return numpy.cumsum(span_edges, axis=1) > 0
+
+def get_uv_coverage_mask(obj, width, height, material_indices=None):
+    '''Returns a (height, width) boolean mask of pixels covered by the UV islands of the provided object. Masks are cached, call clear_uv_coverage_cache when object UVs may have changed.'''
+    uv_layer = obj.data.uv_layers.active
+    uv_layer_name = uv_layer.name if uv_layer else ""
+    if material_indices != None:
+        material_indices = tuple(sorted(material_indices))
+    cache_key = (obj.name, obj.data.name, uv_layer_name, width, height, material_indices)
+
+    coverage = uv_coverage_cache.get(cache_key)
+    if coverage is None:
+        uv_triangles = get_uv_triangles(obj, material_indices)
+        coverage = rasterize_uv_triangles(uv_triangles, width, height)
+        uv_coverage_cache[cache_key] = coverage
+        debug_logging.log("Computed UV coverage mask for {0} ({1}x{2}).".format(obj.name, width, height), sub_process=True)
+    return coverage
+
+def clear_uv_coverage_cache():
+    '''Removes all cached UV coverage masks.'''
+    uv_coverage_cache.clear()
+
+def dilate_pixels(pixels, coverage, distance):
+    '''Extends pixels inside the coverage mask outward by the provided number of pixels, in place. Each new pixel is the average of it's already filled neighbours.'''
+    height, width = coverage.shape
+    if not coverage.any():
+        return pixels
+
+    # Keep a one pixel border around the filled mask so neighbours can be read without bounds checks.
+    filled = numpy.zeros((height + 2, width + 2), dtype=bool)
+    filled[1:-1, 1:-1] = coverage
+    neighbour_count = numpy.empty((height, width), dtype=numpy.uint8)
+    for i in range(0, distance):
+        neighbour_count.fill(0)
+        for dy, dx in NEIGHBOUR_OFFSETS:
+            neighbour_count += filled[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+
+        # Only pixels on the edge of the filled area are updated each iteration.
+        frontier_y, frontier_x = numpy.nonzero(~filled[1:-1, 1:-1] & (neighbour_count > 0))
+        if len(frontier_y) == 0:
+            break
+
+        accumulated = numpy.zeros((len(frontier_y), pixels.shape[2]), dtype=numpy.float32)
+        for dy, dx in NEIGHBOUR_OFFSETS:
+            neighbour_filled = filled[frontier_y + 1 + dy, frontier_x + 1 + dx]
+            neighbour_y = numpy.clip(frontier_y + dy, 0, height - 1)
+            neighbour_x = numpy.clip(frontier_x + dx, 0, width - 1)
+            accumulated += pixels[neighbour_y, neighbour_x] * neighbour_filled[:, None]
+
+        pixels[frontier_y, frontier_x] = accumulated / neighbour_count[frontier_y, frontier_x, None]
+        filled[frontier_y + 1, frontier_x + 1] = True
+    return pixels
+
+def dilate_image(image, obj, distance, material_indices=None):
+    '''Extends pixels in the provided image out of the UV islands of the provided object by the given number of pixels.'''
+    if distance <= 0:
+        return
+    pixels = get_image_pixels(image)
+    coverage = get_uv_coverage_mask(obj, pixels.shape[1], pixels.shape[0], material_indices)
+    dilate_pixels(pixels, coverage, distance)
+    set_image_pixels(image, pixels)
+
+def bilateral_filter_axis(values, coverage, guide, axis, radius, range_sigma, guide_sigma):
+    '''Applies a joint bilateral filter along one axis of the provided (height, width, channels) values and returns the filtered values. Pixels outside the coverage mask do not contribute.'''
+    size = values.shape[axis]
+    spatial_sigma = max(radius / 2.0, 0.5)
+    range_scale = -1.0 / (2.0 * range_sigma * range_sigma * values.shape[2])
+    guide_scale = -1.0 / (2.0 * guide_sigma * guide_sigma)
+
+    coverage_weights = coverage.astype(numpy.float32)
+    accumulated = values * coverage_weights[:, :, None]
+    total_weight = coverage_weights.copy()
+
+    # Weights between two pixels are symmetric, so each pair of pixels is only weighed once for both pixels.
+    for offset in range(1, min(radius, size - 1) + 1):
+        first = (slice(None),) * axis + (slice(0, size - offset),)
+        second = (slice(None),) * axis + (slice(offset, size),)
+        exponent = numpy.square(values[first] - values[second]).sum(axis=2)
+        exponent *= range_scale
+        if guide is not None:
+            exponent += numpy.square(guide[first] - guide[second]).sum(axis=2) * guide_scale
+        exponent -= offset * offset / (2.0 * spatial_sigma * spatial_sigma)
+        weight = numpy.exp(exponent)
+        weight *= coverage_weights[first]
+        weight *= coverage_weights[second]
+        accumulated[first] += values[second] * weight[:, :, None]
+        accumulated[second] += values[first] * weight[:, :, None]
+        total_weight[first] += weight
+        total_weight[second] += weight
+
+    numpy.maximum(total_weight, 1e-6, out=total_weight)
+    return accumulated / total_weight[:, :, None]
+
+def denoise_pixels(pixels, coverage, guide=None, radius=3, range_sigma=DENOISE_RANGE_SIGMA, guide_sigma=DENOISE_NORMAL_SIGMA, tile_rows=DENOISE_TILE_ROWS):
+    '''Removes sampling noise from the rgb channels of pixels inside the coverage mask, in place, using a separable edge-aware bilateral filter. If a guide (normals) is provided, pixels with differing guide values are not blended together.'''
+    height = pixels.shape[0]
+    if radius <= 0 or not coverage.any():
+        return pixels
+
+    # Most mesh maps are greyscale, only a single channel needs to be filtered for them.
+    if numpy.array_equal(pixels[:, :, 0], pixels[:, :, 1]) and numpy.array_equal(pixels[:, :, 0], pixels[:, :, 2]):
+        values = numpy.ascontiguousarray(pixels[:, :, :1])
+    else:
+        values = numpy.ascontiguousarray(pixels[:, :, :3])
+    if guide is not None:
+        guide = numpy.ascontiguousarray(guide[:, :, :3])
+
+    # Filter horizontally, then vertically, in bands of rows.
+    # Vertical bands read a halo of rows from the horizontally filtered values around them.
+    for axis in (1, 0):
+        halo = radius if axis == 0 else 0
+        source = values.copy() if axis == 0 else values
+        for row_start in range(0, height, tile_rows):
+            row_end = min(row_start + tile_rows, height)
+            band_start = max(row_start - halo, 0)
+            band_end = min(row_end + halo, height)
+            band_guide = None if guide is None else guide[band_start:band_end]
+            filtered = bilateral_filter_axis(source[band_start:band_end], coverage[band_start:band_end], band_guide, axis, radius, range_sigma, guide_sigma)
+            band_coverage = coverage[row_start:row_end]
+            values[row_start:row_end][band_coverage] = filtered[row_start - band_start:row_end - band_start][band_coverage]
+
+    pixels[:, :, :3] = values
+    return pixels
+
 class RYMAT_OT_save_all_textures(Operator):
     bl_idname = "rymat.save_all_textures"
     bl_label = "Save All Textures"
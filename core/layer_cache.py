@@ -0,0 +1,392 @@
+# This file handles freezing layers below the selected layer into cached textures for faster interactive editing.
+# While a layer cache exists, the composite of all active layers below the cached layer is sampled from one baked image per material channel, so the viewport doesn't evaluate the frozen layers.
+# The cache is cleared automatically when any of the frozen layers, their masks or the images they use are changed.
+
+import time
+import bpy
+from bpy.types import Operator
+from ..core import material_layers
+from ..core import layer_masks
+from ..core import export_textures
+from ..core import mesh_map_baking
+from ..core import image_utilities
+from ..core import texture_set_settings as tss
+from ..core import blender_addon_utils as bau
+from ..core import debug_logging
+
+# Material properties storing the ID of the layer the cache is applied to, and the IDs of the active layers frozen in the cache.
+LAYER_CACHE_PROPERTY = "rymat_layer_cache"
+CACHED_LAYER_IDS_PROPERTY = "rymat_cached_layer_ids"
+
+# Names of images used by the frozen layers of each cached material, indexed by material pointer.
+# Painting on one of these images clears the cache.
+cached_layer_images = {}
+
+def format_layer_cache_node_name(static_channel_name):
+    '''Returns the name of the image node sampling the layer cache for the provided material channel.'''
+    return "LAYER_CACHE_{0}".format(static_channel_name)
+
+def format_layer_cache_image_name(material_name, static_channel_name):
+    '''Returns the name of the image the layer cache for the provided material channel is baked to.'''
+    return "{0}_LayerCache_{1}".format(material_name, static_channel_name)
+
+def get_active_layer_ids_below(layer_index, material=None):
+    '''Returns the IDs of all active layers below the layer at the provided index, in layer stack order.'''
+    if material == None:
+        material = bpy.context.active_object.active_material
+
+    active_layer_ids = []
+    for layer_id in material_layers.get_layer_ids(material)[:max(layer_index, 0)]:
+        layer_node = material.node_tree.nodes.get(layer_id)
+        if layer_node and bau.get_node_active(layer_node):
+            active_layer_ids.append(layer_id)
+    return active_layer_ids
+
+def get_cached_layer_ids(material):
+    '''Returns the IDs of the active layers frozen in the material's layer cache.'''
+    cached_layer_ids = material.get(CACHED_LAYER_IDS_PROPERTY, "")
+    if cached_layer_ids == "":
+        return []
+    return cached_layer_ids.split(',')
+
+def layer_cache_exists(material):
+    '''Returns true if the provided material has a layer cache applied.'''
+    if not material or not material.node_tree:
+        return False
+    return LAYER_CACHE_PROPERTY in material
+
+def get_layer_cache_outputs(material):
+    '''Returns the sockets providing cached values for each material channel, indexed by material channel name.'''
+    cache_outputs = {}
+    shader_info = bpy.context.scene.rymat_shader_info
+    for channel in shader_info.material_channels:
+        static_channel_name = bau.format_static_matchannel_name(channel.name)
+        cache_node = material.node_tree.nodes.get(format_layer_cache_node_name(static_channel_name))
+        if not cache_node:
+            continue
+
+        # Cached normals are baked in tangent space, they are converted back to the normals layers blend with.
+        if static_channel_name == 'NORMAL':
+            normal_map_node = material.node_tree.nodes.get(format_layer_cache_node_name('NORMAL_MAP'))
+            if normal_map_node:
+                cache_outputs[channel.name] = normal_map_node.outputs[0]
+        else:
+            cache_outputs[channel.name] = cache_node.outputs[0]
+    return cache_outputs
+
+def verify_layer_cache(material):
+    '''Returns the layer stack index of the layer the material's layer cache is applied to, or -1 if there is no cache. Caches that no longer match the layers they froze are cleared.'''
+    if not layer_cache_exists(material):
+        return -1
+
+    cache_layer_index = material_layers.get_layer_index(material[LAYER_CACHE_PROPERTY], material)
+    if cache_layer_index == -1:
+        clear_layer_cache(material, "the cached layer was deleted")
+        return -1
+
+    # Layers below the cached layer were added, deleted, moved or hidden since the cache was baked.
+    if get_active_layer_ids_below(cache_layer_index, material) != get_cached_layer_ids(material):
+        clear_layer_cache(material, "layers below the cached layer changed")
+        return -1
+
+    if len(get_layer_cache_outputs(material)) <= 0:
+        clear_layer_cache(material, "cached images are missing")
+        return -1
+
+    return cache_layer_index
+
+def apply_layer_cache(material, layer_index, static_channel_names):
+    '''Adds nodes sampling the baked layer cache images for each provided material channel, and marks layers below the provided layer as frozen. Layer group nodes must be relinked afterwards.'''
+    node_tree = material.node_tree
+    export_uv_map_node = material_layers.get_material_layer_node('EXPORT_UV_MAP')
+    cache_layer_node = material_layers.get_material_layer_node('LAYER', layer_index)
+
+    for i, static_channel_name in enumerate(static_channel_names):
+        cache_image = bpy.data.images.get(format_layer_cache_image_name(material.name, static_channel_name))
+        if not cache_image:
+            continue
+
+        cache_node = node_tree.nodes.new('ShaderNodeTexImage')
+        cache_node.name = format_layer_cache_node_name(static_channel_name)
+        cache_node.label = cache_node.name
+        cache_node.image = cache_image
+        cache_node.location = (cache_layer_node.location[0] - 600, cache_layer_node.location[1] - i * 300)
+        if export_uv_map_node:
+            node_tree.links.new(export_uv_map_node.outputs[0], cache_node.inputs[0])
+
+        if static_channel_name == 'NORMAL':
+            normal_map_node = node_tree.nodes.new('ShaderNodeNormalMap')
+            normal_map_node.name = format_layer_cache_node_name('NORMAL_MAP')
+            normal_map_node.label = normal_map_node.name
+            normal_map_node.location = (cache_node.location[0] + 300, cache_node.location[1])
+            if export_uv_map_node:
+                normal_map_node.uv_map = export_uv_map_node.uv_map
+            node_tree.links.new(cache_node.outputs[0], normal_map_node.inputs.get('Color'))
+
+    cached_layer_ids = get_active_layer_ids_below(layer_index, material)
+    material[LAYER_CACHE_PROPERTY] = material_layers.get_layer_id(layer_index, material)
+    material[CACHED_LAYER_IDS_PROPERTY] = ",".join(cached_layer_ids)
+
+    # Remember images used by the frozen layers, so painting on them clears the cache.
+    images = set()
+    visited_node_trees = set()
+    for layer_id in cached_layer_ids:
+        layer_node = node_tree.nodes.get(layer_id)
+        if not layer_node or not layer_node.node_tree:
+            continue
+
+        bau.get_node_tree_images(layer_node.node_tree, images, visited_node_trees)
+        for mask_id in layer_masks.read_mask_ids(layer_node.node_tree, layer_id, material.name):
+            mask_node = node_tree.nodes.get(layer_masks.format_mask_name(layer_id, mask_id, material.name))
+            if mask_node and mask_node.node_tree:
+                bau.get_node_tree_images(mask_node.node_tree, images, visited_node_trees)
+    cached_layer_images[material.as_pointer()] = {image.name for image in images}
+
+    debug_logging.log("Applied layer cache to {0}, {1} layers frozen.".format(material.name, len(cached_layer_ids)))
+
+def clear_layer_cache(material, reason=""):
+    '''Removes the layer cache from the provided material. Layer group nodes must be relinked afterwards so the frozen layers are evaluated again.'''
+    if not layer_cache_exists(material):
+        return
+
+    # Cache nodes could be indexed, clear indexed nodes before removing them.
+    material_layers.clear_material_node_index(material)
+    node_tree = material.node_tree
+    static_channel_names = [bau.format_static_matchannel_name(channel.name) for channel in bpy.context.scene.rymat_shader_info.material_channels]
+    for static_channel_name in static_channel_names + ['NORMAL_MAP']:
+        cache_node = node_tree.nodes.get(format_layer_cache_node_name(static_channel_name))
+        if cache_node:
+            node_tree.nodes.remove(cache_node)
+
+    # Cached images are kept while other materials (such as compiled copies of this material) still sample them.
+    for static_channel_name in static_channel_names:
+        cache_image = bpy.data.images.get(format_layer_cache_image_name(material.name, static_channel_name))
+        if cache_image and cache_image.users <= 0:
+            bpy.data.images.remove(cache_image)
+
+    del material[LAYER_CACHE_PROPERTY]
+    if CACHED_LAYER_IDS_PROPERTY in material:
+        del material[CACHED_LAYER_IDS_PROPERTY]
+    cached_layer_images.pop(material.as_pointer(), None)
+
+    if reason != "":
+        debug_logging.log("Cleared layer cache for {0}, {1}.".format(material.name, reason))
+    else:
+        debug_logging.log("Cleared layer cache for {0}.".format(material.name))
+
+def clear_object_layer_caches(self):
+    '''Removes layer caches from all materials on the active object and relinks their layers, so the full layer stack of each material is evaluated.'''
+    active_object = bpy.context.active_object
+    original_active_material_index = active_object.active_material_index
+    for i, material_slot in enumerate(active_object.material_slots):
+        if layer_cache_exists(material_slot.material):
+            active_object.active_material_index = i
+            clear_layer_cache(material_slot.material, "the full layer stack is required")
+            material_layers.link_layer_group_nodes(self)
+    active_object.active_material_index = original_active_material_index
+
+def check_layer_cache_updates(scene, depsgraph):
+    '''Clears the layer cache of the active material if a frozen layer, one of their masks, or an image they use was changed.'''
+    if scene.pause_auto_updates:
+        return
+
+    active_object = getattr(bpy.context.view_layer.objects, "active", None)
+    if not active_object or not layer_cache_exists(active_object.active_material):
+        return
+
+    # Collect the exact names of the frozen layer node trees and their mask node trees.
+    material = active_object.active_material
+    tree_names = set()
+    for layer_id in get_cached_layer_ids(material):
+        layer_tree_name = material_layers.format_layer_group_node_name(material.name, layer_id)
+        tree_names.add(layer_tree_name)
+        layer_node_tree = bpy.data.node_groups.get(layer_tree_name)
+        if layer_node_tree:
+            for mask_id in layer_masks.read_mask_ids(layer_node_tree, layer_id, material.name):
+                tree_names.add(layer_masks.format_mask_name(layer_id, mask_id, material.name))
+
+    image_names = cached_layer_images.get(material.as_pointer(), set())
+    for update in depsgraph.updates:
+        changed = False
+        if isinstance(update.id, bpy.types.NodeTree):
+            changed = update.id.name in tree_names
+
+        elif isinstance(update.id, bpy.types.Image):
+            changed = update.id.name in image_names
+
+        if changed:
+            clear_layer_cache(material, "{0} was changed".format(update.id.name))
+            material_layers.link_layer_group_nodes(None)
+            return
+
+def bake_layer_cache_channel(static_channel_name, layer_index):
+    '''Bakes the composite of all layers below the layer at the provided index for the provided material channel. Returns the name of the image baked to.'''
+    active_material = bpy.context.active_object.active_material
+    if static_channel_name == 'NORMAL':
+        background_color = (0.735337, 0.735337, 1.0, 1.0)
+    else:
+        background_color = (0.0, 0.0, 0.0, 1.0)
+
+    cache_image = bau.create_data_image(
+        format_layer_cache_image_name(active_material.name, static_channel_name),
+        tss.get_texture_width(),
+        tss.get_texture_height(),
+        alpha_channel=False,
+        thirty_two_bit=True,
+        delete_existing=True
+    )
+    cache_image.generated_color = background_color
+    if static_channel_name == 'NORMAL':
+        cache_image.colorspace_settings.name = 'Non-Color'
+
+    return export_textures.bake_material_channel(static_channel_name, last_layer_index=layer_index - 1, bake_image=cache_image)
+
+class RYMAT_OT_toggle_layer_cache(Operator):
+    bl_idname = "rymat.toggle_layer_cache"
+    bl_label = "Toggle Layer Cache"
+    bl_description = "Freezes all layers below the selected layer into cached textures, so only the selected layer and layers above it are evaluated while editing. Removes the layer cache if one exists. The cache is cleared automatically when a frozen layer is edited"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    _timer = None
+    _bake_channel_index = -1
+    _channels_to_bake = []
+    _original_render_engine_name = ""
+    _start_bake_time = 0
+    _bake_image_name = ""
+    _layer_index = -1
+
+    @ classmethod
+    def poll(cls, context):
+        return bau.verify_addon_active_material(context)
+
+    def modal(self, context, event):
+        if event.type in {'ESC'}:
+            self.cancel(context)
+            return {'CANCELLED'}
+
+        if event.type == 'TIMER':
+
+            # If baking still isn't finished, abort until the next timer event.
+            if bpy.app.is_job_running('OBJECT_BAKE'):
+                return {'RUNNING_MODAL'}
+
+            # Pad UV islands of the baked image so it filters without seams, and pack it so the cache is saved with the blend file.
+            bake_image = bpy.data.images.get(self._bake_image_name)
+            if bake_image != None and not bake_image.packed_file:
+                mesh_map_baking.pad_baked_image(bake_image, bpy.context.active_object, [bpy.context.active_object.active_material_index])
+                bake_image.pack()
+
+            # Start baking the next material channel.
+            if self._bake_channel_index < len(self._channels_to_bake) - 1:
+                self._bake_channel_index += 1
+                next_channel_to_bake = self._channels_to_bake[self._bake_channel_index]
+                self._bake_image_name = bake_layer_cache_channel(next_channel_to_bake, self._layer_index)
+                debug_logging.log("Started baking layer cache for {0}.".format(next_channel_to_bake))
+
+            else:
+                self.finish(context)
+                return {'FINISHED'}
+
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        active_material = bpy.context.active_object.active_material
+
+        # Remove an existing layer cache.
+        if layer_cache_exists(active_material):
+            clear_layer_cache(active_material)
+            material_layers.link_layer_group_nodes(self)
+            debug_logging.log_status("Removed layer cache.", self, type='INFO')
+            return {'FINISHED'}
+
+        self._layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
+        cached_layer_ids = get_active_layer_ids_below(self._layer_index, active_material)
+        if len(cached_layer_ids) <= 0:
+            debug_logging.log_status("No active layers below the selected layer to cache.", self, type='INFO')
+            return {'FINISHED'}
+
+        if bau.verify_bake_object(self, check_active_material=True) == False:
+            return {'FINISHED'}
+
+        if bpy.app.is_job_running('OBJECT_BAKE') == True:
+            debug_logging.log_status("Bake job already in process, cancel or wait until the bake is finished before starting another.", self)
+            return {'FINISHED'}
+
+        # Only material channels used by the frozen layers are cached.
+        shader_info = bpy.context.scene.rymat_shader_info
+        self._channels_to_bake = []
+        for channel in shader_info.material_channels:
+            for layer_id in cached_layer_ids:
+                layer_node_tree = bpy.data.node_groups.get(material_layers.format_layer_group_node_name(active_material.name, layer_id))
+                if layer_node_tree and material_layers.check_channel_nodes_exist(channel.name, layer_node_tree):
+                    self._channels_to_bake.append(bau.format_static_matchannel_name(channel.name))
+                    break
+
+        if len(self._channels_to_bake) <= 0:
+            debug_logging.log_status("No active material channels in layers below the selected layer to cache.", self, type='INFO')
+            return {'FINISHED'}
+
+        self._start_bake_time = time.time()
+        self._bake_channel_index = -1
+        self._bake_image_name = ""
+
+        # Pause auto updating for add-on properties, they will cause errors while baking.
+        bpy.context.scene.pause_auto_updates = True
+
+        # Remove material channel or mask isolation, the full composite is baked.
+        material_layers.show_layer()
+        material_layers.add_bake_texture_nodes()
+
+        # Apply baking settings.
+        self._original_render_engine_name = bpy.context.scene.render.engine
+        bpy.context.scene.render.engine = 'CYCLES'
+        bpy.context.scene.render.bake.use_clear = True
+        bpy.context.scene.render.bake.margin = mesh_map_baking.get_bake_margin()
+        bpy.context.scene.render.bake.use_selected_to_active = False
+        bpy.context.scene.cycles.samples = bpy.context.scene.rymat_texture_export_settings.samples
+        image_utilities.clear_uv_coverage_cache()
+
+        # Save textures used in the material (unsaved textures will be cleared and not bake properly).
+        bau.save_material_images([active_material])
+
+        # Add a timer to provide periodic timer events, baking starts on the first event.
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def remove_bake_nodes(self, context):
+        '''Removes the timer and temporary baking nodes, and resets render settings.'''
+        if self._timer:
+            wm = context.window_manager
+            wm.event_timer_remove(self._timer)
+
+        material_layers.remove_bake_texture_nodes()
+        export_textures.delete_bake_node()
+        bpy.context.scene.render.engine = self._original_render_engine_name
+
+    def cancel(self, context):
+        self.remove_bake_nodes(context)
+
+        # Delete partially baked cache images.
+        active_material = bpy.context.active_object.active_material
+        for static_channel_name in self._channels_to_bake:
+            cache_image = bpy.data.images.get(format_layer_cache_image_name(active_material.name, static_channel_name))
+            if cache_image:
+                bpy.data.images.remove(cache_image)
+
+        material_layers.show_layer()
+        bpy.context.scene.pause_auto_updates = False
+        debug_logging.log_status("Caching layers was cancelled by the user.", self, type='INFO')
+
+    def finish(self, context):
+        self.remove_bake_nodes(context)
+
+        active_material = bpy.context.active_object.active_material
+        apply_layer_cache(active_material, self._layer_index, self._channels_to_bake)
+        material_layers.link_layer_group_nodes(self)
+        material_layers.show_layer()
+        bpy.context.scene.pause_auto_updates = False
+
+        total_bake_time = time.time() - self._start_bake_time
+        debug_logging.log_status("Cached layers below the selected layer in {0} seconds.".format(round(total_bake_time, 1)), self, type='INFO')
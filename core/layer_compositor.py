@@ -0,0 +1,304 @@
+# This file contains a CPU compositor for merging layers without baking.
+# When both layers being merged are UV projected image layers, or constant value layers, without masks, each material channel is just a per-pixel blend.
+# The blend is calculated with vectorized NumPy, so merged images are produced directly without switching the render engine or baking.
+
+import time
+import numpy
+import bpy
+from ..core import material_layers
+from ..core import material_filters
+from ..core import layer_masks
+from ..core import image_utilities
+from ..core import texture_set_settings as tss
+from ..core import blender_addon_utils as bau
+from ..core import debug_logging
+
+# Weights used to convert colors to greyscale when colors are linked into greyscale (float) sockets.
+LUMINANCE_WEIGHTS = numpy.array([0.2126, 0.7152, 0.0722], dtype=numpy.float32)
+
+# Image colorspaces that store values the image texture node outputs without conversion.
+LINEAR_COLORSPACES = ['Non-Color', 'Linear', 'Linear Rec.709']
+
+def rgb_to_hsv(rgb):
+    '''Converts a (..., 3) array of RGB colors to HSV.'''
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    value = numpy.max(rgb, axis=-1)
+    delta = value - numpy.min(rgb, axis=-1)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        saturation = numpy.where(value > 0.0, delta / value, 0.0)
+        hue = numpy.select(
+            [delta <= 0.0, value == r, value == g],
+            [0.0, ((g - b) / delta) % 6.0, (b - r) / delta + 2.0],
+            (r - g) / delta + 4.0
+        ) / 6.0
+    return numpy.stack([hue, saturation, value], axis=-1)
+
+def hsv_to_rgb(hsv):
+    '''Converts a (..., 3) array of HSV colors to RGB.'''
+    hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    sector = (hue % 1.0) * 6.0
+    sector_index = numpy.floor(sector).astype(numpy.int32) % 6
+    fraction = sector - numpy.floor(sector)
+    p = value * (1.0 - saturation)
+    q = value * (1.0 - saturation * fraction)
+    t = value * (1.0 - saturation * (1.0 - fraction))
+    r = numpy.choose(sector_index, [value, q, p, p, t, value])
+    g = numpy.choose(sector_index, [t, value, value, q, p, p])
+    b = numpy.choose(sector_index, [p, p, t, value, value, q])
+    return numpy.stack([r, g, b], axis=-1)
+
+def blend_normals(base, blend, blending_mode):
+    '''Blends normal map colors with whiteout (combine) or reoriented (detail) normal blending.'''
+    base_normal = base * 2.0 - 1.0
+    blend_normal = blend * 2.0 - 1.0
+    if blending_mode == 'NORMAL_MAP_COMBINE':
+        normal = numpy.concatenate([base_normal[..., :2] + blend_normal[..., :2], base_normal[..., 2:] * blend_normal[..., 2:]], axis=-1)
+    else:
+        t = base_normal + numpy.array([0.0, 0.0, 1.0], dtype=numpy.float32)
+        u = blend_normal * numpy.array([-1.0, -1.0, 1.0], dtype=numpy.float32)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            normal = t * (numpy.sum(t * u, axis=-1, keepdims=True) / t[..., 2:]) - u
+    length = numpy.linalg.norm(normal, axis=-1, keepdims=True)
+    normal = numpy.where(length > 0.0, normal / numpy.maximum(length, 1e-8), numpy.array([0.0, 0.0, 1.0], dtype=numpy.float32))
+    return normal * 0.5 + 0.5
+
+def blend_colors(base, blend, blending_mode, factor):
+    '''Returns the result of blending the provided (..., 3) color arrays with the provided layer blending mode, using the provided (...) blend factor. Results match Blender's mix color node, including blending modes that don't blend linearly with the factor.'''
+    factor = factor[..., numpy.newaxis]
+    inverse_factor = 1.0 - factor
+
+    # Most blending modes blend linearly between the base color and the fully blended color.
+    # Burn, dodge, saturation and value apply the factor inside their formulas, like Blender does.
+    linear_factor = True
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        match blending_mode:
+            case 'MIX':
+                result = blend
+            case 'DARKEN':
+                result = numpy.minimum(base, blend)
+            case 'MULTIPLY':
+                result = base * blend
+            case 'BURN':
+                divisor = inverse_factor + factor * blend
+                result = numpy.where(divisor <= 0.0, 0.0, 1.0 - (1.0 - base) / divisor)
+                linear_factor = False
+            case 'LIGHTEN':
+                result = numpy.maximum(base, blend)
+            case 'SCREEN':
+                result = 1.0 - (1.0 - base) * (1.0 - blend)
+            case 'DODGE':
+                divisor = 1.0 - factor * blend
+                result = numpy.where(base == 0.0, 0.0, numpy.where(divisor <= 0.0, 1.0, numpy.minimum(base / divisor, 1.0)))
+                linear_factor = False
+            case 'ADD':
+                result = base + blend
+            case 'OVERLAY':
+                result = numpy.where(base < 0.5, 2.0 * base * blend, 1.0 - 2.0 * (1.0 - base) * (1.0 - blend))
+            case 'SOFT_LIGHT':
+                screen = 1.0 - (1.0 - blend) * (1.0 - base)
+                result = (1.0 - base) * blend * base + base * screen
+            case 'LINEAR_LIGHT':
+                result = base + 2.0 * blend - 1.0
+            case 'DIFFERENCE':
+                result = numpy.abs(base - blend)
+            case 'EXCLUSION':
+                result = numpy.maximum(base + blend - 2.0 * base * blend, 0.0)
+            case 'SUBTRACT':
+                result = base - blend
+            case 'DIVIDE':
+                result = numpy.where(blend != 0.0, base / blend, base)
+            case 'HUE' | 'SATURATION' | 'VALUE' | 'COLOR':
+                base_hsv = rgb_to_hsv(base)
+                blend_hsv = rgb_to_hsv(blend)
+                result_hsv = base_hsv.copy()
+                match blending_mode:
+                    case 'HUE':
+                        result_hsv[..., 0] = numpy.where(blend_hsv[..., 1] != 0.0, blend_hsv[..., 0], base_hsv[..., 0])
+                    case 'SATURATION':
+                        blended_saturation = inverse_factor[..., 0] * base_hsv[..., 1] + factor[..., 0] * blend_hsv[..., 1]
+                        result_hsv[..., 1] = numpy.where(base_hsv[..., 1] != 0.0, blended_saturation, base_hsv[..., 1])
+                        linear_factor = False
+                    case 'VALUE':
+                        result_hsv[..., 2] = inverse_factor[..., 0] * base_hsv[..., 2] + factor[..., 0] * blend_hsv[..., 2]
+                        linear_factor = False
+                    case 'COLOR':
+                        has_saturation = blend_hsv[..., 1] != 0.0
+                        result_hsv[..., 0] = numpy.where(has_saturation, blend_hsv[..., 0], base_hsv[..., 0])
+                        result_hsv[..., 1] = numpy.where(has_saturation, blend_hsv[..., 1], base_hsv[..., 1])
+                result = hsv_to_rgb(result_hsv)
+            case 'NORMAL_MAP_COMBINE' | 'NORMAL_MAP_DETAIL':
+                return (inverse_factor * base + factor * blend_normals(base, blend, blending_mode)).astype(numpy.float32)
+            case _:
+                result = blend
+
+    if linear_factor:
+        result = inverse_factor * base + factor * result
+
+    # Layer mix nodes clamp their result.
+    return numpy.clip(result, 0.0, 1.0).astype(numpy.float32)
+
+def composite_over(base_color, base_alpha, blend_color, blend_alpha, blending_mode):
+    '''Composites a layer over the layer below it and returns the color and alpha of a single layer that looks the same. Where the layer below is opaque, this matches blending the layer with it's mix node using the layer's alpha as the factor.'''
+    blended_color = blend_colors(base_color, blend_color, blending_mode, blend_alpha)
+    base_alpha = base_alpha[..., numpy.newaxis]
+    blend_alpha = blend_alpha[..., numpy.newaxis]
+    alpha = blend_alpha + base_alpha * (1.0 - blend_alpha)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        color = numpy.where(alpha > 0.0, ((1.0 - base_alpha) * blend_alpha * blend_color + base_alpha * blended_color) / alpha, 0.0)
+    return color.astype(numpy.float32), alpha[..., 0].astype(numpy.float32)
+
+def projection_uses_defaults(projection_node):
+    '''Returns true if all unlinked inputs of the provided projection node are at their default values, so projected images map one texel to one pixel of the texture set.'''
+    interface_sockets = {item.identifier: item for item in projection_node.node_tree.interface.items_tree if item.item_type == 'SOCKET'}
+    for input in projection_node.inputs:
+        interface_socket = interface_sockets.get(input.identifier)
+        if input.is_linked or not interface_socket or not hasattr(interface_socket, "default_value") or not hasattr(input, "default_value"):
+            continue
+        if not numpy.allclose(numpy.array(input.default_value, dtype=numpy.float32), numpy.array(interface_socket.default_value, dtype=numpy.float32)):
+            return False
+    return True
+
+def read_image_color(image, width, height):
+    '''Returns the color (height, width, 3) and alpha (height, width) the image texture node outputs for the provided image, or None if the image can't be read without resampling.'''
+    if not image or image.size[0] != width or image.size[1] != height:
+        return None
+
+    pixels = image_utilities.get_image_pixels(image)
+    colorspace = image.colorspace_settings.name
+    if colorspace == 'sRGB' and not image.is_float:
+        pixels[..., :3] = image_utilities.srgb_to_linear(pixels[..., :3])
+    elif colorspace not in LINEAR_COLORSPACES:
+        return None
+    return pixels[..., :3], pixels[..., 3]
+
+def read_layer_channel(layer_index, material_channel_name, width, height):
+    '''Returns the color (height, width, 3), alpha (height, width) and blending mode the layer at the provided index applies to the provided material channel. Returns None if the layer can't be evaluated on the CPU.'''
+    layer_node_tree = material_layers.get_layer_node_tree(layer_index)
+    if not layer_node_tree:
+        return None
+
+    # Layers without nodes for the material channel pass the channel through.
+    if not material_layers.check_channel_nodes_exist(material_channel_name, layer_node_tree):
+        return numpy.zeros((height, width, 3), dtype=numpy.float32), numpy.zeros((height, width), dtype=numpy.float32), 'MIX'
+
+    # Muted mix nodes pass the material channel through, image layers mute all material channels except base color by default.
+    mix_node = material_layers.get_material_layer_node('MIX', layer_index, material_channel_name)
+    if mix_node and mix_node.mute:
+        return numpy.zeros((height, width, 3), dtype=numpy.float32), numpy.zeros((height, width), dtype=numpy.float32), 'MIX'
+
+    # Masks, filters and blurring are evaluated by node groups that can't be reproduced on the CPU.
+    if layer_masks.count_masks(layer_index) > 0:
+        return None
+
+    if layer_node_tree.nodes.get(material_filters.format_filter_name(material_channel_name, 1)):
+        return None
+
+    blur_node = material_layers.get_material_layer_node('BLUR', layer_index, material_channel_name)
+    if blur_node and not blur_node.mute:
+        return None
+
+    projection_node = material_layers.get_material_layer_node('PROJECTION', layer_index)
+    if not projection_node or not projection_node.node_tree or projection_node.node_tree.name == 'RY_DecalProjection':
+        return None
+
+    opacity_node = material_layers.get_material_layer_node('OPACITY', layer_index, material_channel_name)
+    value_node = material_layers.get_material_layer_node('VALUE', layer_index, material_channel_name)
+    if not mix_node or not opacity_node or not value_node or opacity_node.inputs[0].is_linked:
+        return None
+
+    blending_mode = material_layers.get_mix_node_blending_mode(mix_node)
+    if blending_mode == 'ERROR':
+        return None
+
+    # Find the value node output, and the color channel of it, linked into the mix node.
+    mix_input = mix_node.inputs[material_layers.MIX_NODE_INPUT_INDEX[mix_node.bl_static_type]]
+    if not mix_input.is_linked:
+        return None
+    from_node = mix_input.links[0].from_node
+    from_socket = mix_input.links[0].from_socket
+    color_channel = -1
+    if from_node.bl_static_type == 'SEPARATE_COLOR':
+        color_channel = list(from_node.outputs).index(from_socket)
+        if not from_node.inputs[0].is_linked:
+            return None
+        from_socket = from_node.inputs[0].links[0].from_socket
+        from_node = from_node.inputs[0].links[0].from_node
+
+    # The normal rotation fix node doesn't change normals when the projection isn't rotated.
+    if from_node.name == 'FIX_NORMAL_ROTATION' and from_node.inputs[0].is_linked:
+        from_socket = from_node.inputs[0].links[0].from_socket
+        from_node = from_node.inputs[0].links[0].from_node
+
+    if from_node != value_node:
+        return None
+
+    image_alpha = None
+    match value_node.bl_static_type:
+        case 'RGB':
+            color = numpy.broadcast_to(numpy.array(value_node.outputs[0].default_value[:3], dtype=numpy.float32), (height, width, 3))
+        case 'VALUE':
+            color = numpy.full((height, width, 3), value_node.outputs[0].default_value, dtype=numpy.float32)
+        case 'TEX_IMAGE':
+            if projection_node.node_tree.name != 'RY_UVProjection' or not projection_uses_defaults(projection_node):
+                return None
+            image_color = read_image_color(value_node.image, width, height)
+            if image_color == None:
+                return None
+            color, image_alpha = image_color
+            if from_socket.name == 'Alpha':
+                color = numpy.repeat(image_alpha[..., numpy.newaxis], 3, axis=-1)
+        case _:
+            return None
+
+    if color_channel != -1:
+        color = numpy.repeat(color[..., color_channel:color_channel + 1], 3, axis=-1)
+
+    # Colors linked into greyscale material channels are converted to greyscale by Blender.
+    channel = bpy.context.scene.rymat_shader_info.material_channels.get(material_channel_name)
+    if channel and channel.socket_type == 'NodeSocketFloat':
+        color = numpy.repeat(numpy.sum(color * LUMINANCE_WEIGHTS, axis=-1, keepdims=True), 3, axis=-1)
+
+    # The layer opacity blends between 0 and the layer mask (multiplied by image alpha when image alpha blending is on).
+    mask = numpy.ones((height, width), dtype=numpy.float32)
+    image_alpha_node = material_layers.get_material_layer_node('MIX_IMAGE_ALPHA', layer_index, material_channel_name)
+    if image_alpha_node and not image_alpha_node.mute and image_alpha is not None:
+        mask = numpy.clip(image_alpha, 0.0, 1.0)
+    opacity = numpy.clip(opacity_node.inputs[0].default_value, 0.0, 1.0)
+    alpha = opacity_node.inputs[2].default_value * (1.0 - opacity) + mask * opacity
+    return numpy.ascontiguousarray(color, dtype=numpy.float32), alpha.astype(numpy.float32), blending_mode
+
+def composite_merged_layers(layer_index, material_channel_names, layer_name):
+    '''Merges the layer at the provided index with the layer below it by blending their material channels on the CPU, and writes the merged images. Returns false without writing any images if either layer can't be evaluated on the CPU.'''
+    start_time = time.time()
+    width = tss.get_texture_width()
+    height = tss.get_texture_height()
+
+    # Evaluate all material channels before writing any images, so a merge falling back to baking leaves no partial results.
+    merged_channels = {}
+    for material_channel_name in material_channel_names:
+        below_channel = read_layer_channel(layer_index - 1, material_channel_name, width, height)
+        if below_channel == None:
+            return False
+
+        above_channel = read_layer_channel(layer_index, material_channel_name, width, height)
+        if above_channel == None:
+            return False
+
+        below_color, below_alpha, _ = below_channel
+        above_color, above_alpha, above_blending_mode = above_channel
+        merged_channels[material_channel_name] = composite_over(below_color, below_alpha, above_color, above_alpha, above_blending_mode)
+
+    for material_channel_name, (color, alpha) in merged_channels.items():
+        merged_image = bau.create_data_image(
+            material_layers.format_merged_image_name(layer_name, material_channel_name),
+            width,
+            height,
+            alpha_channel=True,
+            thirty_two_bit=True,
+            delete_existing=True
+        )
+        image_utilities.set_image_pixels(merged_image, numpy.concatenate([color, alpha[..., numpy.newaxis]], axis=-1))
+        merged_image.pack()
+
+    debug_logging.log("Merged {0} material channels on the CPU in {1} seconds.".format(len(merged_channels), round(time.time() - start_time, 2)))
+    return True
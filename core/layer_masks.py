@@ -4,9 +4,33 @@ from bpy.props import BoolProperty, IntProperty, StringProperty
 import random
 from ..core import texture_set_settings as tss
 from ..core import material_layers
+from ..core import layer_stack_model
 from ..core import blender_addon_utils as bau
 from ..core import debug_logging
 
+# Custom layer node tree property that stores mask IDs in mask stack order, separated by commas.
+MASK_IDS_PROPERTY = "rymat_mask_ids"
+
+# Nodes in mask node trees that can be accessed with get_mask_node.
+MASK_NODE_NAMES = [
+    'GROUP_INPUT',
+    'GROUP_OUTPUT',
+    'MASK_TYPE',
+    'MASK_MIX',
+    'FILTER',
+    'PROJECTION',
+    'DECAL_COORDINATES',
+    'DECAL_OFFSET',
+    'TRIPLANAR_BLEND',
+    'BLUR',
+    'AMBIENT_OCCLUSION',
+    'CURVATURE',
+    'THICKNESS',
+    'NORMALS',
+    'WORLD_SPACE_NORMALS',
+    'SEPARATE_RGB'
+]
+
 def update_selected_mask_index(self, context):
     '''Updates properties when the selected mask slot is changed.'''
     selected_layer_index = context.scene.rymat_layer_stack.selected_layer_index
@@ -15,174 +39,128 @@ def update_selected_mask_index(self, context):
     if mask_texture_node:
         bau.set_texture_paint_image(mask_texture_node.image)
 
-def parse_mask_layer_index(mask_group_node_name):
-    '''Return the mask's layer index by parsing the mask group node name. Returns -1 if there is no active object.'''
-    active_object = bpy.context.active_object
-    if active_object:
-        active_material = active_object.active_material
-        if active_material:
-            indicies = mask_group_node_name[len(active_object.name):]
-            indicies = indicies.split('_')
-            return int(indicies[1])
-    return -1
-
-def parse_mask_index(mask_group_node_name):
-    '''Return the mask's index by parsing the mask group node name. Returns -1 if there is no active object.'''
-    active_object = bpy.context.active_object
-    if active_object:
-        active_material = active_object.active_material
-        if active_material:
-            indicies = mask_group_node_name[len(active_object.name):]
-            indicies = indicies.split('_')
-            return int(indicies[2])
-    return -1
-
-def format_mask_name(layer_index, mask_index, material_name=""):
+def format_mask_name(layer_id, mask_id, material_name=""):
     '''Returns a properly formatted name for a mask node created with this add-on.'''
     if material_name == "":
-        material_name = bpy.context.active_object.active_material.name
-    return "{0}_{1}_{2}".format(material_name, str(layer_index), str(mask_index))
+        material_name = bau.get_active_material().name
+    return "{0}_{1}_{2}".format(material_name, str(layer_id), str(mask_id))
+
+def read_mask_ids(layer_node_tree, layer_id, material_name):
+    '''Returns the IDs of all masks applied to the layer using the provided layer node tree, in mask stack order.'''
+    mask_ids = None
+    if layer_node_tree:
+        mask_ids = layer_node_tree.get(MASK_IDS_PROPERTY)
+
+    if mask_ids == None:
+
+        # Masks on layers that don't store mask IDs are named with their mask index, use their mask index as the mask ID.
+        mask_ids = []
+        while bpy.data.node_groups.get(format_mask_name(layer_id, len(mask_ids), material_name)):
+            mask_ids.append(str(len(mask_ids)))
+        return mask_ids
+
+    if mask_ids == "":
+        return []
+    return mask_ids.split(',')
+
+def get_mask_ids(layer_index, material=None):
+    '''Returns the IDs of all masks applied to the layer at the provided index in the specified material (active material if no material is specified), in mask stack order. Mask group nodes and their node trees are named with the material name, layer ID and mask ID.'''
+    if material == None:
+        material = bau.get_active_material()
+        if not material:
+            return []
+
+    layer_id = material_layers.get_layer_id(layer_index, material)
+    if layer_id == None:
+        return []
+
+    layer_node_tree = bpy.data.node_groups.get(material_layers.format_layer_group_node_name(material.name, layer_id))
+    return read_mask_ids(layer_node_tree, layer_id, material.name)
+
+def set_mask_ids(layer_index, mask_ids, material=None):
+    '''Stores the IDs of all masks applied to the layer at the provided index in mask stack order.'''
+    if material == None:
+        material = bau.get_active_material()
+    layer_id = material_layers.get_layer_id(layer_index, material)
+    layer_node_tree = bpy.data.node_groups.get(material_layers.format_layer_group_node_name(material.name, layer_id))
+    if layer_node_tree:
+        layer_node_tree[MASK_IDS_PROPERTY] = ",".join(mask_ids)
+    layer_stack_model.clear_layer_stack_models(material)
+
+def get_mask_id(layer_index, mask_index, material=None):
+    '''Returns the ID of the mask at the provided mask stack index, or None if the mask doesn't exist.'''
+    mask_ids = get_mask_ids(layer_index, material)
+    mask_index = int(mask_index)
+    if mask_index < 0 or mask_index >= len(mask_ids):
+        return None
+    return mask_ids[mask_index]
+
+def insert_mask_id(layer_index, mask_index):
+    '''Inserts a new, unused mask ID into the mask stack of the layer at the provided index and returns it. Masks above the new mask keep their IDs, so none of their nodes need to be renamed.'''
+    active_material = bau.get_active_material()
+    layer_id = material_layers.get_layer_id(layer_index, active_material)
+    mask_ids = get_mask_ids(layer_index, active_material)
+
+    new_mask_id = max([int(mask_id) for mask_id in mask_ids], default=-1) + 1
+    while bpy.data.node_groups.get(format_mask_name(layer_id, new_mask_id, active_material.name)):
+        new_mask_id += 1
+
+    mask_ids.insert(mask_index, str(new_mask_id))
+    set_mask_ids(layer_index, mask_ids, active_material)
+    return str(new_mask_id)
 
 def get_mask_node_tree(layer_index, mask_index, active_material_name=""):
     '''Returns the mask node tree / node group at the provided layer and mask index.'''
     if active_material_name == "":
-        active_material_name = bpy.context.active_object.active_material.name
-    mask_node_tree_name = format_mask_name(layer_index, mask_index, active_material_name)
-    return bpy.data.node_groups.get(mask_node_tree_name)
+        material = bau.get_active_material()
+    else:
+        material = bpy.data.materials.get(active_material_name)
 
-def get_mask_node(node_name, layer_index, mask_index, node_number=1, get_changed=False):
-    if bpy.context.active_object == None:
-        return None
-    
-    active_material = bpy.context.active_object.active_material
-    if active_material == None:
+    layer_id = material_layers.get_layer_id(layer_index, material)
+    mask_id = get_mask_id(layer_index, mask_index, material)
+    if layer_id == None or mask_id == None:
         return None
 
-    match node_name:
-        case 'MASK':
-            mask_node_name = format_mask_name(layer_index, mask_index)
-            if get_changed:
-                mask_node_name += "~"
-            return active_material.node_tree.nodes.get(mask_node_name)
-
-        case 'GROUP_INPUT':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('GROUP_INPUT')
-            return None     
-
-        case 'GROUP_OUTPUT':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('GROUP_OUTPUT')
-            return None    
-
-        case 'MASK_TYPE':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('MASK_TYPE')
-            return None     
-
-        case 'MASK_MIX':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('MASK_MIX')
-            return None
+    mask_node_tree_name = format_mask_name(layer_id, mask_id, material.name)
+    return bpy.data.node_groups.get(mask_node_tree_name)
 
-        case 'FILTER':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('FILTER')
-            return None
+def get_mask_node(node_name, layer_index, mask_index, node_number=1):
+    active_material = bau.get_active_material()
+    if active_material == None:
+        return None
 
-        case 'PROJECTION':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('PROJECTION')
-            return None
+    layer_id = material_layers.get_layer_id(layer_index, active_material)
+    mask_id = get_mask_id(layer_index, mask_index, active_material)
+    if layer_id == None or mask_id == None:
+        return None
 
-        case 'DECAL_COORDINATES':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('DECAL_COORDINATES')
-            return None
+    # Return the node from the material node index if it was found previously.
+    index_key = ('MASK', node_name, layer_id, mask_id, node_number)
+    node = material_layers.get_indexed_node(active_material, index_key)
+    if node:
+        return node
 
-        case 'DECAL_OFFSET':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('DECAL_OFFSET')
-            return None
+    mask_group_node_name = format_mask_name(layer_id, mask_id, active_material.name)
+    if node_name == 'MASK':
+        node_tree = active_material.node_tree
+        mask_node_name = mask_group_node_name
 
-        case 'TRIPLANAR_BLEND':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('TRIPLANAR_BLEND')
+    else:
+        if node_name == 'TEXTURE':
+            mask_node_name = "TEXTURE_{0}".format(node_number)
+        elif node_name in MASK_NODE_NAMES:
+            mask_node_name = node_name
+        else:
             return None
 
-        case 'TEXTURE':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get("TEXTURE_{0}".format(node_number))
-            return None
-        
-        case 'BLUR':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('BLUR')
-            return None        
-
-        case 'AMBIENT_OCCLUSION':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('AMBIENT_OCCLUSION')
+        node_tree = bpy.data.node_groups.get(mask_group_node_name)
+        if not node_tree:
             return None
 
-        case 'CURVATURE':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('CURVATURE')
-            return None
-        
-        case 'THICKNESS':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('THICKNESS')
-            return None
-        
-        case 'NORMALS':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('NORMALS')
-            return None
-        
-        case 'WORLD_SPACE_NORMALS':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('WORLD_SPACE_NORMALS')
-            return None
-        
-        case 'SEPARATE_RGB':
-            mask_group_node_name = format_mask_name(layer_index, mask_index)
-            node_tree = bpy.data.node_groups.get(mask_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('SEPARATE_RGB')
-            return None
+    node = node_tree.nodes.get(mask_node_name)
+    if node:
+        material_layers.index_node(active_material, index_key, node)
+    return node
 
 def get_mask_type(layer_index, mask_index):
     '''Returns the mask type by returning the label of the mask type node from the mask group node.'''
@@ -193,21 +171,16 @@ def get_mask_type(layer_index, mask_index):
         return 'UNDEFINED'
 
 def count_masks(layer_index, material_name=""):
-    '''Counts the total number of masks for the specified material by applied to the specified layer by counting existing material node groups in the blend data.'''
-    mask_count = 0
+    '''Counts the total number of masks for the specified material applied to the specified layer by reading the layer's mask IDs.'''
 
     # If a specific material name is provided, count for the material name.
     if material_name != "":
-        while bpy.data.node_groups.get(format_mask_name(layer_index, mask_count, material_name)):
-            mask_count += 1
-    else:
-        active_object = bpy.context.active_object
-        if active_object:
-            if active_object.active_material:
-                while bpy.data.node_groups.get(format_mask_name(layer_index, mask_count, active_object.active_material.name)):
-                    mask_count += 1
+        material = bpy.data.materials.get(material_name)
+        if not material:
+            return 0
+        return len(get_mask_ids(layer_index, material))
 
-    return mask_count
+    return len(get_mask_ids(layer_index))
 
 def add_mask_slot():
     '''Adds a new mask slot to the mask stack.'''
@@ -229,7 +202,7 @@ def add_mask_slot():
         move_to_index = 0
         masks.move(move_index, move_to_index)
         mask_stack.layer_index = move_to_index
-        bpy.context.scene.rymat_mask_stack.selected_index = len(masks) - 1
+        set_selected_mask_index(len(masks) - 1)
 
     # Moves the new layer above the currently selected layer and selects it.
     else: 
@@ -237,10 +210,17 @@ def add_mask_slot():
         move_to_index = max(0, min(bpy.context.scene.rymat_mask_stack.selected_index + 1, len(masks) - 1))
         masks.move(move_index, move_to_index)
         mask_stack.layer_index = move_to_index
-        bpy.context.scene.rymat_mask_stack.selected_index = max(0, min(bpy.context.scene.rymat_mask_stack.selected_index + 1, len(masks) - 1))
+        set_selected_mask_index(max(0, min(bpy.context.scene.rymat_mask_stack.selected_index + 1, len(masks) - 1)))
 
     return bpy.context.scene.rymat_mask_stack.selected_index
 
+def set_selected_mask_index(mask_index):
+    '''Selects the mask at the provided index. When editing from a script, the index is written as an ID property, so mask selection updates for the user interface don't run.'''
+    if bau.editing_from_script():
+        bpy.context.scene.rymat_mask_stack["selected_index"] = mask_index
+    else:
+        bpy.context.scene.rymat_mask_stack.selected_index = mask_index
+
 def add_layer_mask(type, self):
     '''Adds a mask of the specified type to the selected material layer.'''
 
@@ -249,114 +229,109 @@ def add_layer_mask(type, self):
 
     selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
     new_mask_slot_index = add_mask_slot()
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
+
+    # Add a new mask ID to the layer's mask stack, masks above the new mask keep their IDs so none of their nodes need to be renamed.
+    new_mask_id = insert_mask_id(selected_layer_index, new_mask_slot_index)
+    new_mask_name = format_mask_name(material_layers.get_layer_id(selected_layer_index), new_mask_id)
     
     new_mask_group_node = None
     match type:
         case 'EMPTY':
             default_node_group = bau.append_group_node("RY_ImageMask", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Image Mask"
             
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
             debug_logging.log("Added empty layer mask.")
                 
         case 'BLACK':
             default_node_group = bau.append_group_node("RY_ImageMask", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Image Mask"
 
-            image_name = "Mask_" + str(random.randrange(10000,99999))
-            while bpy.data.images.get(image_name) != None:
-                image_name = "Mask_" + str(random.randrange(10000,99999))
-            bpy.ops.image.new(name=image_name, 
-                              width=tss.get_texture_width(), 
-                              height=tss.get_texture_height(), 
-                              color=(0.0, 0.0, 0.0, 1.0), 
-                              alpha=False, generated_type='BLANK', 
-                              float=True, 
-                              use_stereo_3d=False, 
-                              tiled=False)
+            new_image = bau.create_image(
+                new_image_name="Mask",
+                base_color=(0.0, 0.0, 0.0, 1.0),
+                generate_type='BLANK',
+                alpha_channel=False,
+                thirty_two_bit=True,
+                add_unique_id=True
+            )
             
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
 
             texture_node = get_mask_node('TEXTURE', selected_layer_index, new_mask_slot_index)
-            new_image = bpy.data.images.get(image_name)
             if texture_node and new_image:
                 texture_node.image = new_image
 
-            bpy.context.scene.tool_settings.image_paint.canvas = new_image
+            # Scripts don't change the image being painted in the user interface.
+            if not bau.editing_from_script():
+                bpy.context.scene.tool_settings.image_paint.canvas = new_image
             debug_logging.log("Added black layer mask.")
 
         case 'WHITE':
             default_node_group = bau.append_group_node("RY_ImageMask", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Image Mask"
 
-            image_name = "Mask_" + str(random.randrange(10000,99999))
-            while bpy.data.images.get(image_name) != None:
-                image_name = "Mask_" + str(random.randrange(10000,99999))
-            bpy.ops.image.new(name=image_name, 
-                              width=tss.get_texture_width(), 
-                              height=tss.get_texture_height(), 
-                              color=(1.0, 1.0, 1.0, 1.0), 
-                              alpha=False, generated_type='BLANK', 
-                              float=True, 
-                              use_stereo_3d=False, 
-                              tiled=False)
+            new_image = bau.create_image(
+                new_image_name="Mask",
+                base_color=(1.0, 1.0, 1.0, 1.0),
+                generate_type='BLANK',
+                alpha_channel=False,
+                thirty_two_bit=True,
+                add_unique_id=True
+            )
             
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
 
             texture_node = get_mask_node('TEXTURE', selected_layer_index, new_mask_slot_index)
-            new_image = bpy.data.images.get(image_name)
             if texture_node and new_image:
                 texture_node.image = new_image
 
-            bpy.context.scene.tool_settings.image_paint.canvas = new_image
+            # Scripts don't change the image being painted in the user interface.
+            if not bau.editing_from_script():
+                bpy.context.scene.tool_settings.image_paint.canvas = new_image
             debug_logging.log("Added white layer mask.")
 
         case 'LINEAR_GRADIENT':
             default_node_group = bau.append_group_node("RY_LinearGradient", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Linear Gradient"
     
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
             debug_logging.log("Added a linear gradient mask.")
 
         case 'DECAL':
             default_node_group = bau.append_group_node("RY_DecalMask", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Decal Mask"
             
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
 
@@ -371,14 +346,13 @@ def add_layer_mask(type, self):
 
         case 'GRUNGE':
             default_node_group = bau.append_group_node("RY_Grunge", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Grunge"
     
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
             material_layers.apply_mesh_maps()
@@ -393,14 +367,13 @@ def add_layer_mask(type, self):
 
         case 'EDGE_WEAR':
             default_node_group = bau.append_group_node("RY_EdgeWear", never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = "Edge Wear"
     
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
             material_layers.apply_mesh_maps()
@@ -420,14 +393,13 @@ def add_layer_mask(type, self):
             mesh_map_mask_name = mesh_map_mask_name.replace(' ', '')
             mesh_map_mask_name = "RY_{0}Mask".format(mesh_map_mask_name)
             default_node_group = bau.append_group_node(mesh_map_mask_name, never_auto_delete=True)
-            default_node_group.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            default_node_group.name = new_mask_name
 
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = default_node_group
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = bau.capitalize_by_space("{0} Mask".format(type.replace('_', ' ')))
             
-            reindex_masks('ADDED_MASK', selected_layer_index, new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
             material_layers.apply_mesh_maps()
@@ -453,7 +425,7 @@ def duplicate_mask(self, mask_index=-1):
         mask_index = bpy.context.scene.rymat_mask_stack.selected_index
 
     # Duplicate the mask node, mask node tree and add it to the mask stack then link mask blurring if required.
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
     mask_node = get_mask_node('MASK', selected_layer_index, mask_index)
     mask_node_tree = get_mask_node_tree(selected_layer_index, mask_index)
@@ -462,13 +434,14 @@ def duplicate_mask(self, mask_index=-1):
 
         if duplicated_node_tree:
             new_mask_slot_index = add_mask_slot()
-            duplicated_node_tree.name = format_mask_name(selected_layer_index, new_mask_slot_index)
+            new_mask_id = insert_mask_id(selected_layer_index, new_mask_slot_index)
+            new_mask_name = format_mask_name(material_layers.get_layer_id(selected_layer_index), new_mask_id)
+            duplicated_node_tree.name = new_mask_name
             new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
             new_mask_group_node.node_tree = duplicated_node_tree
-            new_mask_group_node.name = format_mask_name(selected_layer_index, new_mask_slot_index) + "~"
+            new_mask_group_node.name = new_mask_name
             new_mask_group_node.label = mask_node.label
 
-            reindex_masks(change_made='ADDED_MASK', layer_index=selected_layer_index, affected_mask_index=new_mask_slot_index)
             organize_mask_nodes()
             link_mask_nodes(selected_layer_index)
             material_layers.link_layer_group_nodes(self)
@@ -484,23 +457,33 @@ def delete_layer_mask(self):
     masks = bpy.context.scene.rymat_masks
     selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
     selected_mask_index = bpy.context.scene.rymat_mask_stack.selected_index
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
+
+    # Layers that don't store mask IDs read them from mask node tree names, which stops at the first missing node tree.
+    # Store the mask IDs before removing any nodes, so masks above the deleted mask stay in the mask stack.
+    set_mask_ids(selected_layer_index, get_mask_ids(selected_layer_index, active_material), active_material)
 
     # Remove the mask node and it's node tree.
     mask_node = get_mask_node('MASK', selected_layer_index, selected_mask_index)
     if mask_node:
+        material_layers.clear_material_node_index()
         if mask_node.node_tree:
             bpy.data.node_groups.remove(mask_node.node_tree)
         active_material.node_tree.nodes.remove(mask_node)
 
-    reindex_masks('DELETED_MASK', selected_layer_index, selected_mask_index)
+    # Remove the mask ID from the layer's mask stack, masks above keep their IDs so none of their nodes need to be renamed.
+    mask_ids = get_mask_ids(selected_layer_index)
+    if selected_mask_index >= 0 and selected_mask_index < len(mask_ids):
+        mask_ids.pop(selected_mask_index)
+        set_mask_ids(selected_layer_index, mask_ids)
+
     organize_mask_nodes()
     link_mask_nodes(selected_layer_index)
     material_layers.link_layer_group_nodes(self)
 
     # Remove the mask slot and reset the mask index.
     masks.remove(selected_mask_index)
-    bpy.context.scene.rymat_mask_stack.selected_index = max(min(selected_mask_index - 1, len(masks) - 1), 0)
+    set_selected_mask_index(max(min(selected_mask_index - 1, len(masks) - 1), 0))
     debug_logging.log("Deleted layer mask.")
 
 def move_mask(direction, self):
@@ -511,83 +494,41 @@ def move_mask(direction, self):
     masks = bpy.context.scene.rymat_masks
     selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
 
+    # Mask nodes are named with their mask ID, so moving a mask only swaps the position of the mask IDs in the layer's mask stack.
+    mask_ids = get_mask_ids(selected_layer_index)
     match direction:
         case 'UP':
-            # Swap the mask node and node tree index for the selected mask node with the mask above it (if one exists).
+            # Swap the selected mask with the mask above it (if one exists).
             selected_mask_index = bpy.context.scene.rymat_mask_stack.selected_index
 
             if selected_mask_index < len(masks) - 1:
-                mask_node = get_mask_node('MASK', selected_layer_index, selected_mask_index)
-                mask_node.name += "~"
-                mask_node.node_tree.name += "~"
-
-                above_mask_node = get_mask_node('MASK', selected_layer_index, selected_mask_index + 1)
-                above_mask_node.name = format_mask_name(selected_layer_index, selected_mask_index)
-                above_mask_node.node_tree.name = above_mask_node.name
+                mask_ids[selected_mask_index], mask_ids[selected_mask_index + 1] = mask_ids[selected_mask_index + 1], mask_ids[selected_mask_index]
+                set_mask_ids(selected_layer_index, mask_ids)
 
-                mask_node.name = format_mask_name(selected_layer_index, selected_mask_index + 1)
-                mask_node.node_tree.name = mask_node.name
-
-                bpy.context.scene.rymat_mask_stack.selected_index = selected_mask_index + 1
+                set_selected_mask_index(selected_mask_index + 1)
 
                 debug_logging.log("Moved mask up on the mask stack.")
 
         case 'DOWN':
-            # Swap the mask node and node tree index for the selected mask node with the mask below it (if one exists).
+            # Swap the selected mask with the mask below it (if one exists).
             selected_mask_index = bpy.context.scene.rymat_mask_stack.selected_index
 
             if selected_mask_index - 1 >= 0:
-                mask_node = get_mask_node('MASK', selected_layer_index, selected_mask_index)
-                mask_node.name += "~"
-                mask_node.node_tree.name += "~"
-
-                above_mask_node = get_mask_node('MASK', selected_layer_index, selected_mask_index - 1)
-                above_mask_node.name = format_mask_name(selected_layer_index, selected_mask_index)
-                above_mask_node.node_tree.name = above_mask_node.name
+                mask_ids[selected_mask_index], mask_ids[selected_mask_index - 1] = mask_ids[selected_mask_index - 1], mask_ids[selected_mask_index]
+                set_mask_ids(selected_layer_index, mask_ids)
 
-                mask_node.name = format_mask_name(selected_layer_index, selected_mask_index - 1)
-                mask_node.node_tree.name = mask_node.name
-
-                bpy.context.scene.rymat_mask_stack.selected_index = selected_mask_index - 1
+                set_selected_mask_index(selected_mask_index - 1)
 
                 debug_logging.log("Moved mask down on the mask stack.")
 
     organize_mask_nodes()
     link_mask_nodes(selected_layer_index)
     
-def reindex_masks(change_made, layer_index, affected_mask_index):
-    '''Reindexes mask nodes and node trees. This should be called after a change is made that effects the mask stack order (adding, duplicating, deleting a mask).'''
-    match change_made:
-        case 'ADDED_MASK':
-            # Increase the layer index for all layer group nodes and their node trees that exist above the affected layer.
-            total_masks = len(bpy.context.scene.rymat_masks)
-            for i in range(total_masks, affected_mask_index, -1):
-                mask_node = get_mask_node('MASK', layer_index, i - 1)
-                if mask_node:
-                    mask_index = parse_mask_index(mask_node.name)
-                    mask_node_name = format_mask_name(layer_index, mask_index + 1)
-                    mask_node.name = mask_node_name
-                    mask_node.node_tree.name = mask_node_name
-
-            new_mask_node = get_mask_node('MASK', layer_index, affected_mask_index, get_changed=True)
-            if new_mask_node:
-                mask_node_name = format_mask_name(layer_index, affected_mask_index)
-                new_mask_node.name = mask_node_name
-                new_mask_node.node_tree.name = mask_node_name
-            debug_logging.log("Re-indexed masks for a new added / duplicated mask.")
-
-        case 'DELETED_MASK':
-            # Reduce the layer index for all layer group nodes and their nodes trees that exist above the affected layer.
-            mask_count = len(bpy.context.scene.rymat_masks)
-            for i in range(affected_mask_index + 1, mask_count):
-                mask_node = get_mask_node('MASK', layer_index, i)
-                mask_index = parse_mask_index(mask_node.name)
-                mask_node.name = format_mask_name(layer_index, mask_index - 1)
-                mask_node.node_tree.name = mask_node.name
-            debug_logging.log("Re-indexed mask nodes for after a mask was deleted.")
-
 def organize_mask_nodes():
     '''Organizes the position of all mask nodes in the active materials node tree.'''
+    if material_layers.defer_layer_edit_pass('ORGANIZE_MASKS'):
+        return
+
     layer_count = material_layers.count_layers()
     for i in range(0, layer_count):
         layer_node = material_layers.get_material_layer_node('LAYER', i)
@@ -603,42 +544,45 @@ def organize_mask_nodes():
 
 def link_mask_nodes(layer_index):
     '''Links existing mask nodes together and to their respective material layer.'''
-    if not bpy.context.active_object:
+    if material_layers.defer_layer_edit_pass('LINK_MASKS', layer_index):
         return
 
-    if not bpy.context.active_object.active_material:
+    if not bau.get_active_material():
         return
 
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     node_tree = active_material.node_tree
     mask_count = count_masks(layer_index)
 
-    # Disconnect all mask group nodes.
+    # Collect existing links into mask group nodes and the layer mask input of the layer (blur noise links are managed separately).
+    mask_nodes = []
+    existing_links = []
     for i in range(0, mask_count):
         mask_node = get_mask_node('MASK', layer_index, i)
         if mask_node:
+            mask_nodes.append(mask_node)
             for input in mask_node.inputs:
                 if input.name != 'Blur Noise':
-                    for link in input.links:
-                        node_tree.links.remove(link)
-
-    # Re-connect all mask group nodes.
-    for i in range(0, mask_count):
-        mask_node = get_mask_node('MASK', layer_index, i)
-        next_mask_node = get_mask_node('MASK', layer_index, i + 1)
-        if next_mask_node:
-            bau.safe_node_link(
-                mask_node.outputs[0], 
-                next_mask_node.inputs.get('Mix'), 
-                node_tree
-            )
+                    existing_links.extend(input.links)
 
-    # Connect the last layer node.
     layer_node = material_layers.get_material_layer_node('LAYER', layer_index)
-    last_mask_node = get_mask_node('MASK', layer_index, mask_count - 1)
-    if last_mask_node and last_mask_node:
-        node_tree.links.new(last_mask_node.outputs[0], layer_node.inputs.get('Layer Mask'))
-
+    layer_mask_input = None
+    if layer_node:
+        layer_mask_input = layer_node.inputs.get('Layer Mask')
+        if layer_mask_input:
+            existing_links.extend(layer_mask_input.links)
+
+    # Each mask group node connects to the mix input of the next mask, the last mask connects to the layer.
+    desired_links = []
+    for i, mask_node in enumerate(mask_nodes):
+        if i + 1 < len(mask_nodes):
+            desired_links.append((mask_node.outputs[0], mask_nodes[i + 1].inputs.get('Mix')))
+        else:
+            desired_links.append((mask_node.outputs[0], layer_mask_input))
+
+    # Only add and remove links that differ, re-creating unchanged links would trigger a full shader recompile.
+    added_link_count, removed_link_count = bau.sync_node_links(node_tree, existing_links, desired_links)
+    debug_logging.log("Mask node links added: {0}, removed: {1}".format(added_link_count, removed_link_count), sub_process=True)
     debug_logging.log("Re-linked mask nodes.")
 
 def link_mask_blur(mask_group_node, active_material):
@@ -649,26 +593,33 @@ def link_mask_blur(mask_group_node, active_material):
         node_tree.links.new(blur_noise_node.outputs[1], mask_group_node.inputs.get("Blur Noise"))
 
 def refresh_mask_slots():
-    '''Refreshes the number of mask slots in the mask stack by counting the number of mask nodes in the active materials node tree.'''
-    active_object = bpy.context.active_object
-    if active_object:
+    '''Syncs the number of mask slots in the mask stack with the number of masks applied to the selected layer. Only missing or extra mask slots are added or removed.'''
+    if bau.get_active_object() or bau.editing_from_script():
         masks = bpy.context.scene.rymat_masks
         selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
-        masks.clear()
         mask_count = count_masks(selected_layer_index)
-        for i in range(0, mask_count):
 
-            # If the group node belongs to the active material (indicated by it's name)...
-            # but isn't being used, it can cause conflicts or errors, and it should not exist, delete it.
-            active_material = active_object.active_material
-            if active_material:
+        # If the group node belongs to the active material (indicated by it's name)...
+        # but isn't being used, it can cause conflicts or errors, and it should not exist, delete it.
+        active_material = bau.get_active_material()
+        if active_material:
+            for i in range(0, mask_count):
                 mask_node_tree = get_mask_node_tree(selected_layer_index, i)
-                if mask_node_tree.users <= 0:
+                if mask_node_tree and mask_node_tree.users <= 0:
+                    material_layers.clear_material_node_index()
                     bpy.data.node_groups.remove(mask_node_tree)
                     debug_logging.log("Unused layer mask group node was removed.", sub_process=True)
 
-            # If the group node does exist within the active material, add a mask slot in the user interface so users can edit the mask.
-            add_mask_slot()
+        # Mask slots are placeholders drawn by their index, so only the number of mask slots needs to match the number of masks.
+        for i in range(len(masks) - 1, mask_count - 1, -1):
+            masks.remove(i)
+
+        for i in range(len(masks), mask_count):
+            masks.add()
+
+        # Select the top mask, the selected mask index is set once so mask selection updates only run once.
+        if mask_count > 0:
+            set_selected_mask_index(mask_count - 1)
 
 def relink_image_mask_projection(original_output_channel):
     '''Relinks projection nodes based on the projection mode for image masks.'''
@@ -768,10 +719,12 @@ def set_mask_projection_mode(projection_mode):
                 for i in range(0, 3):
                     texture_node = get_mask_node('TEXTURE', selected_layer_index, selected_mask_index, node_number=i + 1)
                     if texture_node:
+                        material_layers.clear_material_node_index()
                         mask_node.node_tree.nodes.remove(texture_node)
 
                 triplanar_blend_node = get_mask_node('TRIPLANAR_BLEND', selected_layer_index, selected_mask_index)
                 if triplanar_blend_node:
+                    material_layers.clear_material_node_index()
                     mask_node.node_tree.nodes.remove(triplanar_blend_node)
 
                 new_mask_texture_node = mask_node.node_tree.nodes.new('ShaderNodeTexImage')
@@ -801,6 +754,7 @@ def set_mask_projection_mode(projection_mode):
                 original_texture_node_location = mask_texture_node.location
                 original_texture_node_image = mask_texture_node.image
 
+                material_layers.clear_material_node_index()
                 mask_node.node_tree.nodes.remove(mask_texture_node)
 
                 location_x = original_texture_node_location[0]
@@ -926,8 +880,7 @@ class RYMAT_UL_mask_list(bpy.types.UIList):
         self.use_filter_reverse = True
 
         if self.layout_type in {'DEFAULT', 'COMPACT'}:
-            masks = bpy.context.scene.rymat_masks
-            item_index = masks.find(item.name)
+            item_index = index
             selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
             mask_node = get_mask_node('MASK', selected_layer_index, item_index)
 
@@ -1263,7 +1216,7 @@ class RYMAT_OT_isolate_mask(Operator):
             return {'FINISHED'}
         
         # Isolate the mask.
-        active_node_tree = bpy.context.active_object.active_material.node_tree
+        active_node_tree = bau.get_active_material().node_tree
         isolate_node = material_layers.get_isolate_node()
         material_output = active_node_tree.nodes.get('MATERIAL_OUTPUT')
         active_node_tree.links.new(mask_node.outputs[0], isolate_node.inputs[0])
@@ -0,0 +1,189 @@
+# This file contains a lightweight in-memory model of the layer stack for each material.
+# The model is built once from the material's node trees and read by the user interface and operators instead of searching nodes for every query.
+# Edits made to the model are written back to the node trees in a single batched diff, only values that differ from the nodes are written.
+
+import bpy
+from ..core import material_layers
+from ..core import layer_masks
+from ..core import material_filters
+from ..core import blender_addon_utils as bau
+from ..core import debug_logging
+
+class FilterModel:
+    '''A filter applied to a material channel of a layer.'''
+    __slots__ = ("node_name", "filter_type")
+
+    def __init__(self, node_name, filter_type):
+        self.node_name = node_name
+        self.filter_type = filter_type
+
+class ChannelModel:
+    '''A material channel of a layer, with it's blending mode and filters.'''
+    __slots__ = ("name", "blending_mode", "filters")
+
+    def __init__(self, name, blending_mode, filters):
+        self.name = name
+        self.blending_mode = blending_mode
+        self.filters = filters
+
+class MaskModel:
+    '''A mask applied to a layer.'''
+    __slots__ = ("mask_id", "name", "active")
+
+    def __init__(self, mask_id, name, active):
+        self.mask_id = mask_id
+        self.name = name
+        self.active = active
+
+class LayerModel:
+    '''A layer in the layer stack, with it's material channels and masks.'''
+    __slots__ = ("layer_id", "name", "active", "channels", "masks")
+
+    def __init__(self, layer_id, name, active, channels, masks):
+        self.layer_id = layer_id
+        self.name = name
+        self.active = active
+        self.channels = channels
+        self.masks = masks
+
+class LayerStackModel:
+    '''All layers in a material, in layer stack order.'''
+    __slots__ = ("material_name", "layers")
+
+    def __init__(self, material_name, layers):
+        self.material_name = material_name
+        self.layers = layers
+
+# Layer stack models built previously, indexed by material pointer.
+# Models are cleared along with the material node index, so any change made to the node trees outside of the model causes the model to be rebuilt.
+layer_stack_models = {}
+
+def build_channel_model(layer_node_tree, channel_name):
+    '''Builds a model of the material channel with the provided name from the layer node tree. Returns None if the layer has no nodes for the material channel.'''
+    mix_node = layer_node_tree.nodes.get(material_layers.format_material_channel_node_name(channel_name, 'MIX'))
+    if not mix_node:
+        return None
+
+    filters = []
+    filter_node = layer_node_tree.nodes.get(material_filters.format_filter_name(channel_name, 1))
+    while filter_node:
+        filters.append(FilterModel(filter_node.name, material_filters.get_filter_type(filter_node)))
+        filter_node = layer_node_tree.nodes.get(material_filters.format_filter_name(channel_name, len(filters) + 1))
+
+    return ChannelModel(channel_name, material_layers.get_mix_node_blending_mode(mix_node), filters)
+
+def build_layer_model(material, layer_id):
+    '''Builds a model of the layer with the provided ID from the material's node trees.'''
+    layer_node = material.node_tree.nodes.get(layer_id)
+    if not layer_node or not layer_node.node_tree:
+        return LayerModel(layer_id, "", False, {}, [])
+
+    channels = {}
+    shader_info = bpy.context.scene.rymat_shader_info
+    for channel in shader_info.material_channels:
+        channel_model = build_channel_model(layer_node.node_tree, channel.name)
+        if channel_model:
+            channels[channel.name] = channel_model
+
+    masks = []
+    for mask_id in layer_masks.read_mask_ids(layer_node.node_tree, layer_id, material.name):
+        mask_node = material.node_tree.nodes.get(layer_masks.format_mask_name(layer_id, mask_id, material.name))
+        if mask_node:
+            masks.append(MaskModel(mask_id, mask_node.label, not mask_node.mute))
+        else:
+            masks.append(MaskModel(mask_id, "", False))
+
+    return LayerModel(layer_id, layer_node.label, bau.get_node_active(layer_node), channels, masks)
+
+def build_layer_stack_model(material):
+    '''Builds a model of all layers in the provided material from it's node trees.'''
+    layers = [build_layer_model(material, layer_id) for layer_id in material_layers.get_layer_ids(material)]
+    debug_logging.log("Built layer stack model for {0} ({1} layers).".format(material.name, len(layers)), sub_process=True)
+    return LayerStackModel(material.name, layers)
+
+def get_layer_stack_model(material=None):
+    '''Returns the layer stack model for the provided material (active material if no material is provided), the model is only built if it doesn't exist yet. Returns None if there is no valid material.'''
+    if material == None:
+        material = bau.get_active_material()
+        if not material:
+            return None
+
+    if not material.node_tree:
+        return None
+
+    # Models are indexed by material pointer, a renamed material is rebuilt so names written back to the material are correct.
+    material_pointer = material.as_pointer()
+    model = layer_stack_models.get(material_pointer)
+    if model == None or model.material_name != material.name:
+        model = build_layer_stack_model(material)
+        layer_stack_models[material_pointer] = model
+    return model
+
+def get_layer_model(layer_index, material=None):
+    '''Returns the model for the layer at the provided layer stack index, or None if the layer doesn't exist.'''
+    model = get_layer_stack_model(material)
+    if not model or layer_index < 0 or layer_index >= len(model.layers):
+        return None
+    return model.layers[layer_index]
+
+def clear_layer_stack_models(material=None):
+    '''Clears the layer stack model for the provided material, or for all materials if no material is provided.'''
+    if material:
+        layer_stack_models.pop(material.as_pointer(), None)
+    else:
+        layer_stack_models.clear()
+
+def sync_layer_stack_model(material=None):
+    '''Writes edits made to the layer stack model back to the material's node trees. Only layer order, names, and active states that differ from the node trees are written.'''
+    if material == None:
+        material = bau.get_active_material()
+
+    model = layer_stack_models.get(material.as_pointer())
+    if model == None:
+        return 0
+
+    changed_value_count = 0
+    layer_ids = [layer.layer_id for layer in model.layers]
+    if layer_ids != material_layers.get_layer_ids(material):
+        material_layers.set_layer_ids(layer_ids, material)
+        changed_value_count += 1
+
+    for layer in model.layers:
+        layer_node = material.node_tree.nodes.get(layer.layer_id)
+        if not layer_node:
+            continue
+
+        if layer_node.label != layer.name:
+            layer_node.label = layer.name
+            changed_value_count += 1
+
+        if bau.get_node_active(layer_node) != layer.active:
+            bau.set_node_active(layer_node, layer.active)
+            changed_value_count += 1
+
+        mask_ids = [mask.mask_id for mask in layer.masks]
+        if layer_node.node_tree and mask_ids != layer_masks.read_mask_ids(layer_node.node_tree, layer.layer_id, material.name):
+            layer_node.node_tree[layer_masks.MASK_IDS_PROPERTY] = ",".join(mask_ids)
+            changed_value_count += 1
+
+        for mask in layer.masks:
+            mask_node = material.node_tree.nodes.get(layer_masks.format_mask_name(layer.layer_id, mask.mask_id, material.name))
+            if not mask_node:
+                continue
+
+            if mask_node.label != mask.name:
+                mask_node.label = mask.name
+                changed_value_count += 1
+
+            if mask_node.mute == mask.active:
+                mask_node.mute = not mask.active
+                changed_value_count += 1
+
+    # Writing ID lists can change which nodes are found for a layer index, indexed nodes are found again.
+    # The model now matches the node trees, so it's kept.
+    if changed_value_count > 0:
+        material_layers.clear_material_node_index(material)
+        layer_stack_models[material.as_pointer()] = model
+
+    debug_logging.log("Synced layer stack model to node trees ({0} changed values).".format(changed_value_count), sub_process=True)
+    return changed_value_count
@@ -365,50 +365,53 @@ class RYMAT_OT_merge_materials(Operator):
 
             else:
                 active_material = bpy.context.active_object.active_material
-                for i in range(0, layer_count):
+                merge_layer_ids = material_layers.get_layer_ids(merge_material)
+
+                # Relinking and organizing nodes is deferred until all layers are merged, so each pass runs once instead of once per merged layer.
+                with material_layers.edit_layers(self):
+                    for merge_layer_id in merge_layer_ids:
                     
-                    # Duplicate the layer node tree and add a new layer group node to the tree.
-                    merge_layer_node = merge_material.node_tree.nodes.get(str(i))
-                    if merge_layer_node:
-                        if merge_layer_node.node_tree:
-                            duplicated_node_tree = bau.duplicate_node_group(merge_layer_node.node_tree.name)
-                            if duplicated_node_tree:
-                                new_layer_slot_index = material_layers.add_material_layer_slot()
-
-                                duplicated_node_tree.name = "{0}_{1}".format(active_material.name, str(new_layer_slot_index))
-                                new_layer_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
-                                new_layer_group_node.node_tree = duplicated_node_tree
-                                new_layer_group_node.name = str(new_layer_slot_index) + "~"
-                                new_layer_group_node.label = merge_layer_node.label
-                                
-                                material_layers.reindex_layer_nodes(change_made='ADDED_LAYER', affected_layer_index=new_layer_slot_index)
-                                material_layers.organize_layer_group_nodes()
-                                material_layers.link_layer_group_nodes(self)
-                                layer_masks.organize_mask_nodes()
-
-                        # Clear the mask stack from the new layer.
-                        masks = bpy.context.scene.rymat_masks
-                        masks.clear()
-
-                        # Duplicate all masks associated with that layer.
-                        mask_count = layer_masks.count_masks(i)
-                        for c in range(0, mask_count):
-                            original_mask_node = layer_masks.get_mask_node('MASK', i, c)
-                            if original_mask_node:
-                                duplicated_node_tree = bau.duplicate_node_group(original_mask_node.node_tree.name)
+                        # Duplicate the layer node tree and add a new layer group node to the tree.
+                        merge_layer_node = merge_material.node_tree.nodes.get(merge_layer_id)
+                        if merge_layer_node:
+                            if merge_layer_node.node_tree:
+                                duplicated_node_tree = bau.duplicate_node_group(merge_layer_node.node_tree.name)
                                 if duplicated_node_tree:
-                                    new_mask_slot_index = layer_masks.add_mask_slot()
-                                    duplicated_mask_name = layer_masks.format_mask_name(bpy.context.active_object.active_material.name, new_layer_slot_index, new_mask_slot_index) + "~"
-                                    duplicated_node_tree.name = duplicated_mask_name
-                                    new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
-                                    new_mask_group_node.node_tree = duplicated_node_tree
-                                    new_mask_group_node.name = duplicated_mask_name
-                                    new_mask_group_node.label = original_mask_node.label
-
-                                    layer_masks.reindex_masks('ADDED_MASK', new_layer_slot_index, affected_mask_index=i)
-
-                        layer_masks.link_mask_nodes(new_layer_slot_index)
-                        layer_masks.organize_mask_nodes()
+                                    new_layer_slot_index = material_layers.add_material_layer_slot()
+                                    new_layer_id = material_layers.insert_layer_id(new_layer_slot_index, active_material)
+
+                                    duplicated_node_tree.name = material_layers.format_layer_group_node_name(active_material.name, new_layer_id)
+                                    new_layer_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
+                                    new_layer_group_node.node_tree = duplicated_node_tree
+                                    new_layer_group_node.name = new_layer_id
+                                    new_layer_group_node.label = merge_layer_node.label
+                                
+                                    material_layers.organize_layer_group_nodes()
+                                    material_layers.link_layer_group_nodes(self)
+                                    layer_masks.organize_mask_nodes()
+
+                            # Clear the mask stack from the new layer.
+                            masks = bpy.context.scene.rymat_masks
+                            masks.clear()
+
+                            # Duplicate all masks associated with that layer, duplicated masks keep the mask IDs of the merged layer's masks.
+                            merge_mask_ids = layer_masks.read_mask_ids(merge_layer_node.node_tree, merge_layer_id, merge_material.name)
+                            layer_masks.set_mask_ids(new_layer_slot_index, merge_mask_ids)
+                            for merge_mask_id in merge_mask_ids:
+                                original_mask_node = merge_material.node_tree.nodes.get(layer_masks.format_mask_name(merge_layer_id, merge_mask_id, merge_material.name))
+                                if original_mask_node:
+                                    duplicated_node_tree = bau.duplicate_node_group(original_mask_node.node_tree.name)
+                                    if duplicated_node_tree:
+                                        layer_masks.add_mask_slot()
+                                        duplicated_mask_name = layer_masks.format_mask_name(new_layer_id, merge_mask_id, active_material.name)
+                                        duplicated_node_tree.name = duplicated_mask_name
+                                        new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
+                                        new_mask_group_node.node_tree = duplicated_node_tree
+                                        new_mask_group_node.name = duplicated_mask_name
+                                        new_mask_group_node.label = original_mask_node.label
+
+                            layer_masks.link_mask_nodes(new_layer_slot_index)
+                            layer_masks.organize_mask_nodes()
 
             bpy.context.scene.rymat_merge_material = None
             debug_logging.log_status("Merged materials.", self, type='INFO')
@@ -0,0 +1,392 @@
+# This file contains functions for compiling layered materials into flat materials that are faster to display in the viewport and render.
+# Compiled materials are generated from the layer stack: layer group nodes (and all node groups nested within them) are inlined, nodes that don't contribute to the material output
+# (inactive layers, unused material channels) are removed, muted nodes are bypassed and mix nodes with a constant factor that disables them are folded away.
+# The layered material remains the source of truth, compiled materials are swapped into material slots while compiled mode is on, and are regenerated each time it's turned on.
+
+import time
+import bpy
+from bpy.types import Operator
+from ..core import material_layers
+from ..core import blender_addon_utils as bau
+from ..core import debug_logging
+
+# Custom material property that stores the layered material a compiled material was generated from.
+COMPILED_SOURCE_PROPERTY = "rymat_compiled_source"
+
+# Node groups nested deeper than this are left as group nodes (this only guards against recursive node groups).
+MAX_INLINE_DEPTH = 16
+
+# Node properties that describe the node's placement or appearance in the node editor, these aren't copied when nodes are inlined.
+# Mute is copied, layers mute nodes to disable material channels and image alpha, inlined muted nodes are bypassed after inlining.
+UNCOPIED_NODE_PROPERTIES = {
+    "name",
+    "label",
+    "location",
+    "location_absolute",
+    "width",
+    "height",
+    "parent",
+    "select",
+    "hide",
+    "color",
+    "use_custom_color",
+    "show_options",
+    "show_preview",
+    "show_texture",
+    "node_tree"
+}
+
+# Socket identifier suffixes used by mix nodes for each data type.
+MIX_NODE_SOCKET_SUFFIXES = {
+    'FLOAT': "_Float",
+    'RGBA': "_Color",
+    'VECTOR': "_Vector"
+}
+
+def format_compiled_material_name(material_name):
+    '''Returns the name used for the compiled version of the material with the provided name.'''
+    return "{0}_Compiled".format(material_name)
+
+def get_compiled_source_material(material):
+    '''Returns the layered material the provided compiled material was generated from, or None if the material isn't a compiled material.'''
+    if not material:
+        return None
+    return material.get(COMPILED_SOURCE_PROPERTY)
+
+def get_socket(sockets, identifier):
+    '''Returns the socket with the provided identifier, or None if there is no socket with the identifier.'''
+    for socket in sockets:
+        if socket.identifier == identifier:
+            return socket
+    return None
+
+def get_socket_source(socket):
+    '''Returns the output socket linked to the provided input socket, or the input socket's value if it isn't linked.'''
+    for link in socket.links:
+        if not link.is_muted:
+            return link.from_socket
+    return getattr(socket, "default_value", None)
+
+def set_socket_value(socket, value):
+    '''Sets the value of the provided input socket, converting between single values and colors / vectors if the value doesn't match the socket type.'''
+    if value == None or not hasattr(socket, "default_value"):
+        return
+
+    socket_value_length = len(socket.default_value) if hasattr(socket.default_value, "__len__") else 0
+    value_length = len(value) if hasattr(value, "__len__") else 0
+    if socket_value_length == value_length:
+        socket.default_value = value
+
+    # Colors and vectors are converted to single values by averaging their RGB / XYZ components.
+    elif socket_value_length == 0:
+        socket.default_value = sum(value[:3]) / min(3, value_length)
+
+    # Single values are converted to grayscale colors, or uniform vectors.
+    elif value_length == 0:
+        socket.default_value = [value] * socket_value_length
+        if socket_value_length == 4:
+            socket.default_value[3] = 1.0
+
+    else:
+        socket.default_value = list(value[:socket_value_length]) + [1.0] * max(0, socket_value_length - value_length)
+
+def connect_socket_source(node_tree, source, input_socket):
+    '''Links the provided source (an output socket) to the input socket, or sets the input socket's value if the source is a value.'''
+    if isinstance(source, bpy.types.NodeSocket):
+        node_tree.links.new(source, input_socket)
+    else:
+        set_socket_value(input_socket, source)
+
+def copy_node(node_tree, node, location_offset=(0, 0)):
+    '''Adds a copy of the provided node (which can be from another node tree) to the node tree, including it's properties and socket values. Links aren't copied.'''
+    new_node = node_tree.nodes.new(node.bl_idname)
+    new_node.location = (node.location[0] + location_offset[0], node.location[1] + location_offset[1])
+
+    # Group nodes must have their node tree assigned first so their sockets exist.
+    if node.bl_static_type == 'GROUP':
+        new_node.node_tree = node.node_tree
+
+    # Copy all editable node properties, some properties can't be set for some node types (or in some states), they are skipped.
+    for node_property in node.bl_rna.properties:
+        if node_property.is_readonly or node_property.identifier in UNCOPIED_NODE_PROPERTIES or node_property.identifier.startswith("bl_"):
+            continue
+        try:
+            setattr(new_node, node_property.identifier, getattr(node, node_property.identifier))
+        except (AttributeError, TypeError, ValueError):
+            pass
+
+    # Color ramps and curves are read-only structs, their points are copied individually.
+    if node.bl_static_type == 'VALTORGB':
+        copy_color_ramp(node.color_ramp, new_node.color_ramp)
+    elif node.bl_static_type in ('CURVE_RGB', 'CURVE_VEC', 'CURVE_FLOAT'):
+        copy_curve_mapping(node.mapping, new_node.mapping)
+
+    for input in node.inputs:
+        new_input = get_socket(new_node.inputs, input.identifier)
+        if new_input and hasattr(input, "default_value"):
+            new_input.default_value = input.default_value
+
+    # Value and RGB nodes store their values in their outputs.
+    for output in node.outputs:
+        new_output = get_socket(new_node.outputs, output.identifier)
+        if new_output and hasattr(output, "default_value"):
+            new_output.default_value = output.default_value
+
+    return new_node
+
+def copy_color_ramp(color_ramp, new_color_ramp):
+    '''Copies all color stops and interpolation settings from one color ramp to another.'''
+    new_color_ramp.color_mode = color_ramp.color_mode
+    new_color_ramp.interpolation = color_ramp.interpolation
+    new_color_ramp.hue_interpolation = color_ramp.hue_interpolation
+    while len(new_color_ramp.elements) > 1:
+        new_color_ramp.elements.remove(new_color_ramp.elements[-1])
+    new_color_ramp.elements[0].position = color_ramp.elements[0].position
+    new_color_ramp.elements[0].color = color_ramp.elements[0].color
+    for element in color_ramp.elements[1:]:
+        new_element = new_color_ramp.elements.new(element.position)
+        new_element.color = element.color
+
+def copy_curve_mapping(mapping, new_mapping):
+    '''Copies all curve points and settings from one curve mapping to another.'''
+    new_mapping.use_clip = mapping.use_clip
+    new_mapping.clip_min_x = mapping.clip_min_x
+    new_mapping.clip_min_y = mapping.clip_min_y
+    new_mapping.clip_max_x = mapping.clip_max_x
+    new_mapping.clip_max_y = mapping.clip_max_y
+    new_mapping.black_level = mapping.black_level
+    new_mapping.white_level = mapping.white_level
+    for curve, new_curve in zip(mapping.curves, new_mapping.curves):
+        while len(new_curve.points) > len(curve.points):
+            new_curve.points.remove(new_curve.points[-1])
+        while len(new_curve.points) < len(curve.points):
+            new_curve.points.new(0.0, 0.0)
+        for point, new_point in zip(curve.points, new_curve.points):
+            new_point.location = point.location
+            new_point.handle_type = point.handle_type
+    new_mapping.update()
+
+def inline_group_node(node_tree, group_node):
+    '''Replaces the provided group node with copies of the nodes inside it's node group. Links into and out of the group node are reconnected to the copied nodes.'''
+    group_tree = group_node.node_tree
+    copied_nodes = {}
+    for node in group_tree.nodes:
+        if node.bl_static_type in ('GROUP_INPUT', 'GROUP_OUTPUT', 'FRAME'):
+            continue
+        copied_nodes[node.name] = copy_node(node_tree, node, group_node.location)
+
+    # Remember what feeds each group input, and what each group output feeds, before the group node is removed.
+    input_sources = {}
+    for input in group_node.inputs:
+        input_sources[input.identifier] = get_socket_source(input)
+
+    output_targets = {}
+    for output in group_node.outputs:
+        output_targets[output.identifier] = [link.to_socket for link in output.links if not link.is_muted]
+
+    for link in group_tree.links:
+        if link.is_muted or not link.is_valid:
+            continue
+
+        if link.from_node.bl_static_type == 'GROUP_INPUT':
+            source = input_sources.get(link.from_socket.identifier)
+        elif link.from_node.name in copied_nodes:
+            source = get_socket(copied_nodes[link.from_node.name].outputs, link.from_socket.identifier)
+        else:
+            continue
+
+        # Only the active group output defines the group's outputs.
+        if link.to_node.bl_static_type == 'GROUP_OUTPUT':
+            if not link.to_node.is_active_output:
+                continue
+            target_sockets = output_targets.get(link.to_socket.identifier, [])
+        elif link.to_node.name in copied_nodes:
+            target_sockets = [get_socket(copied_nodes[link.to_node.name].inputs, link.to_socket.identifier)]
+        else:
+            continue
+
+        for target_socket in target_sockets:
+            if target_socket:
+                connect_socket_source(node_tree, source, target_socket)
+
+    node_tree.nodes.remove(group_node)
+
+def bypass_node(node_tree, node, input_socket, output_socket):
+    '''Removes the provided node, connecting whatever feeds the input socket directly to everything the output socket feeds.'''
+    source = get_socket_source(input_socket)
+    target_sockets = [link.to_socket for link in output_socket.links if not link.is_muted]
+    for target_socket in target_sockets:
+        connect_socket_source(node_tree, source, target_socket)
+    node_tree.nodes.remove(node)
+
+def bypass_muted_nodes(node_tree):
+    '''Removes muted nodes, passing values through them the same way Blender does for muted nodes. Returns the number of removed nodes.'''
+    muted_nodes = [node for node in node_tree.nodes if node.mute and node.bl_static_type not in ('FRAME', 'OUTPUT_MATERIAL')]
+    for node in muted_nodes:
+
+        # Remember where values pass through the muted node before it's removed.
+        # Outputs without an internal link output nothing when muted, inputs they're linked to will use their own values.
+        bypasses = []
+        for internal_link in node.internal_links:
+            source = get_socket_source(internal_link.from_socket)
+            target_sockets = [link.to_socket for link in internal_link.to_socket.links if not link.is_muted]
+            bypasses.append((source, target_sockets))
+
+        node_tree.nodes.remove(node)
+        for source, target_sockets in bypasses:
+            for target_socket in target_sockets:
+                connect_socket_source(node_tree, source, target_socket)
+    return len(muted_nodes)
+
+def fold_constant_mix_nodes(node_tree):
+    '''Removes mix nodes with a constant factor of 0 (which always output their first input), and mix nodes that fully mix in their second input with a constant factor of 1. Returns the number of removed nodes.'''
+    folded_node_count = 0
+    for node in list(node_tree.nodes):
+        match node.bl_static_type:
+            case 'MIX':
+                # Without a clamped factor, factors outside 0 - 1 extrapolate past the inputs and can't be folded.
+                socket_suffix = MIX_NODE_SOCKET_SUFFIXES.get(node.data_type)
+                if not socket_suffix or node.clamp_result or not node.clamp_factor:
+                    continue
+                factor_socket = get_socket(node.inputs, "Factor_Vector" if node.factor_mode == 'NON_UNIFORM' and node.data_type == 'VECTOR' else "Factor_Float")
+                a_socket = get_socket(node.inputs, "A" + socket_suffix)
+                b_socket = get_socket(node.inputs, "B" + socket_suffix)
+                output_socket = get_socket(node.outputs, "Result" + socket_suffix)
+                blend_type = node.blend_type if node.data_type == 'RGBA' else 'MIX'
+
+            case 'MIX_RGB':
+                if node.use_clamp:
+                    continue
+                factor_socket = node.inputs[0]
+                a_socket = node.inputs[1]
+                b_socket = node.inputs[2]
+                output_socket = node.outputs[0]
+                blend_type = node.blend_type
+
+            case _:
+                continue
+
+        if not factor_socket or factor_socket.is_linked or hasattr(factor_socket.default_value, "__len__"):
+            continue
+
+        if factor_socket.default_value <= 0.0:
+            bypass_node(node_tree, node, a_socket, output_socket)
+            folded_node_count += 1
+        elif factor_socket.default_value >= 1.0 and blend_type == 'MIX':
+            bypass_node(node_tree, node, b_socket, output_socket)
+            folded_node_count += 1
+    return folded_node_count
+
+def prune_unused_nodes(node_tree, output_node):
+    '''Removes all nodes that don't contribute to the provided output node. Returns the number of removed nodes.'''
+    used_nodes = {output_node.name}
+    unvisited_nodes = [output_node]
+    while unvisited_nodes:
+        node = unvisited_nodes.pop()
+        for input in node.inputs:
+            for link in input.links:
+                if not link.is_muted and link.from_node.name not in used_nodes:
+                    used_nodes.add(link.from_node.name)
+                    unvisited_nodes.append(link.from_node)
+
+    unused_nodes = [node for node in node_tree.nodes if node.name not in used_nodes]
+    for node in unused_nodes:
+        node_tree.nodes.remove(node)
+    return len(unused_nodes)
+
+def flatten_node_tree(node_tree, output_node):
+    '''Inlines all group nodes in the node tree, and removes or folds nodes that don't change the output of the provided output node.'''
+    bypass_muted_nodes(node_tree)
+    prune_unused_nodes(node_tree, output_node)
+    for depth in range(0, MAX_INLINE_DEPTH):
+        group_nodes = [node for node in node_tree.nodes if node.bl_static_type == 'GROUP' and node.node_tree]
+        if not group_nodes:
+            break
+        for group_node in group_nodes:
+            inline_group_node(node_tree, group_node)
+        bypass_muted_nodes(node_tree)
+        prune_unused_nodes(node_tree, output_node)
+
+    while fold_constant_mix_nodes(node_tree) > 0:
+        pass
+    prune_unused_nodes(node_tree, output_node)
+
+def compile_material(material):
+    '''Generates (or regenerates) the compiled version of the provided layered material, and returns it.'''
+    start_time = time.time()
+
+    compiled_material = material.copy()
+    compiled_material.name = format_compiled_material_name(material.name)
+    compiled_material[COMPILED_SOURCE_PROPERTY] = material
+    if material_layers.LAYER_IDS_PROPERTY in compiled_material:
+        del compiled_material[material_layers.LAYER_IDS_PROPERTY]
+
+    # Compile the full material, even if a material channel or mask is isolated in the layered material.
+    node_tree = compiled_material.node_tree
+    isolate_node = node_tree.nodes.get('ISOLATE_NODE')
+    if isolate_node:
+        node_tree.nodes.remove(isolate_node)
+    material_output = node_tree.nodes.get('MATERIAL_OUTPUT')
+    shader_node = node_tree.nodes.get('SHADER_NODE')
+    node_tree.links.new(shader_node.outputs[0], material_output.inputs[0])
+
+    original_node_count = len(node_tree.nodes)
+    flatten_node_tree(node_tree, material_output)
+
+    # Replace the previously compiled material everywhere it's used.
+    previous_compiled_material = bpy.data.materials.get(format_compiled_material_name(material.name))
+    if previous_compiled_material and previous_compiled_material != compiled_material:
+        previous_compiled_material.user_remap(compiled_material)
+        bpy.data.materials.remove(previous_compiled_material)
+        compiled_material.name = format_compiled_material_name(material.name)
+
+    debug_logging.log("Compiled material {0}, {1} nodes flattened to {2} nodes in {3} seconds.".format(
+        material.name,
+        original_node_count,
+        len(node_tree.nodes),
+        round(time.time() - start_time, 2)
+    ))
+    return compiled_material
+
+def set_compiled_material_mode(obj, compiled):
+    '''Swaps all layered materials on the provided object with compiled versions of them, or swaps compiled materials back to the layered materials they were compiled from.'''
+    for material_slot in obj.material_slots:
+        material = material_slot.material
+        if not material:
+            continue
+
+        if compiled:
+            if bau.verify_addon_material(material):
+                material_slot.material = compile_material(material)
+
+        else:
+            source_material = get_compiled_source_material(material)
+            if source_material:
+                material_slot.material = source_material
+                if material.users <= 0:
+                    bpy.data.materials.remove(material)
+
+class RYMAT_OT_swap_compiled_materials(Operator):
+    bl_idname = "rymat.swap_compiled_materials"
+    bl_label = "Swap Compiled Materials"
+    bl_description = "Swaps materials on the active object with compiled (flattened) versions of them that are faster to display and render, or swaps compiled materials back to their editable layered materials"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Disable when there is no active object.
+    @ classmethod
+    def poll(cls, context):
+        return context.active_object and context.active_object.active_material
+
+    def execute(self, context):
+        active_object = bpy.context.active_object
+        if get_compiled_source_material(active_object.active_material):
+            set_compiled_material_mode(active_object, False)
+            debug_logging.log_status("Returned to editing layered materials.", self, type='INFO')
+        else:
+            if bau.verify_material_operation_context(self) == False:
+                return {'FINISHED'}
+            set_compiled_material_mode(active_object, True)
+            debug_logging.log_status("Compiled materials.", self, type='INFO')
+
+        material_layers.refresh_layer_stack()
+        return {'FINISHED'}
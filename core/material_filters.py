@@ -192,6 +192,7 @@ def remove_material_channel_blur(layer_index, layer_node, material_channel_name)
     '''Removes the blur applied to the material channel by deleting the blur node and triggering a relink for material channel projection.'''
     blur_node = material_layers.get_material_layer_node('BLUR', layer_index, material_channel_name)
     if blur_node:
+        material_layers.clear_material_node_index()
         layer_node.node_tree.nodes.remove(blur_node)
 
 def add_material_filter(self, material_channel_name, filter_type):
@@ -269,6 +270,7 @@ def delete_material_filter(material_channel_name, filter_index, filter_type):
     filter_node_name = format_filter_name(material_channel_name, filter_index)
     filter_node = layer_node.node_tree.nodes.get(filter_node_name)
     if filter_node:
+        material_layers.clear_material_node_index()
         layer_node.node_tree.nodes.remove(filter_node)
 
     # Rename all filter nodes above the deleted one.
@@ -6,13 +6,18 @@ from bpy.props import IntProperty, StringProperty
 from ..core import layer_masks
 from ..core import material_filters
 from ..core import mesh_map_baking
+from ..core import image_utilities
 from ..core import blender_addon_utils as bau
 from ..core import debug_logging
 from ..core import texture_set_settings as tss
 from ..core import shaders
+from ..core import layer_stack_model
+from ..core import layer_cache
+from ..core import layer_compositor
 import copy
 import random
 import time
+from contextlib import contextmanager
 
 TRIPLANAR_PROJECTION_INPUTS = [
     'X',
@@ -45,6 +50,52 @@ MIX_NODE_INPUT_INDEX = {
     'MIX': 7
 }
 
+# Nodes in the material node tree that can be accessed with get_material_layer_node.
+MATERIAL_NODE_NAMES = [
+    'MATERIAL_OUTPUT',
+    'EXPORT_UV_MAP',
+    'BLUR_NOISE'
+]
+
+# Nodes in layer node trees that use the same name for all material channels.
+LAYER_NODE_NAMES = [
+    'PROJECTION',
+    'GROUP_INPUT',
+    'GROUP_OUTPUT',
+    'FIX_NORMAL_ROTATION',
+    'DECAL_COORDINATES',
+    'LINEAR_DECAL_MASK_BLEND'
+]
+
+# Nodes in layer node trees that exist once for each material channel.
+MATERIAL_CHANNEL_NODE_NAMES = [
+    'TRIPLANAR_BLEND',
+    'MIX',
+    'MIX_REROUTE',
+    'MIX_IMAGE_ALPHA',
+    'OPACITY',
+    'IMAGE_ALPHA_REROUTE',
+    'FILTER',
+    'SEPARATE_RGB',
+    'BLUR'
+]
+
+# Custom material property that stores layer IDs in layer stack order, separated by commas.
+LAYER_IDS_PROPERTY = "rymat_layer_ids"
+
+# References to layer and mask nodes that were found previously, indexed by material pointer, then by the node name, layer ID and material channel used to find the node.
+# Renamed nodes are detected when they are read from the index, removed nodes must be cleared from the index before they are removed.
+material_node_index = {}
+
+# Node trees containing indexed nodes, indexed by node tree pointer. Each stores the number of nodes in the node tree when a node in it was last indexed,
+# and pointers to the materials that indexed nodes in it. Indexed nodes only need to be cleared when nodes are added to or removed from their node tree.
+indexed_node_trees = {}
+
+# State for open layer edit transactions, indexed by material pointer. While a transaction is open for a material, relink, organize and layer stack refresh passes
+# for the material are only marked as dirty, and each dirty pass runs once when the outermost transaction for the material commits.
+# Masks are relinked by layer ID, because layer indices can change during a transaction.
+layer_edit_transactions = {}
+
 #----------------------------- UPDATING PROPERTIES -----------------------------#
 
 
@@ -56,9 +107,9 @@ def format_material_channel_node_name(material_channel_name, node_name, node_ind
     else:
         return "{0}-{1}".format(static_channel_name, node_name)
 
-def format_layer_group_node_name(material_name, layer_index):
+def format_layer_group_node_name(material_name, layer_id):
     '''Properly formats the layer group node names for this add-on.'''
-    return "{0}_{1}".format(material_name, layer_index)
+    return "{0}_{1}".format(material_name, layer_id)
 
 def update_layer_index(self, context):
     '''Updates properties and user interface when a new layer is selected.'''
@@ -148,43 +199,235 @@ def shader_node_tree_update():
     # Perform updates that should occur after a shader nodetree change is detected.
     sync_triplanar_nodes()
 
-def parse_layer_index(layer_group_node_name):
-    '''Return the layers's index by parsing the layer group node name. Returns -1 if there is no active object'''
-    active_object = bpy.context.active_object
-    if active_object:
-        active_material = active_object.active_material
-        if active_material:
-            material_name_length = len(active_material.name)
-            indicies = layer_group_node_name[material_name_length:]
-            indicies = indicies.split('_')
-            return int(indicies[1])
-    return -1
+def get_layer_ids(material=None):
+    '''Returns the IDs of all layers in the specified material (active material if no material is specified) in layer stack order. Layer group nodes are named with their layer ID, and their node trees are named with the material name and layer ID.'''
+    if material == None:
+        material = bau.get_active_material()
+
+    if not material or not material.node_tree:
+        return []
+
+    layer_ids = material.get(LAYER_IDS_PROPERTY)
+    if layer_ids == None:
+
+        # Layer group nodes in materials that don't store layer IDs are named with their layer index, use their names as layer IDs.
+        layer_ids = []
+        while material.node_tree.nodes.get(str(len(layer_ids))):
+            layer_ids.append(str(len(layer_ids)))
+        return layer_ids
+
+    if layer_ids == "":
+        return []
+    return layer_ids.split(',')
+
+def set_layer_ids(layer_ids, material=None):
+    '''Stores the IDs of all layers in the specified material (active material if no material is specified) in layer stack order.'''
+    if material == None:
+        material = bau.get_active_material()
+    material[LAYER_IDS_PROPERTY] = ",".join(layer_ids)
+    layer_stack_model.clear_layer_stack_models(material)
+
+def get_layer_id(layer_index, material=None):
+    '''Returns the ID of the layer at the provided layer stack index, or None if the layer doesn't exist.'''
+    layer_ids = get_layer_ids(material)
+    layer_index = int(layer_index)
+    if layer_index < 0 or layer_index >= len(layer_ids):
+        return None
+    return layer_ids[layer_index]
 
-def parse_material_name(layer_group_node_name):
-    '''Returns the layer's associated material name by parsing the layer group node name. Returns -1 if there is no active object, or material.'''
-    active_object = bpy.context.active_object
-    if active_object:
-        active_material = active_object.active_material
-        if active_material:
-            material_name_length = len(active_material.name)
-            material_name = layer_group_node_name[:material_name_length]
-            return material_name
+def get_layer_index(layer_id, material=None):
+    '''Returns the layer stack index of the layer with the provided ID, or -1 if the layer doesn't exist.'''
+    layer_ids = get_layer_ids(material)
+    if layer_id in layer_ids:
+        return layer_ids.index(layer_id)
     return -1
 
+def insert_layer_id(layer_index, material=None):
+    '''Inserts a new, unused layer ID into the layer stack at the provided index and returns it. Layers above the new layer keep their IDs, so none of their nodes need to be renamed.'''
+    if material == None:
+        material = bau.get_active_material()
+    layer_ids = get_layer_ids(material)
+
+    new_layer_id = max([int(layer_id) for layer_id in layer_ids], default=-1) + 1
+    while material.node_tree.nodes.get(str(new_layer_id)) or bpy.data.node_groups.get(format_layer_group_node_name(material.name, new_layer_id)):
+        new_layer_id += 1
+
+    layer_ids.insert(layer_index, str(new_layer_id))
+    set_layer_ids(layer_ids, material)
+    return str(new_layer_id)
+
+def remove_layer_id(layer_index, material=None):
+    '''Removes the layer ID at the provided index from the layer stack.'''
+    layer_ids = get_layer_ids(material)
+    if layer_index >= 0 and layer_index < len(layer_ids):
+        layer_ids.pop(layer_index)
+        set_layer_ids(layer_ids, material)
+
+def swap_layer_ids(layer_index_a, layer_index_b, material=None):
+    '''Swaps the positions of two layers in the layer stack.'''
+    layer_ids = get_layer_ids(material)
+    layer_ids[layer_index_a], layer_ids[layer_index_b] = layer_ids[layer_index_b], layer_ids[layer_index_a]
+    set_layer_ids(layer_ids, material)
+
 def get_layer_node_tree(layer_index):
     '''Returns the node group for the specified layer (from Blender data) if it exists'''
-    
-    if not bpy.context.active_object:
+    active_material = bau.get_active_material()
+    if not active_material:
         return None
     
-    if not bpy.context.active_object.active_material:
+    layer_id = get_layer_id(layer_index)
+    if layer_id == None:
         return None
-    
-    layer_group_name = format_layer_group_node_name(bpy.context.active_object.active_material.name, layer_index)
 
+    layer_group_name = format_layer_group_node_name(active_material.name, layer_id)
     return bpy.data.node_groups.get(layer_group_name)
 
-def get_material_layer_node(layer_node_name, layer_index=0, channel_name='COLOR', node_number=1, get_changed=False):
+def get_indexed_node(material, index_key):
+    '''Returns the node stored in the material node index with the provided key. Returns None if the node isn't indexed, or if the node or it's node tree were renamed since they were indexed.'''
+    material_index = material_node_index.get(material.as_pointer())
+    if not material_index:
+        return None
+
+    indexed_node = material_index.get(index_key)
+    if not indexed_node:
+        return None
+
+    node, node_name, node_tree_name = indexed_node
+    if node.name != node_name or node.id_data.name != node_tree_name:
+        del material_index[index_key]
+        return None
+    return node
+
+def index_node(material, index_key, node):
+    '''Stores a reference to the provided node in the material node index, so it can be returned without searching for it again.'''
+    material_index = material_node_index.setdefault(material.as_pointer(), {})
+    material_index[index_key] = (node, node.name, node.id_data.name)
+    indexed_node_tree = indexed_node_trees.setdefault(node.id_data.as_pointer(), [0, set()])
+    indexed_node_tree[0] = len(node.id_data.nodes)
+    indexed_node_tree[1].add(material.as_pointer())
+
+def clear_material_node_index(material=None):
+    '''Clears indexed node references for the provided material, or for all materials if no material is provided. This must be called before nodes or node trees that could be indexed are removed.'''
+    if material:
+        material_node_index.pop(material.as_pointer(), None)
+    else:
+        material_node_index.clear()
+        indexed_node_trees.clear()
+    layer_stack_model.clear_layer_stack_models(material)
+
+def clear_updated_node_index(updated_id):
+    '''Clears indexed node references for materials with nodes indexed in the provided updated material or node tree, if nodes were added to or removed from it since they were indexed.
+    Other changes (renaming nodes, editing node values) don't invalidate indexed references, renamed nodes are detected when they're read from the index.'''
+    node_tree = updated_id.node_tree if isinstance(updated_id, bpy.types.Material) else updated_id
+    if not isinstance(node_tree, bpy.types.NodeTree):
+        return
+
+    indexed_node_tree = indexed_node_trees.get(node_tree.as_pointer())
+    if indexed_node_tree == None or indexed_node_tree[0] == len(node_tree.nodes):
+        return
+
+    for material_pointer in indexed_node_tree[1]:
+        material_node_index.pop(material_pointer, None)
+    del indexed_node_trees[node_tree.as_pointer()]
+
+def get_layer_edit_transaction(material=None):
+    '''Returns the open layer edit transaction for the provided material (or the active material if no material is provided). Returns None if the material has no open transaction.'''
+    if material == None:
+        material = bau.get_active_material()
+    if material == None:
+        return None
+    return layer_edit_transactions.get(material.as_pointer())
+
+@contextmanager
+def edit_layers(operator=None, material=None):
+    '''Opens a layer edit transaction for the provided material (or the active material if no material is provided). Layer and mask edits made to the material inside the transaction defer relinking, organizing and refreshing the layer stack until the outermost transaction for the material commits.'''
+    if material == None:
+        material = bau.get_active_material()
+    if material == None:
+        yield
+        return
+
+    transaction = layer_edit_transactions.setdefault(material.as_pointer(), {
+        "depth": 0,
+        "material": material,
+        "operator": None,
+        "scene": None,
+        "dirty_passes": set(),
+        "mask_link_layer_ids": set(),
+        "refresh_reasons": []
+    })
+    transaction["depth"] += 1
+    if operator and not transaction["operator"]:
+        transaction["operator"] = operator
+
+    edit_failed = False
+    try:
+        yield
+    except BaseException:
+        edit_failed = True
+        raise
+    finally:
+        transaction["depth"] -= 1
+        if transaction["depth"] == 0:
+            del layer_edit_transactions[material.as_pointer()]
+
+            # Edits made before an error are still committed, errors committing them are logged so they don't replace the original error.
+            if edit_failed:
+                try:
+                    commit_layer_edits(transaction)
+                except Exception as error:
+                    debug_logging.log("Failed to commit layer edits after an error: {0}".format(error), message_type='ERROR')
+            else:
+                commit_layer_edits(transaction)
+
+def defer_layer_edit_pass(pass_name, layer_index=-1, reason="", scene=None):
+    '''Marks the provided pass as dirty if a layer edit transaction is open for the active material. Returns true if the pass was deferred, and should not run now.'''
+    transaction = get_layer_edit_transaction()
+    if transaction == None:
+        return False
+
+    transaction["dirty_passes"].add(pass_name)
+    match pass_name:
+        case 'LINK_MASKS':
+            layer_id = get_layer_id(layer_index)
+            if layer_id != None:
+                transaction["mask_link_layer_ids"].add(layer_id)
+        case 'REFRESH_LAYER_STACK':
+            if reason != "":
+                transaction["refresh_reasons"].append(reason)
+            if scene:
+                transaction["scene"] = scene
+    return True
+
+def commit_layer_edits(transaction):
+    '''Runs each pass marked as dirty by the provided layer edit transaction once. Passes edit the transaction's material, even if the active material changed.'''
+    dirty_passes = transaction["dirty_passes"]
+    if not dirty_passes:
+        return
+
+    with bau.bind_material(transaction["material"], bau.editing_from_script(), bau.get_active_object()):
+        if 'ORGANIZE_LAYERS' in dirty_passes:
+            organize_layer_group_nodes()
+
+        if 'ORGANIZE_MASKS' in dirty_passes:
+            layer_masks.organize_mask_nodes()
+
+        # Layers deleted during the transaction no longer have a layer index, their masks don't need to be relinked.
+        if 'LINK_MASKS' in dirty_passes:
+            for layer_id in transaction["mask_link_layer_ids"]:
+                layer_index = get_layer_index(layer_id)
+                if layer_index != -1:
+                    layer_masks.link_mask_nodes(layer_index)
+
+        if 'LINK_LAYERS' in dirty_passes:
+            link_layer_group_nodes(transaction["operator"])
+
+        if 'REFRESH_LAYER_STACK' in dirty_passes:
+            refresh_layer_stack(", ".join(transaction["refresh_reasons"]), transaction["scene"])
+
+    debug_logging.log("Committed layer edits: {0}".format(", ".join(sorted(dirty_passes))))
+
+def get_material_layer_node(layer_node_name, layer_index=0, channel_name='COLOR', node_number=1):
     '''Returns the desired material node if it exists. Supply the material channel name to get nodes specific to material channels.'''
 
     # This function fixes a few issues with accessing material layer nodes.
@@ -192,156 +435,65 @@ def get_material_layer_node(layer_node_name, layer_index=0, channel_name='COLOR'
     # 2. It circumnavigates issues with Blender's auto translate feature.
     # 3. It requires less code to access nodes in secondary node groups with the material layer nodes.
 
-    if not getattr(bpy.context, 'active_object'):
-        debug_logging.log("Context has no attribute 'active_object'.")
-        return
-
-    if bpy.context.active_object == None:
-        return
-    
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     if active_material == None:
         return
-    
-    layer_group_node_name = format_layer_group_node_name(active_material.name, layer_index)
-    static_channel_name = bau.format_static_matchannel_name(channel_name)
-
-    # TODO: This should use a list lookup, instead of a match statement.
-    match layer_node_name:
-        case 'LAYER':
-            if get_changed:
-                return active_material.node_tree.nodes.get(str(layer_index) + "~")
-            else:
-                return active_material.node_tree.nodes.get(str(layer_index))
-        
-        case 'MATERIAL_OUTPUT':
-            return active_material.node_tree.nodes.get('MATERIAL_OUTPUT')
-        
-        case 'PROJECTION':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get("PROJECTION")
-            return None
 
-        case 'GROUP_INPUT':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get("GROUP_INPUT")
-            return None
-        
-        case 'GROUP_OUTPUT':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get("GROUP_OUTPUT")
-            return None
+    # Nodes in the material node tree aren't specific to a layer.
+    if layer_node_name in MATERIAL_NODE_NAMES:
+        index_key = (layer_node_name,)
+        node = get_indexed_node(active_material, index_key)
+        if node:
+            return node
 
-        case 'FRAME':
-            frame_name = static_channel_name
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get(frame_name)
-            return None
+        node_tree = active_material.node_tree
+        node_name = layer_node_name
 
-        case 'VALUE':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, "VALUE", node_number)
-                return node_tree.nodes.get(node_name)
+    else:
+        layer_id = get_layer_id(layer_index, active_material)
+        if layer_id == None:
             return None
 
-        case 'TRIPLANAR_BLEND':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, "TRIPLANAR_BLEND")
-                return node_tree.nodes.get(node_name)
-            return None
+        # Return the node from the material node index if it was found previously.
+        index_key = (layer_node_name, layer_id, channel_name, node_number)
+        node = get_indexed_node(active_material, index_key)
+        if node:
+            return node
 
-        case 'FIX_NORMAL_ROTATION':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get("FIX_NORMAL_ROTATION")
-            return None
+        if layer_node_name == 'LAYER':
+            node_tree = active_material.node_tree
+            node_name = layer_id
 
-        case 'MIX':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, "MIX")
-                return node_tree.nodes.get(node_name)
-            return None
-        
-        case 'MIX_REROUTE':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, "MIX_REROUTE")
-                return node_tree.nodes.get(node_name)
-            return None
+        else:
+            if layer_node_name in LAYER_NODE_NAMES:
+                node_name = layer_node_name
 
-        case 'MIX_IMAGE_ALPHA':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, "MIX_IMAGE_ALPHA")
-                return node_tree.nodes.get(node_name)
-            return None  
+            elif layer_node_name == 'FRAME':
+                node_name = bau.format_static_matchannel_name(channel_name)
 
-        case 'OPACITY':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, 'OPACITY')
-                return node_tree.nodes.get(node_name)
-            return None
-        
-        case 'IMAGE_ALPHA_REROUTE':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, 'IMAGE_ALPHA_REROUTE')
-                return node_tree.nodes.get(node_name)
-        
-        case 'FILTER':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, 'FILTER')
-                return node_tree.nodes.get(node_name)
-            return None
+            elif layer_node_name == 'VALUE':
+                node_name = format_material_channel_node_name(channel_name, "VALUE", node_number)
 
-        case 'DECAL_COORDINATES':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('DECAL_COORDINATES')
-            return None
-        
-        case 'LINEAR_DECAL_MASK_BLEND':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                return node_tree.nodes.get('LINEAR_DECAL_MASK_BLEND')
-            return None
-        
-        case 'SEPARATE_RGB':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, "SEPARATE_RGB")
-                return node_tree.nodes.get(node_name)
-            return None
-        
-        case 'EXPORT_UV_MAP':
-            return active_material.node_tree.nodes.get('EXPORT_UV_MAP')
+            elif layer_node_name in MATERIAL_CHANNEL_NODE_NAMES:
+                node_name = format_material_channel_node_name(channel_name, layer_node_name)
 
-        case 'BLUR':
-            node_tree = bpy.data.node_groups.get(layer_group_node_name)
-            if node_tree:
-                node_name = format_material_channel_node_name(static_channel_name, 'BLUR')
-                return node_tree.nodes.get(node_name)
-            return None
+            else:
+                debug_logging.log("Invalid material node name: {0}".format(layer_node_name))
+                return None
 
-        case 'BLUR_NOISE':
-            return active_material.node_tree.nodes.get('BLUR_NOISE')
+            layer_group_node_name = format_layer_group_node_name(active_material.name, layer_id)
+            node_tree = bpy.data.node_groups.get(layer_group_node_name)
+            if not node_tree:
+                return None
 
-        case _:
-            debug_logging.log("Invalid material node name: {0}".format(layer_node_name))
-            return None
+    node = node_tree.nodes.get(node_name)
+    if node:
+        index_node(active_material, index_key, node)
+    return node
 
 def get_isolate_node():
     '''Returns a node designed to isolate materials (Emission). If the node doesn't exist already within the active material node tree, a new isolate node will be created.'''
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     isolate_node = active_material.node_tree.nodes.get('ISOLATE_NODE')
     if not isolate_node:
         isolate_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
@@ -356,7 +508,7 @@ def delete_isolate_node():
     '''Deletes the isolation node from the active material's node tree, and the iso late node group from blend data.'''
 
     # Delete the isolation node from the active material's node tree.
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     isolate_node = active_material.node_tree.nodes.get('ISOLATE_NODE')
     if isolate_node:
         active_material.node_tree.nodes.remove(isolate_node)
@@ -380,6 +532,15 @@ def get_layer_type():
         debug_logging.log("Projection node not defined.", message_type='ERROR')
         return 'NORMAL'
 
+def set_selected_layer_index(layer_index, scene=None):
+    '''Selects the layer at the provided index. When editing from a script, the index is written as an ID property, so layer selection updates for the user interface don't run.'''
+    if scene == None:
+        scene = bpy.context.scene
+    if bau.editing_from_script():
+        scene.rymat_layer_stack["selected_layer_index"] = layer_index
+    else:
+        scene.rymat_layer_stack.selected_layer_index = layer_index
+
 def add_material_layer_slot():
     '''Adds a new slot to the material layer stack, and returns the index of the new layer slot.'''
     layers = bpy.context.scene.rymat_layers
@@ -400,7 +561,7 @@ def add_material_layer_slot():
         move_to_index = 0
         layers.move(move_index, move_to_index)
         layer_stack.layer_index = move_to_index
-        bpy.context.scene.rymat_layer_stack.selected_layer_index = len(layers) - 1
+        set_selected_layer_index(len(layers) - 1)
 
     # Moves the new layer above the currently selected layer and selects it.
     else: 
@@ -408,7 +569,7 @@ def add_material_layer_slot():
         move_to_index = max(0, min(bpy.context.scene.rymat_layer_stack.selected_layer_index + 1, len(layers) - 1))
         layers.move(move_index, move_to_index)
         layer_stack.layer_index = move_to_index
-        bpy.context.scene.rymat_layer_stack.selected_layer_index = max(0, min(bpy.context.scene.rymat_layer_stack.selected_layer_index + 1, len(layers) - 1))
+        set_selected_layer_index(max(0, min(bpy.context.scene.rymat_layer_stack.selected_layer_index + 1, len(layers) - 1)))
 
     return bpy.context.scene.rymat_layer_stack.selected_layer_index
 
@@ -629,6 +790,7 @@ def delete_material_channel_nodes(material_channel_name):
     triplanar_blend = get_material_layer_node('TRIPLANAR_BLEND', selected_layer_index, material_channel_name)
     blur_node = get_material_layer_node('BLUR', selected_layer_index, material_channel_name)
 
+    clear_material_node_index()
     bau.safe_node_delete(layer_node_tree, frame_node)
     bau.safe_node_delete(layer_node_tree, mix_node)
     bau.safe_node_delete(layer_node_tree, mix_image_alpha_node)
@@ -812,8 +974,12 @@ def add_material_layer(layer_type, self):
 
     # If there are no material slots, or no material in the active material slot...
     # make a new material by appending the default material setup for this add-on.
+    # Materials bound by scripts are edited without an object, they always exist.
     active_object = bpy.context.active_object
-    if len(active_object.material_slots) == 0:
+    if bau.editing_from_script():
+        pass
+
+    elif len(active_object.material_slots) == 0:
         new_material = create_default_material_setup()
         new_material_name = bau.get_unique_material_name(active_object.name.replace('_', ''))
         new_material.name = new_material_name
@@ -827,25 +993,24 @@ def add_material_layer(layer_type, self):
         new_material.name = new_material_name
         active_object.material_slots[active_object.active_material_index].material = new_material
 
-    # If material slots exist on the object, but the active material isn't properly formatted to work with this add-on, display an error.
-    else:
-        active_material = bpy.context.active_object.active_material
-        if bau.verify_addon_material(active_material) == False:
-            debug_logging.log_status("Can't add layer, active material format is invalid.", self, type='ERROR')
-            return
+    # If the active material isn't properly formatted to work with this add-on, display an error.
+    if bau.verify_addon_material(bau.get_active_material()) == False:
+        debug_logging.log_status("Can't add layer, active material format is invalid.", self, type='ERROR')
+        return
     
-    # Add a new material layer slot.
+    # Add a new material layer slot, and a new layer ID to the layer stack.
     new_layer_slot_index = add_material_layer_slot()
+    active_material = bau.get_active_material()
+    new_layer_id = insert_layer_id(new_layer_slot_index, active_material)
 
     # Create a default layer group node based on shader material channels.
     default_layer_node_group = create_new_layer_node(layer_type)
 
     # Add the new layer group node to the active material.
-    active_material = bpy.context.active_object.active_material
-    default_layer_node_group.name = format_layer_group_node_name(active_material.name, str(new_layer_slot_index)) + "~"
+    default_layer_node_group.name = format_layer_group_node_name(active_material.name, new_layer_id)
     new_layer_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
     new_layer_group_node.node_tree = default_layer_node_group
-    new_layer_group_node.name = str(new_layer_slot_index) + "~"
+    new_layer_group_node.name = new_layer_id
 
     # Assign a default name to the layer based on the layer type.
     match layer_type:
@@ -856,8 +1021,7 @@ def add_material_layer(layer_type, self):
         case 'DECAL':
             new_layer_group_node.label = "Decal Layer"
 
-    # Re-index, organize and link layer nodes together.
-    reindex_layer_nodes(change_made='ADDED_LAYER', affected_layer_index=new_layer_slot_index)
+    # Organize and link layer nodes together.
     organize_layer_group_nodes()
     link_layer_group_nodes(self)
     layer_masks.organize_mask_nodes()
@@ -964,20 +1128,24 @@ def duplicate_layer(original_layer_index, self):
 
     duplicated_node_tree = bau.duplicate_node_group(layer_node_tree.name)
     if duplicated_node_tree:
-        active_material = bpy.context.active_object.active_material
+        active_material = bau.get_active_material()
 
+        original_mask_ids = layer_masks.get_mask_ids(original_layer_index)
         new_layer_slot_index = add_material_layer_slot()
+        new_layer_id = insert_layer_id(new_layer_slot_index, active_material)
 
-        duplicated_node_tree.name = "{0}_{1}".format(active_material.name, str(new_layer_slot_index))
+        duplicated_node_tree.name = format_layer_group_node_name(active_material.name, new_layer_id)
         new_layer_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
         new_layer_group_node.node_tree = duplicated_node_tree
-        new_layer_group_node.name = str(new_layer_slot_index) + "~"
+        new_layer_group_node.name = new_layer_id
+
+        # Duplicated masks keep the mask IDs of the original layer's masks.
+        layer_masks.set_mask_ids(new_layer_slot_index, original_mask_ids)
 
         # Copy the name of the original layer.
         original_layer_node = get_material_layer_node('LAYER', original_layer_index)
         new_layer_group_node.label = original_layer_node.label + " Copy"
         
-        reindex_layer_nodes(change_made='ADDED_LAYER', affected_layer_index=new_layer_slot_index)
         organize_layer_group_nodes()
         link_layer_group_nodes(self)
         layer_masks.organize_mask_nodes()
@@ -1007,15 +1175,13 @@ def duplicate_layer(original_layer_index, self):
             duplicated_node_tree = bau.duplicate_node_group(original_mask_node.node_tree.name)
             if duplicated_node_tree:
                 new_mask_slot_index = layer_masks.add_mask_slot()
-                duplicated_mask_name = layer_masks.format_mask_name(new_layer_slot_index, new_mask_slot_index, bpy.context.active_object.active_material.name) + "~"
+                duplicated_mask_name = layer_masks.format_mask_name(new_layer_id, layer_masks.get_mask_id(new_layer_slot_index, i), active_material.name)
                 duplicated_node_tree.name = duplicated_mask_name
                 new_mask_group_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
                 new_mask_group_node.node_tree = duplicated_node_tree
                 new_mask_group_node.name = duplicated_mask_name
                 new_mask_group_node.label = original_mask_node.label
 
-                layer_masks.reindex_masks('ADDED_MASK', new_layer_slot_index, affected_mask_index=i)
-
                 if duplicated_decal_object:
                     decal_coordinate_node = layer_masks.get_mask_node('DECAL_COORDINATES', new_layer_slot_index, new_mask_slot_index)
                     if decal_coordinate_node:
@@ -1034,7 +1200,11 @@ def delete_layer(self):
     
     layers = bpy.context.scene.rymat_layers
     selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
+
+    # Materials that don't store layer IDs read them from layer node names, which stops at the first missing node.
+    # Store the layer IDs before removing any nodes, so layers above the deleted layer stay in the layer stack.
+    set_layer_ids(get_layer_ids(active_material), active_material)
 
     # For decal layers, delete the accociated empty object if one exists.
     decal_coordinate_node = get_material_layer_node('DECAL_COORDINATES', selected_layer_index)
@@ -1047,6 +1217,7 @@ def delete_layer(self):
     mask_count = layer_masks.count_masks(selected_layer_index)
     for i in range(0, mask_count):
         mask_node = layer_masks.get_mask_node('MASK', selected_layer_index, i)
+        clear_material_node_index()
         if mask_node.bl_static_type == 'GROUP' and mask_node.node_tree:
             bpy.data.node_groups.remove(mask_node.node_tree)
         active_material.node_tree.nodes.remove(mask_node)
@@ -1054,21 +1225,24 @@ def delete_layer(self):
     # Remove the layer group node (node tree) from Blender's data.
     layer_node_tree = get_layer_node_tree(selected_layer_index)
     if layer_node_tree:
+        clear_material_node_index()
         bpy.data.node_groups.remove(layer_node_tree)
 
     # Remove the layer node from the active materials node tree.
     layer_group_node = get_material_layer_node('LAYER', selected_layer_index)
     if layer_group_node:
+        clear_material_node_index()
         active_material.node_tree.nodes.remove(layer_group_node)
 
-    reindex_layer_nodes(change_made='DELETED_LAYER', affected_layer_index=selected_layer_index)
+    # Remove the layer ID from the layer stack, layers above keep their IDs so none of their nodes need to be renamed.
+    remove_layer_id(selected_layer_index, active_material)
     organize_layer_group_nodes()
     link_layer_group_nodes(self)
     layer_masks.organize_mask_nodes()
 
     # Remove the layer slot and reset the selected layer index.
     layers.remove(selected_layer_index)
-    bpy.context.scene.rymat_layer_stack.selected_layer_index = max(min(selected_layer_index - 1, len(layers) - 1), 0)
+    set_selected_layer_index(max(min(selected_layer_index - 1, len(layers) - 1), 0))
 
     debug_logging.log("Deleted material layer.")
 
@@ -1077,9 +1251,10 @@ def move_layer(direction, self):
     if bau.verify_material_operation_context(self) == False:
         return
     
+    # Layer nodes are named with their layer ID, so moving a layer only swaps the position of the layer IDs in the layer stack.
     match direction:
         case 'UP':
-            # Swap the layer index for all layer nodes in this layer with the layer above it (if one exists).
+            # Swap the selected layer with the layer above it (if one exists).
             layers = bpy.context.scene.rymat_layers
             layer_count = len(layers)
             selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
@@ -1087,83 +1262,19 @@ def move_layer(direction, self):
                 debug_logging.log_status("Can't move layer up. No layers exist above the selected layer.", self, type='INFO')
                 return
             
-            layer_node = get_material_layer_node('LAYER', selected_layer_index)
-            if layer_node:
-                layer_node.name += "~"
-                if layer_node.node_tree:
-                    layer_node.node_tree.name += "~"
-
-            above_layer_node = get_material_layer_node('LAYER', selected_layer_index + 1)
-            if above_layer_node:
-                above_layer_node.name = str(selected_layer_index)
-                if above_layer_node.node_tree:
-                    material_name = parse_material_name(above_layer_node.node_tree.name)
-                    above_layer_node.node_tree.name = format_layer_group_node_name(material_name, selected_layer_index)
-
-            layer_node.name = str(selected_layer_index + 1)
-            material_name = parse_material_name(layer_node.node_tree.name)
-            layer_node.node_tree.name = format_layer_group_node_name(material_name, selected_layer_index + 1)
-
-            # Swap the layer index for all mask nodes in this layer with the layer above it.
-            selected_layer_mask_count = layer_masks.count_masks(selected_layer_index)
-            for i in range(0, selected_layer_mask_count):
-                mask_node = layer_masks.get_mask_node('MASK', selected_layer_index, i)
-                mask_node.name += "~"
-                mask_node.node_tree.name = mask_node.name
-
-            above_layer_mask_count = layer_masks.count_masks(selected_layer_index + 1)
-            for i in range(0, above_layer_mask_count):
-                mask_node = layer_masks.get_mask_node('MASK', selected_layer_index + 1, i)
-                mask_node.name = layer_masks.format_mask_name(selected_layer_index, i)
-                mask_node.node_tree.name = mask_node.name
-
-            for i in range(0, selected_layer_mask_count):
-                mask_node = layer_masks.get_mask_node('MASK', selected_layer_index, i, get_changed=True)
-                mask_node.name = layer_masks.format_mask_name(selected_layer_index + 1, i)
-                mask_node.node_tree.name = mask_node.name
-
-            bpy.context.scene.rymat_layer_stack.selected_layer_index = selected_layer_index + 1
+            swap_layer_ids(selected_layer_index, selected_layer_index + 1)
+            set_selected_layer_index(selected_layer_index + 1)
 
         case 'DOWN':
-            # Swap the layer index for all nodes in this layer with the layer below it (if one exists).
+            # Swap the selected layer with the layer below it (if one exists).
             layers = bpy.context.scene.rymat_layers
             selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
             if not selected_layer_index - 1 >= 0:
                 debug_logging.log_status("Can't move layer down. No layers exist below the selected layer.", self, type='INFO')
                 return
             
-            layer_node = get_material_layer_node('LAYER', selected_layer_index)
-            layer_node.name += "~"
-            layer_node.node_tree.name += "~"
-
-            below_layer_node = get_material_layer_node('LAYER', selected_layer_index - 1)
-            below_layer_node.name = str(selected_layer_index)
-            material_name = parse_material_name(below_layer_node.node_tree.name)
-            below_layer_node.node_tree.name = format_layer_group_node_name(material_name, selected_layer_index)
-
-            layer_node.name = str(selected_layer_index - 1)
-            material_name = parse_material_name(layer_node.node_tree.name)
-            layer_node.node_tree.name = format_layer_group_node_name(material_name, selected_layer_index - 1)
-
-            # Swap the layer index for all mask nodes in this layer with the layer below it.
-            selected_layer_mask_count = layer_masks.count_masks(selected_layer_index)
-            for i in range(0, selected_layer_mask_count):
-                mask_node = layer_masks.get_mask_node('MASK', selected_layer_index, i)
-                mask_node.name += "~"
-                mask_node.node_tree.name = mask_node.name
-
-            below_layer_mask_count = layer_masks.count_masks(selected_layer_index - 1)
-            for i in range(0, below_layer_mask_count):
-                mask_node = layer_masks.get_mask_node('MASK', selected_layer_index - 1, i)
-                mask_node.name = layer_masks.format_mask_name(selected_layer_index, i)
-                mask_node.node_tree.name = mask_node.name
-
-            for i in range(0, selected_layer_mask_count):
-                mask_node = layer_masks.get_mask_node('MASK', selected_layer_index, i, get_changed=True)
-                mask_node.name = layer_masks.format_mask_name(selected_layer_index - 1, i)
-                mask_node.node_tree.name = mask_node.name
-
-            bpy.context.scene.rymat_layer_stack.selected_layer_index = selected_layer_index - 1
+            swap_layer_ids(selected_layer_index, selected_layer_index - 1)
+            set_selected_layer_index(selected_layer_index - 1)
 
         case _:
             debug_logging.log_status("Invalid direction provided for moving a material layer.", self, 'ERROR')
@@ -1176,43 +1287,35 @@ def move_layer(direction, self):
     debug_logging.log("Moved material layer.")
 
 def count_layers(material=None):
-    '''Counts the total layers in the specified material (active material if no material is specified) by reading the active material's node tree.'''
-    layer_count = 0
+    '''Counts the total layers in the specified material (active material if no material is specified) by reading the material's layer IDs.'''
 
     # Count the number of layers in the specified material.
     if material != None:
-        while material.node_tree.nodes.get(str(layer_count)):
-            layer_count += 1
-        return layer_count
+        return len(get_layer_ids(material))
     
     # Count the number of layers in the active material.
     else:
-        active_object_attribute = getattr(bpy.context, "active_object", None)
-        if active_object_attribute == None:
-            return 0
-        if not bpy.context.active_object:
-            return 0
-        if not bpy.context.active_object.active_material:
+        active_material = bau.get_active_material()
+        if not active_material:
             return 0
 
-        active_material = bpy.context.active_object.active_material
         if active_material.use_nodes == False:
             return 0
         
-        while active_material.node_tree.nodes.get(str(layer_count)):
-            layer_count += 1
-        
-        return layer_count
+        return len(get_layer_ids(active_material))
 
 def organize_layer_group_nodes():
     '''Organizes all layer group nodes in the active material to ensure the node tree is easy to read.'''
-    active_material = bpy.context.active_object.active_material
+    if defer_layer_edit_pass('ORGANIZE_LAYERS'):
+        return
+
+    active_material = bau.get_active_material()
 
     # Organize layer group nodes.
     layer_count = count_layers()
     position_x = -500
     for i in range(layer_count, 0, -1):
-        layer_group_node = active_material.node_tree.nodes.get(str(i - 1))
+        layer_group_node = get_material_layer_node('LAYER', i - 1)
         if layer_group_node:
             layer_group_node.width = 300
             layer_group_node.location = (position_x, 0)
@@ -1230,39 +1333,45 @@ def organize_layer_group_nodes():
     debug_logging.log("Organized layer group nodes.")
 
 def refresh_layer_stack(reason="", scene=None):
-    '''Clears, and then reads the active material, to sync the number of layers in the user interface with the number of layers that exist within the material node tree.'''
-    if scene:
-        layers = scene.rymat_layers
-    else:
-        layers = bpy.context.scene.rymat_layers
-    
-    # Clear all layers.
-    layers.clear()
+    '''Syncs the number of layers in the user interface with the number of layers that exist within the active material. Only missing or extra layer slots are added or removed.'''
+    if defer_layer_edit_pass('REFRESH_LAYER_STACK', reason=reason, scene=scene):
+        return
+
+    # Layers may have been added, removed or changed, the layer stack model is rebuilt the next time it's read.
+    layer_stack_model.clear_layer_stack_models()
 
-    # Do not add material slots if there is no active object.
-    if bpy.context.active_object != None:
+    if scene == None:
+        scene = bpy.context.scene
+    layers = scene.rymat_layers
 
-        # Add a material slot for each material layer detected in the active material.
+    # Layer slots are placeholders drawn by their index, so only the number of layer slots needs to match the number of layers.
+    layer_count = 0
+    if bau.get_active_material() != None:
         layer_count = count_layers()
-        for layer in range(0, layer_count):
-            add_material_layer_slot()
 
-        # Reset the layer index if it's out of range.
-        selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
-        if selected_layer_index > len(layers) - 1 or selected_layer_index < 0:
-            bpy.context.scene.rymat_layer_stack.selected_layer_index = 0
+    for i in range(len(layers) - 1, layer_count - 1, -1):
+        layers.remove(i)
+
+    for i in range(len(layers), layer_count):
+        layers.add()
+
+    # Select the top layer, the selected layer index is set once so layer selection updates only run once.
+    if bau.get_active_material() != None:
+        set_selected_layer_index(max(0, layer_count - 1), scene)
 
     if reason != "":
         debug_logging.log("Refreshed layer stack due to: " + reason, sub_process=True)
 
 def link_layer_group_nodes(self):
     '''Connects all layer group nodes to other existing group nodes, and the principled BSDF shader.'''
+    if defer_layer_edit_pass('LINK_LAYERS'):
+        return
 
     if bau.verify_material_operation_context(self) == False:
         return
 
     shader_info = bpy.context.scene.rymat_shader_info
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     node_tree = active_material.node_tree
 
     # Don't attempt to link layer group nodes if there are no layers.
@@ -1270,57 +1379,46 @@ def link_layer_group_nodes(self):
     if layer_count <= 0:
         return
 
-    # Disconnect all layer group nodes (don't disconnect masks).
+    # Layers below a cached layer are sampled from the layer cache, they aren't linked while the cache exists.
+    cache_layer_index = layer_cache.verify_layer_cache(active_material)
+
+    # Collect existing links for all layer group nodes (mask and blur noise links are managed separately).
+    layer_nodes = []
+    existing_links = []
     for i in range(0, layer_count):
         layer_node = get_material_layer_node('LAYER', i)
         if layer_node:
+            if i >= cache_layer_index:
+                layer_nodes.append(layer_node)
             for input in layer_node.inputs:
                 if input.name != 'Layer Mask' and input.name != 'Blur Noise':
-                    for link in input.links:
-                        node_tree.links.remove(link)
+                    existing_links.extend(input.links)
             for output in layer_node.outputs:
-                for link in output.links:
-                    node_tree.links.remove(link)
-
-    # Re-connect all (non-muted / active) layer group nodes.
-    for i in range(0, layer_count):
-        layer_node = get_material_layer_node('LAYER', i)
-        if bau.get_node_active(layer_node):
-            next_layer_index = i + 1
-            next_layer_node = get_material_layer_node('LAYER', next_layer_index)
-            if next_layer_node:
-                while not bau.get_node_active(next_layer_node) and next_layer_index <= layer_count - 1:
-                    next_layer_index += 1
-                    next_layer_node = get_material_layer_node('LAYER', next_layer_index)
-
-            if next_layer_node:
-                if bau.get_node_active(next_layer_node):
-                    for channel in shader_info.material_channels:
-                        output_socket = layer_node.outputs.get(channel.name)
-                        input_socket = next_layer_node.inputs.get(channel.name)
-                        if output_socket and input_socket:
-                            node_tree.links.new(output_socket, input_socket)
-
-    # Connect the last (non-muted / active) layer node to the principled BSDF.
-    shader_node = active_material.node_tree.nodes.get('SHADER_NODE')
-
-    last_layer_node_index = layer_count - 1
-    last_layer_node = get_material_layer_node('LAYER', last_layer_node_index)
-    if last_layer_node:
-        while not bau.get_node_active(last_layer_node) and last_layer_node_index >= 0:
-            last_layer_node = get_material_layer_node('LAYER', last_layer_node_index)
-            last_layer_node_index -= 1
+                existing_links.extend(output.links)
+
+    # Each (non-muted / active) layer group node connects to the next active layer, the last active layer connects to the principled BSDF.
+    active_layer_nodes = [layer_node for layer_node in layer_nodes if bau.get_node_active(layer_node)]
+    shader_node = node_tree.nodes.get('SHADER_NODE')
+    desired_links = []
+    for i, layer_node in enumerate(active_layer_nodes):
+        if i + 1 < len(active_layer_nodes):
+            next_node = active_layer_nodes[i + 1]
+        else:
+            next_node = shader_node
 
-    if last_layer_node:
-        if bau.get_node_active(last_layer_node):
-            
+        if next_node:
             for channel in shader_info.material_channels:
+                desired_links.append((layer_node.outputs.get(channel.name), next_node.inputs.get(channel.name)))
 
-                output_socket = last_layer_node.outputs.get(channel.name)
-                input_socket = shader_node.inputs.get(channel.name)
-                if output_socket and input_socket:
-                    node_tree.links.new(output_socket, input_socket)
-    
+    # Cached values are linked into the first active layer above the frozen layers.
+    if cache_layer_index != -1:
+        first_node = active_layer_nodes[0] if len(active_layer_nodes) > 0 else shader_node
+        for channel_name, cache_output in layer_cache.get_layer_cache_outputs(active_material).items():
+            desired_links.append((cache_output, first_node.inputs.get(channel_name)))
+
+    # Only add and remove links that differ, re-creating unchanged links would trigger a full shader recompile.
+    added_link_count, removed_link_count = bau.sync_node_links(node_tree, existing_links, desired_links)
+    debug_logging.log("Layer group node links added: {0}, removed: {1}".format(added_link_count, removed_link_count), sub_process=True)
     debug_logging.log("Linked layer group nodes.")
 
 def link_material_channel_noise_blur(node_tree, layer_node):
@@ -1331,50 +1429,6 @@ def link_material_channel_noise_blur(node_tree, layer_node):
     else:
         debug_logging.log("No blur noise texture node.", message_type='ERROR')
 
-def reindex_layer_nodes(change_made, affected_layer_index):
-    '''Reindexes layer group nodes to keep them properly indexed. This should be called after a change is made that effects the layer stack order such as adding, duplicating, deleting, or moving a material layer on the layer stack.'''
-    match change_made:
-        case 'ADDED_LAYER':
-            # Increase the layer index for all layer group nodes, their node trees, and their masks that exist above the affected layer.
-            layer_count = len(bpy.context.scene.rymat_layers)
-            for i in range(layer_count, affected_layer_index, -1):
-                layer_node = get_material_layer_node('LAYER', i - 1)
-                if layer_node:
-                    layer_node.name = str(int(layer_node.name) + 1)
-                    material_name = parse_material_name(layer_node.node_tree.name)
-                    layer_index = parse_layer_index(layer_node.node_tree.name)
-                    layer_node.node_tree.name = format_layer_group_node_name(material_name, layer_index + 1)
-                    layer_mask_count = layer_masks.count_masks(i - 1)
-                    for c in range(layer_mask_count, 0, -1):
-                        mask_node = layer_masks.get_mask_node('MASK', i - 1, c - 1)
-                        if mask_node:
-                            mask_node.name = layer_masks.format_mask_name(i, c - 1)
-                            mask_node.node_tree.name = mask_node.name
-
-            new_layer_node = get_material_layer_node('LAYER', affected_layer_index, get_changed=True)
-            if new_layer_node:
-                new_layer_node.name = str(affected_layer_index)
-                material_name = parse_material_name(new_layer_node.node_tree.name)
-                new_layer_node.node_tree.name = format_layer_group_node_name(material_name, affected_layer_index)
-
-        case 'DELETED_LAYER':
-            # Reduce the layer index for all layer group nodes, their nodes trees, and their masks that exist above the affected layer.
-            layer_count = len(bpy.context.scene.rymat_layers)
-            for i in range(affected_layer_index + 1, layer_count):
-                layer_node = get_material_layer_node('LAYER', i)
-                layer_node.name = str(int(layer_node.name) - 1)
-                material_name = parse_material_name(layer_node.node_tree.name)
-                layer_index = parse_layer_index(layer_node.node_tree.name)
-                layer_node.node_tree.name = format_layer_group_node_name(material_name, layer_index - 1)
-                layer_mask_count = layer_masks.count_masks(i)
-                for c in range(0, layer_mask_count):
-                    mask_node = layer_masks.get_mask_node('MASK', i, c)
-                    if mask_node:
-                        mask_node.name = layer_masks.format_mask_name(i - 1, c)
-                        mask_node.node_tree.name = mask_node.name
-
-    debug_logging.log("Re-indexed material layers.")
-
 def apply_mesh_maps():
     '''Searches for all mesh map texture nodes in the node tree and applies mesh maps if they exist.'''
     # Apply baked mesh maps to all group nodes used as masks for all material layers.
@@ -1387,7 +1441,7 @@ def apply_mesh_maps():
                 mesh_map_node = mask_node.node_tree.nodes.get(mesh_map_type)
                 if mesh_map_node:
                     if mesh_map_node.bl_static_type == 'TEX_IMAGE':
-                        mesh_map_node.image = mesh_map_baking.get_meshmap_image(bpy.context.active_object.name, mesh_map_type)
+                        mesh_map_node.image = mesh_map_baking.get_object_meshmap_image(bau.get_active_object(), mesh_map_type)
 
     debug_logging.log("Applied baked mesh maps.")
 
@@ -1537,6 +1591,7 @@ def delete_material_channel_texture_nodes(material_channel_name, selected_layer_
     for i in range(0, 9):
         texture_sample_node = get_material_layer_node('VALUE', selected_layer_index, material_channel_name, i + 1)
         if texture_sample_node:
+            clear_material_node_index()
             layer_node_tree.nodes.remove(texture_sample_node)
 
 def set_material_channel_projection(material_channel_name, projection_method, set_texture_node=False):
@@ -1600,6 +1655,7 @@ def set_material_channel_projection(material_channel_name, projection_method, se
                 # Delete triplanar blend node if one exists.
                 triplanar_blend_node = get_material_layer_node('TRIPLANAR_BLEND', selected_layer_index, material_channel_name)
                 if triplanar_blend_node:
+                    clear_material_node_index()
                     layer_node_tree.nodes.remove(triplanar_blend_node)
 
                 # Add a normal rotation fix node for material channels with normal data.
@@ -1623,6 +1679,7 @@ def set_material_channel_projection(material_channel_name, projection_method, se
                 # Delete normal rotation fix node if one exists.
                 fix_normal_rotation_node = get_material_layer_node('FIX_NORMAL_ROTATION', selected_layer_index, material_channel_name)
                 if fix_normal_rotation_node:
+                    clear_material_node_index()
                     layer_node_tree.nodes.remove(fix_normal_rotation_node)
 
                 triplanar_blend_node.name = format_material_channel_node_name(static_channel_name, 'TRIPLANAR_BLEND')
@@ -1893,12 +1950,12 @@ def set_material_channel_crgba_output(material_channel_name, crgba_output, layer
 
 def isolate_material_channel(material_channel_name):
     '''Isolates the specified material channel by linking the specified material channel output to an isolate (emission) node.'''
-    active_node_tree = bpy.context.active_object.active_material.node_tree
+    active_node_tree = bau.get_active_material().node_tree
     isolate_node = get_isolate_node()
     material_output = active_node_tree.nodes.get('MATERIAL_OUTPUT')
 
     output_socket_name = shaders.get_shader_channel_socket_name(material_channel_name)
-    total_layers = count_layers(bpy.context.active_object.active_material)
+    total_layers = count_layers(bau.get_active_material())
     for i in range(total_layers, 0, -1):
         layer_node = get_material_layer_node('LAYER', i - 1)
         if bau.get_node_active(layer_node):
@@ -1909,17 +1966,11 @@ def isolate_material_channel(material_channel_name):
 
 def show_layer():
     '''Removes material channel or mask isolation if they are applied by re-linking the shader node to the material output node.'''
-    active_object_attribute = getattr(bpy.context, "active_object", None)
-    if not active_object_attribute:
-        return
-    
-    if not bpy.context.active_object:
-        return
-    
-    if not bpy.context.active_object.active_material:
+    active_material = bau.get_active_material()
+    if not active_material:
         return
 
-    active_node_tree = bpy.context.active_object.active_material.node_tree
+    active_node_tree = active_material.node_tree
     if not active_node_tree:
         return
     
@@ -1946,6 +1997,10 @@ def get_layer_blending_mode(layer_index, material_channel_name=''):
         material_channel_name = bpy.context.scene.rymat_layer_stack.selected_material_channel
 
     mix_node = get_material_layer_node('MIX', layer_index, material_channel_name)
+    return get_mix_node_blending_mode(mix_node)
+
+def get_mix_node_blending_mode(mix_node):
+    '''Returns the blending mode used by the provided layer mix node.'''
     match mix_node.bl_static_type:
         case 'MIX':
             return mix_node.blend_type
@@ -1973,6 +2028,7 @@ def set_layer_blending_mode(layer_index, blending_mode, material_channel_name='C
     # Set the layers mix node to a group node with the custom group node mix calculation.
     if blending_mode == 'NORMAL_MAP_COMBINE' or blending_mode == 'NORMAL_MAP_DETAIL':
         if original_mix_node.bl_static_type != 'GROUP':
+            clear_material_node_index()
             layer_node_tree.nodes.remove(original_mix_node)
             mix_node = layer_node_tree.nodes.new('ShaderNodeGroup')
         else:
@@ -1986,6 +2042,7 @@ def set_layer_blending_mode(layer_index, blending_mode, material_channel_name='C
     # Ensure the layers mix node is using Blender's mix RGB node then set the blending type.
     else:
         if original_mix_node.bl_static_type != 'MIX':
+            clear_material_node_index()
             layer_node_tree.nodes.remove(original_mix_node)
             mix_node = layer_node_tree.nodes.new('ShaderNodeMix')
             mix_node.data_type = 'RGBA'
@@ -2116,7 +2173,7 @@ def ensure_image_saved(layer_index, material_channel_name):
 
 def get_merge_bake_node():
     '''Returns a node used for merge baking layers. If a merge bake node doesn't exist in the active node tree, one will be created.'''
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     merge_bake_node = active_material.node_tree.nodes.get('MERGE_BAKE_NODE')
     if not merge_bake_node:
         merge_bake_node = active_material.node_tree.nodes.new('ShaderNodeGroup')
@@ -2131,7 +2188,7 @@ def delete_merge_bake_node():
     '''Deletes the merge bake node from the active material's node tree, and the merge bake node group from blend data.'''
 
     # Delete the merge bake node from the active material's node tree.
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     merge_bake_node = active_material.node_tree.nodes.get('MERGE_BAKE_NODE')
     if merge_bake_node:
         active_material.node_tree.nodes.remove(merge_bake_node)
@@ -2141,11 +2198,15 @@ def delete_merge_bake_node():
     if merge_bake_node_tree:
         bpy.data.node_groups.remove(merge_bake_node_tree, do_unlink=True, do_id_user=True, do_ui_user=True)
 
+def format_merged_image_name(layer_name, material_channel_name):
+    '''Returns the name of the image a material channel of merged layers is written to.'''
+    return "{0}_Merged_{1}".format(layer_name, bau.format_static_matchannel_name(material_channel_name))
+
 def merge_bake_material_channel(material_channel_name):
     '''Triggers a bake for the specified material channel to convert it pixel data.'''
     
     selected_layer_index = bpy.context.scene.rymat_layer_stack.selected_layer_index
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     selected_layer_node = get_material_layer_node('LAYER', selected_layer_index)
     below_layer_node = get_material_layer_node('LAYER', selected_layer_index - 1)
 
@@ -2159,21 +2220,20 @@ def merge_bake_material_channel(material_channel_name):
         use_alpha = True
 
     # Create a new image to bake the material channel to.
+    # The merged image is kept as a layer texture so it isn't taken from the bake image pool, but it's created through the data API to avoid operator overhead.
     bake_image_name = selected_layer_node.label
-    bake_image = bau.create_image(
-        new_image_name=bake_image_name + "_Merged",
-        image_width=tss.get_texture_width(),
-        image_height=tss.get_texture_height(),
-        base_color=background_color,
-        generate_type='BLANK',
+    bake_image = bau.create_data_image(
+        format_merged_image_name(bake_image_name, material_channel_name),
+        tss.get_texture_width(),
+        tss.get_texture_height(),
         alpha_channel=use_alpha,
         thirty_two_bit=True,
-        add_unique_id=False,
         delete_existing=True
     )
+    bake_image.generated_color = background_color
 
     # Add the baking image to the bake texture node.
-    material_nodes = bpy.context.active_object.active_material.node_tree.nodes
+    material_nodes = bau.get_active_material().node_tree.nodes
     image_node = material_nodes.get('BAKE_IMAGE')
     image_node.image = bake_image
     image_node.select = True
@@ -2224,7 +2284,7 @@ def merge_bake_material_channel(material_channel_name):
 
 def relink_shader_node():
     '''Relinks the shader node to the material output node.'''
-    active_material = bpy.context.active_object.active_material
+    active_material = bau.get_active_material()
     material_output_node = get_material_layer_node('MATERIAL_OUTPUT')
     shader_node = active_material.node_tree.nodes.get('SHADER_NODE')
     bau.unlink_node(material_output_node, active_material.node_tree, unlink_inputs=True, unlink_outputs=False)
@@ -2426,12 +2486,12 @@ class RYMAT_OT_toggle_hide_layer(Operator):
         return context.active_object
 
     def execute(self, context):
-        layer_node = get_material_layer_node('LAYER', self.layer_index)
+        layer_model = layer_stack_model.get_layer_model(self.layer_index)
+        if not layer_model:
+            return {'FINISHED'}
 
-        if bau.get_node_active(layer_node):
-            bau.set_node_active(layer_node, False)
-        else:
-            bau.set_node_active(layer_node, True)
+        layer_model.active = not layer_model.active
+        layer_stack_model.sync_layer_stack_model()
 
         link_layer_group_nodes(self)
         return {'FINISHED'}
@@ -2602,10 +2662,11 @@ class RYMAT_OT_merge_with_layer_below(Operator):
             if bpy.app.is_job_running('OBJECT_BAKE'):
                 return {'RUNNING_MODAL'}
             
-            # If an image was baked, pack it in the blend files data.
+            # If an image was baked, pad its UV islands and pack it in the blend files data.
             bake_image = bpy.data.images.get(self._bake_image_name)
             if bake_image != None:
                 if not bake_image.packed_file:
+                    mesh_map_baking.pad_baked_image(bake_image, bpy.context.active_object, [bpy.context.active_object.active_material_index])
                     bake_image.pack()
                     debug_logging.log("Baking complete for: {0}".format(self._bake_image_name))
 
@@ -2667,20 +2728,28 @@ class RYMAT_OT_merge_with_layer_below(Operator):
             debug_logging.log_status("No active material channels to bake, can't merge layers.", self, type='INFO')
             return {'FINISHED'}
         
+        # Remember the original render engine so we can reset it after baking.
+        self._original_render_engine_name = bpy.context.scene.render.engine
+
+        # Layers that are only images and constant values are blended per pixel on the CPU, which doesn't require baking.
+        layer_name = get_material_layer_node('LAYER', selected_layer_index).label
+        if layer_compositor.composite_merged_layers(selected_layer_index, self._active_material_channels, layer_name):
+            self.finish(context)
+            return {'FINISHED'}
+        debug_logging.log("Layers can't be merged on the CPU, merging layers by baking.")
+
         # Add a temporary texture node to the material setup to bake to.
         add_bake_texture_nodes()
-
-        # Remember the original render engine so we can reset it after baking.
         bpy.context.scene.render.engine = 'CYCLES'
-        self._original_render_engine_name = bpy.context.scene.render.engine
 
         # Apply baking settings.
-        bpy.context.scene.render.bake.margin = 14
+        bpy.context.scene.render.bake.margin = mesh_map_baking.get_bake_margin()
+        image_utilities.clear_uv_coverage_cache()
         bpy.context.scene.render.bake.use_selected_to_active = False
         bpy.context.scene.cycles.samples = 32
 
-        # Force save all textures (unsaved textures will be cleared and not bake properly).
-        bau.force_save_all_textures()
+        # Save textures used in the material being merged (unsaved textures will be cleared and not bake properly).
+        bau.save_material_images([bau.get_active_material()])
 
         # Add a timer to provide periodic timer events.
         wm = context.window_manager
@@ -2747,7 +2816,7 @@ class RYMAT_OT_merge_with_layer_below(Operator):
             # Replace the standard value nodes with image textures,
             # then add the images with the merged pixel data to them.
             replace_material_channel_node(material_channel_name, node_type='TEXTURE')
-            merged_image = bpy.data.images.get(layer_name + "_Merged")
+            merged_image = bpy.data.images.get(format_merged_image_name(layer_name, material_channel_name))
             if merged_image:
                 value_node = get_material_layer_node('VALUE', selected_layer_index, material_channel_name, node_number=1)
                 value_node.image = merged_image
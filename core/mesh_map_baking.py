@@ -2,7 +2,11 @@
 
 import os
 import time
+import math
+import hashlib
+import numpy
 import bpy
+from mathutils.bvhtree import BVHTree
 from bpy.types import Operator, PropertyGroup
 from bpy.props import StringProperty, PointerProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty
 from ..core import material_layers
@@ -10,6 +14,8 @@ from ..core import blender_addon_utils
 from ..core import debug_logging
 from ..core import texture_set_settings as tss
 from ..core import image_utilities
+from ..core import bake_journal
+from .. import preferences
 
 MESH_MAP_MATERIAL_NAMES = (
     "BakeNormals",
@@ -34,6 +40,13 @@ MESH_MAP_TYPES = (
     "WORLD_SPACE_NORMALS"
 )
 
+# Mesh maps baked by ray tracing which contain sampling noise that can be removed with the optional denoise pass.
+DENOISED_MESH_MAP_TYPES = (
+    "AMBIENT_OCCLUSION",
+    "CURVATURE",
+    "THICKNESS"
+)
+
 MESH_MAP_ANTI_ALIASING = [
     ("NO_AA", "No AA", "No anti aliasing will be applied to output mesh map textures"),
     ("2X", "2xAA", "Mesh maps will be rendered at 2x scale and then scaled down to effectively apply anti-aliasing"),
@@ -56,6 +69,15 @@ MESH_MAP_BAKING_QUALITY = [
     ("INSANE_QUALITY", "Insane Quality", "Very high sampling, for hyper accurate mesh map data output, not recommended for standard use. Render times are very long (256 samples)")
 ]
 
+UV_PADDING_METHODS = [
+    ("DILATE", "Dilate", "Bakes without a margin, then extends baked pixels out of UV islands as a fast post-process. This avoids the extra render time baking a margin adds to every bake"),
+    ("BAKE_MARGIN", "Bake Margin", "Uses the bake margin built into Blender to extend baked pixels out of UV islands while baking")
+]
+
+# Cage rays only search for the high poly surface within this fraction of the low poly object's largest dimension.
+# This stops rays cast from concave areas finding unrelated high poly surfaces on the other side of the object.
+CAGE_RAY_DISTANCE_FACTOR = 0.1
+
 MESH_MAP_CAGE_MODE = [
     ("NO_CAGE", "No Cage", "No cage will be used when baking mesh maps. This can in rare cases produce better results than using a cage"),
     ("MANUAL_CAGE", "Manual Cage", "Insert a manually created cage to be used when baking mesh maps. Baking using a cage can cause some skewing of the baked data if the cage extends too much, or missing normal data in areas where the geometry is not covered by the cage. For some objects that have small crevaces where cage mesh normals would intersect if extruded defining a manual cage object will produce the best results")
@@ -171,6 +193,97 @@ def get_meshmap_image(mesh_name, mesh_map_type):
     mesh_map_name = get_meshmap_name(mesh_name, mesh_map_type)
     return bpy.data.images.get(mesh_map_name)
 
+def get_mesh_data_hash(mesh):
+    '''Returns a hash of the vertex positions, faces and active UV map of the provided mesh, which define the mesh maps baked from it.'''
+    mesh_hash = hashlib.sha1()
+    vertex_positions = numpy.empty(len(mesh.vertices) * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get("co", vertex_positions)
+    mesh_hash.update(vertex_positions.tobytes())
+
+    loop_vertices = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    mesh_hash.update(loop_vertices.tobytes())
+
+    polygon_loop_totals = numpy.empty(len(mesh.polygons), dtype=numpy.int32)
+    mesh.polygons.foreach_get("loop_total", polygon_loop_totals)
+    mesh_hash.update(polygon_loop_totals.tobytes())
+
+    uv_layer = mesh.uv_layers.active
+    if uv_layer:
+        uvs = numpy.empty(len(uv_layer.data) * 2, dtype=numpy.float32)
+        uv_layer.data.foreach_get("uv", uvs)
+        mesh_hash.update(uvs.tobytes())
+    return mesh_hash.hexdigest()
+
+def get_bake_settings_key(settings):
+    '''Returns a string of all settings in the provided baking settings (including nested settings) that change baked mesh maps. Toggles for which mesh maps to bake, and object pointers aren't included.'''
+    setting_values = []
+    for setting in settings.bl_rna.properties:
+        if setting.identifier == 'rna_type' or setting.identifier.startswith("bake_"):
+            continue
+        value = getattr(settings, setting.identifier)
+        if setting.type == 'POINTER':
+            if isinstance(value, bpy.types.PropertyGroup):
+                setting_values.append(get_bake_settings_key(value))
+            continue
+        setting_values.append("{0}={1}".format(setting.identifier, value))
+    return ",".join(setting_values)
+
+def get_mesh_map_share_key(obj, mesh_map_type, mesh_data_hashes=None):
+    '''Returns a key identifying the mesh data and bake settings a mesh map is baked from, so objects with the same mesh (e.g. linked duplicates) can share mesh maps. Returns None if the mesh map can't be shared.
+    Mesh data hashes are cached in the provided dictionary by mesh name, so each mesh is only hashed once when baking many mesh maps.'''
+    baking_settings = bpy.context.scene.rymat_baking_settings
+
+    # Mesh maps baked from a high poly object, or that are affected by other objects in the scene are unique to each object.
+    if obj == None or obj.type != 'MESH' or baking_settings.high_poly_object != None:
+        return None
+    match mesh_map_type:
+        case 'NORMALS':
+            return None
+        case 'AMBIENT_OCCLUSION':
+            if not baking_settings.local_occlusion:
+                return None
+        case 'THICKNESS':
+            if not baking_settings.local_thickness:
+                return None
+
+    if mesh_data_hashes == None:
+        mesh_data_hashes = {}
+    mesh_data_hash = mesh_data_hashes.get(obj.data.name)
+    if mesh_data_hash == None:
+        mesh_data_hash = get_mesh_data_hash(obj.data)
+        mesh_data_hashes[obj.data.name] = mesh_data_hash
+
+    # Modifiers change the evaluated mesh, and object scale changes distance based mesh maps.
+    # World space normals also change with the object's rotation.
+    key_parts = [mesh_data_hash, mesh_map_type, str(tss.get_texture_width()), str(tss.get_texture_height()), get_bake_settings_key(baking_settings)]
+    key_parts.extend("{0}:{1}:{2}".format(modifier.name, modifier.type, modifier.show_render) for modifier in obj.modifiers)
+    if mesh_map_type == 'WORLD_SPACE_NORMALS':
+        key_parts.extend(str(round(value, 4)) for row in obj.matrix_world.to_3x3() for value in row)
+    else:
+        key_parts.extend(str(round(value, 4)) for value in obj.matrix_world.to_scale())
+    return "|".join(key_parts)
+
+def get_shared_meshmap_property(mesh_map_type):
+    '''Returns the name of the object property storing the name and share key of a mesh map shared with the object.'''
+    return "rymat_shared_{0}".format(mesh_map_type.lower())
+
+def get_object_meshmap_image(obj, mesh_map_type):
+    '''Returns the mesh map image for the provided object if it exists. Objects without their own mesh map use a mesh map shared from another object with the same mesh data.'''
+    if obj == None:
+        return None
+    mesh_map_image = get_meshmap_image(obj.name, mesh_map_type)
+    if mesh_map_image:
+        return mesh_map_image
+
+    # Only use the shared mesh map if it wasn't re-baked with different mesh data or bake settings since it was shared.
+    shared_mesh_map = obj.get(get_shared_meshmap_property(mesh_map_type))
+    if shared_mesh_map:
+        shared_image = bpy.data.images.get(shared_mesh_map.get("image", ""))
+        if shared_image and shared_image.get("rymat_mesh_map_key") == shared_mesh_map.get("key"):
+            return shared_image
+    return None
+
 def create_bake_image(mesh_map_type, object_name, baking_settings):
     '''Creates a new image in Blender's data to bake to.'''
 
@@ -260,31 +373,68 @@ def apply_mesh_map_quality(baking_settings):
         case 'INSANE_QUALITY':
             bpy.context.scene.cycles.samples = 256
 
-def bake_mesh_map(mesh_map_type, object_name, self):
-    '''Applies a premade baking material to the active object and starts baking. Returns true if baking was successful.'''
+def get_bake_margin():
+    '''Returns the bake margin that should be used when baking based on the UV padding method.'''
     baking_settings = bpy.context.scene.rymat_baking_settings
+    if baking_settings.uv_padding_method == 'DILATE':
+        return 0
+    return baking_settings.uv_padding
 
-    # Append a premade material for baking the specified mesh map type.
-    match mesh_map_type:
-        case 'AMBIENT_OCCLUSION':
-            temp_bake_material = blender_addon_utils.append_material('BakeAmbientOcclusion')
-            self._mesh_map_group_node_name = "RY_AmbientOcclusion"
-
-        case 'CURVATURE':
-            temp_bake_material = blender_addon_utils.append_material('BakeCurvature')
-            self._mesh_map_group_node_name = "RY_Curvature"
-
-        case 'THICKNESS':
-            temp_bake_material = blender_addon_utils.append_material('BakeThickness')
-            self._mesh_map_group_node_name = "RY_Thickness"
-
-        case 'NORMALS':
-            temp_bake_material = blender_addon_utils.append_material('BakeNormals')
+def pad_baked_image(image, obj, material_indices=None):
+    '''Extends pixels baked to the provided image out of the object's UV islands if UV padding is applied as a post-process.'''
+    baking_settings = bpy.context.scene.rymat_baking_settings
+    if baking_settings.uv_padding_method == 'DILATE':
+        image_utilities.dilate_image(image, obj, baking_settings.uv_padding, material_indices)
+
+def get_denoise_guide(obj, width, height):
+    '''Returns world space normal mesh map pixels for the provided object to guide denoising, or None if the object has no world space normal mesh map.'''
+    guide_image = get_object_meshmap_image(obj, 'WORLD_SPACE_NORMALS')
+    if not guide_image or not guide_image.has_data:
+        return None
+    guide = image_utilities.get_image_pixels(guide_image)
+    if guide.shape[0] != height or guide.shape[1] != width:
+        guide = image_utilities.resample_pixels(guide, width, height)
+    return guide
+
+def resample_mesh_map(mesh_map_image, obj, baking_settings, mesh_map_type):
+    '''Resamples a baked mesh map to the texture set resolution, denoises it and pads it's UV islands. The mesh map pixels are read and written only once.'''
+    target_width = tss.get_texture_width()
+    target_height = tss.get_texture_height()
+    filter_type = baking_settings.mesh_map_resample_filter
+    dilate = baking_settings.uv_padding_method == 'DILATE'
+
+    pixels = image_utilities.get_image_pixels(mesh_map_image)
+    source_height, source_width = pixels.shape[0], pixels.shape[1]
+    if source_width != target_width or source_height != target_height:
+
+        # Unbaked pixels outside of UV islands would bleed into the island edges when resampled,
+        # extend the islands by the width of the resampling filter first.
+        if dilate:
+            filter_support = 3 if filter_type == 'LANCZOS' else 1
+            filter_padding = int(math.ceil(filter_support * max(source_width / target_width, 1.0))) + 1
+            coverage = image_utilities.get_uv_coverage_mask(obj, source_width, source_height)
+            image_utilities.dilate_pixels(pixels, coverage, filter_padding)
+
+        pixels = image_utilities.resample_pixels(pixels, target_width, target_height, filter_type)
+
+    # Remove sampling noise from ray traced mesh maps, so they can be baked with fewer samples.
+    if baking_settings.denoise_mesh_maps and mesh_map_type in DENOISED_MESH_MAP_TYPES:
+        coverage = image_utilities.get_uv_coverage_mask(obj, target_width, target_height)
+        guide = get_denoise_guide(obj, target_width, target_height)
+        image_utilities.denoise_pixels(pixels, coverage, guide, baking_settings.denoise_radius)
+
+    if dilate:
+        coverage = image_utilities.get_uv_coverage_mask(obj, target_width, target_height)
+        image_utilities.dilate_pixels(pixels, coverage, baking_settings.uv_padding)
+
+    image_utilities.set_image_pixels(mesh_map_image, pixels)
 
-        case 'WORLD_SPACE_NORMALS':
-            temp_bake_material = blender_addon_utils.append_material('BakeWorldSpaceNormals')
-            self._mesh_map_group_node_name = "RY_WorldSpaceNormals"
+def bake_mesh_map(mesh_map_type, object_name, self):
+    '''Applies a premade baking material to the active object and starts baking. Returns true if baking was successful.'''
+    baking_settings = bpy.context.scene.rymat_baking_settings
 
+    # Get the premade material for baking the specified mesh map type, it's appended if it wasn't appended at the start of the batch.
+    temp_bake_material = blender_addon_utils.append_material(get_bake_material_name(mesh_map_type))
     self._temp_bake_material_name = temp_bake_material.name
 
     # Skip normal map baking if there is no high poly object defined, no normal information can be baked without a high poly object.
@@ -339,7 +489,7 @@ def bake_mesh_map(mesh_map_type, object_name, self):
     # Apply mesh map quality and baking settings.
     apply_baking_settings()
     apply_mesh_map_quality(baking_settings)
-    bpy.context.scene.render.bake.margin = baking_settings.uv_padding
+    bpy.context.scene.render.bake.margin = get_bake_margin()
 
     # Trigger the baking process.
     match mesh_map_type:
@@ -373,6 +523,10 @@ def get_batch_bake_mesh_maps():
     baking_settings = bpy.context.scene.rymat_baking_settings
     mesh_maps_to_bake = []
 
+    # World space normals are baked first so they can guide denoising for the mesh maps baked after them.
+    if baking_settings.bake_world_space_normals:
+        mesh_maps_to_bake.append('WORLD_SPACE_NORMALS')
+
     if baking_settings.bake_ambient_occlusion:
         mesh_maps_to_bake.append('AMBIENT_OCCLUSION')
 
@@ -385,11 +539,89 @@ def get_batch_bake_mesh_maps():
     if baking_settings.bake_normals:
         mesh_maps_to_bake.append('NORMALS')
 
-    if baking_settings.bake_world_space_normals:
-        mesh_maps_to_bake.append('WORLD_SPACE_NORMALS')
-
     return mesh_maps_to_bake
 
+def restore_mesh_map(obj, mesh_map_type, filepath):
+    '''Loads a mesh map baked in a previous (interrupted) batch bake for the provided object. Returns true if the mesh map was restored.'''
+    if not os.path.exists(filepath):
+        return False
+
+    # Images in the blend data may be from a bake older than the file baked before the batch bake was interrupted, reload them.
+    mesh_map_name = get_meshmap_name(obj.name, mesh_map_type)
+    mesh_map_image = bpy.data.images.get(mesh_map_name)
+    if mesh_map_image and bpy.path.abspath(mesh_map_image.filepath) == filepath:
+        mesh_map_image.reload()
+        return True
+    if mesh_map_image:
+        bpy.data.images.remove(mesh_map_image)
+
+    mesh_map_image = bpy.data.images.load(filepath, check_existing=False)
+    mesh_map_image.name = mesh_map_name
+    mesh_map_image.colorspace_settings.name = 'Non-Color'
+    mesh_map_image.use_fake_user = True
+    debug_logging.log("Restored mesh map from the bake journal: {0}".format(mesh_map_name))
+    return True
+
+def get_batch_bake_journal_settings(mesh_map_types):
+    '''Returns the settings a batch bake journal is valid for, a batch bake can only be resumed if these settings haven't changed.
+    Objects aren't included, so objects that were skipped or failed to bake can be resumed on their own.'''
+    baking_settings = bpy.context.scene.rymat_baking_settings
+    return [
+        mesh_map_types,
+        tss.get_texture_width(),
+        tss.get_texture_height(),
+        baking_settings.mesh_map_quality,
+        baking_settings.mesh_map_upscaling_multiplier,
+        baking_settings.uv_padding,
+        baking_settings.denoise_mesh_maps
+    ]
+
+def get_paired_high_poly_object(low_poly_object):
+    '''Returns the high poly object paired with the provided low poly object by name, using the high poly suffix from baking settings.'''
+    high_poly_suffix = bpy.context.scene.rymat_baking_settings.high_poly_suffix
+    if high_poly_suffix == "":
+        return None
+    high_poly_object = bpy.data.objects.get(low_poly_object.name + high_poly_suffix)
+    if high_poly_object and high_poly_object.type == 'MESH':
+        return high_poly_object
+    return None
+
+def get_batch_bake_objects():
+    '''Returns a list of selected mesh objects mesh maps should be baked for. Bake cages and high poly objects paired by name are excluded.'''
+    high_poly_suffix = bpy.context.scene.rymat_baking_settings.high_poly_suffix
+    objects_to_bake = []
+    for obj in bpy.context.selected_objects:
+        if obj.type != 'MESH' or obj.name.endswith("_Cage"):
+            continue
+        if high_poly_suffix != "" and obj.name.endswith(high_poly_suffix):
+            continue
+        objects_to_bake.append(obj)
+    return objects_to_bake
+
+def get_bake_material_name(mesh_map_type):
+    '''Returns the name of the premade material used to bake the specified mesh map type.'''
+    match mesh_map_type:
+        case 'NORMALS':
+            return "BakeNormals"
+
+        case 'AMBIENT_OCCLUSION':
+            return "BakeAmbientOcclusion"
+
+        case 'CURVATURE':
+            return "BakeCurvature"
+
+        case 'THICKNESS':
+            return "BakeThickness"
+
+        case 'WORLD_SPACE_NORMALS':
+            return "BakeWorldSpaceNormals"
+
+def append_mesh_map_assets(mesh_map_types):
+    '''Appends the premade materials and node groups required to bake the provided mesh map types in a single library load. They are shared by all bakes in a batch until clean_mesh_map_assets is called.'''
+    material_names = [get_bake_material_name(mesh_map_type) for mesh_map_type in mesh_map_types]
+    blender_addon_utils.append_materials(material_names)
+    debug_logging.log("Appended mesh map baking assets.", sub_process=True)
+
 def clean_mesh_map_assets():
     '''Removes all mesh map baking materials and group nodes if they exist.'''
     # Remove all mesh map materials.
@@ -404,8 +636,56 @@ def clean_mesh_map_assets():
         if mesh_map_group_node:
             bpy.data.node_groups.remove(mesh_map_group_node)
 
+def get_high_poly_bvh_tree(high_poly_object, low_poly_object):
+    '''Returns a BVH tree of the evaluated high poly object's triangles in the low poly object's local space.'''
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    high_poly_evaluated = high_poly_object.evaluated_get(depsgraph)
+    high_poly_mesh = high_poly_evaluated.to_mesh()
+    high_poly_mesh.calc_loop_triangles()
+
+    vertex_count = len(high_poly_mesh.vertices)
+    vertices = numpy.empty(vertex_count * 3, dtype=numpy.float32)
+    high_poly_mesh.vertices.foreach_get("co", vertices)
+    triangles = numpy.empty(len(high_poly_mesh.loop_triangles) * 3, dtype=numpy.int32)
+    high_poly_mesh.loop_triangles.foreach_get("vertices", triangles)
+    high_poly_evaluated.to_mesh_clear()
+
+    # Transform high poly vertices into the low poly object's local space.
+    matrix = numpy.array(low_poly_object.matrix_world.inverted() @ high_poly_object.matrix_world, dtype=numpy.float32)
+    vertices = vertices.reshape(vertex_count, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    return BVHTree.FromPolygons(vertices.tolist(), triangles.reshape(-1, 3).tolist())
+
+def get_cage_offsets(cage_mesh, coordinates, normals, low_poly_object, high_poly_object, minimum_offset):
+    '''Returns the distance each cage vertex should be extruded along it's normal so the cage encloses the high poly object. Without a high poly object all vertices are extruded by the minimum offset.'''
+    vertex_count = len(coordinates)
+    offsets = numpy.full(vertex_count, minimum_offset, dtype=numpy.float32)
+    if high_poly_object == None or vertex_count == 0:
+        return offsets
+
+    # Cast a ray from each vertex along it's normal to find how far the high poly surface extends past the low poly surface.
+    bvh_tree = get_high_poly_bvh_tree(high_poly_object, low_poly_object)
+    max_distance = float(numpy.ptp(coordinates, axis=0).max()) * CAGE_RAY_DISTANCE_FACTOR
+    ray_cast = bvh_tree.ray_cast
+    hit_distances = numpy.zeros(vertex_count, dtype=numpy.float32)
+    for i, (origin, direction) in enumerate(zip(coordinates.tolist(), normals.tolist())):
+        distance = ray_cast(origin, direction, max_distance)[3]
+        if distance != None:
+            hit_distances[i] = distance
+    offsets += hit_distances
+
+    # Neighbouring vertices with very different offsets skew the baked result, extend each offset to it's connected vertices.
+    edge_vertices = numpy.empty(len(cage_mesh.edges) * 2, dtype=numpy.int32)
+    cage_mesh.edges.foreach_get("vertices", edge_vertices)
+    edge_vertices = edge_vertices.reshape(-1, 2)
+    smoothed_offsets = offsets.copy()
+    numpy.maximum.at(smoothed_offsets, edge_vertices[:, 0], offsets[edge_vertices[:, 1]])
+    numpy.maximum.at(smoothed_offsets, edge_vertices[:, 1], offsets[edge_vertices[:, 0]])
+
+    debug_logging.log("Computed cage offsets, {0} of {1} vertices extruded to enclose the high poly object.".format(numpy.count_nonzero(hit_distances), vertex_count))
+    return smoothed_offsets
+
 def create_baking_cage(self):
-    '''Creates a duplicate of the selected object, scaled slightly up to act as a cage object for baking high to low poly mesh map textures.'''
+    '''Creates a duplicate of the selected object, extruded along it's normals to act as a cage object for baking high to low poly mesh map textures.'''
 
     # This function requires a selected (active object), abort if there is not active object.
     active_object = bpy.context.active_object
@@ -418,7 +698,9 @@ def create_baking_cage(self):
         debug_logging.log_status("Selected object is a bake cage.", self, type='INFO')
         return
     
-    # Make a scaled up duplicate of the object to act as the base mesh.
+    # Make a duplicate of the object to act as the cage mesh.
+    # Object mode ensures edits made in edit mode are written to the mesh data before it's copied.
+    bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
     cage_object = active_object.copy()
     cage_mesh = active_object.data.copy()
     cage_object.data = cage_mesh
@@ -426,19 +708,21 @@ def create_baking_cage(self):
     bpy.context.collection.objects.link(cage_object)
     bpy.context.scene.render.bake.cage_object = cage_object
     blender_addon_utils.select_only(cage_object)
-    bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.transform.shrink_fatten(
-        value=0.01,
-        use_even_offset=False,
-        mirror=True,
-        use_proportional_edit=False,
-        proportional_edit_falloff='SMOOTH', 
-        proportional_size=1,
-        use_proportional_connected=False, 
-        use_proportional_projected=False, 
-        snap=False
-    )
+
+    # Extrude all cage vertices along their normals so the cage encloses the high poly object.
+    vertex_count = len(cage_mesh.vertices)
+    coordinates = numpy.empty(vertex_count * 3, dtype=numpy.float32)
+    normals = numpy.empty(vertex_count * 3, dtype=numpy.float32)
+    cage_mesh.vertices.foreach_get("co", coordinates)
+    cage_mesh.vertex_normals.foreach_get("vector", normals)
+    coordinates = coordinates.reshape(vertex_count, 3)
+    normals = normals.reshape(vertex_count, 3)
+
+    baking_settings = bpy.context.scene.rymat_baking_settings
+    offsets = get_cage_offsets(cage_mesh, coordinates, normals, active_object, baking_settings.high_poly_object, baking_settings.cage_upscale)
+    coordinates += normals * offsets[:, None]
+    cage_mesh.vertices.foreach_set("co", coordinates.ravel())
+    cage_mesh.update()
 
     # Change viewport shading so users can see the applied cage material.
     bpy.context.space_data.shading.color_type = 'MATERIAL'
@@ -452,9 +736,6 @@ def create_baking_cage(self):
     if not cage_material:
         cage_material = blender_addon_utils.append_material("Cage Material")
 
-    # Must be in object mode to make changes to the material.
-    bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
-
     # Remove all material slots on the cage object.
     cage_object.data.materials.clear()
     cage_object.data.materials.append(cage_material)
@@ -501,6 +782,18 @@ class RYMAT_baking_settings(bpy.types.PropertyGroup):
         description="The high poly object (must be a mesh) from which mesh detail will be baked to texture maps. The high poly mesh should generally be overlapped by your low poly mesh before starting baking. You do not need to provide a high poly mesh for baking texture maps"
     )
 
+    bake_selected_objects: BoolProperty(
+        name="Bake Selected Objects",
+        description="If on, mesh maps are baked for all selected mesh objects in a single batch instead of only the active object. Each object is baked using the high poly object and cage object matching it's name",
+        default=False
+    )
+
+    high_poly_suffix: StringProperty(
+        name="High Poly Suffix",
+        description="When baking selected objects, each object is paired with the high poly object named after it with this suffix (e.g. 'Crate' and 'Crate_high'). Leave empty to bake selected objects without high poly objects",
+        default="_high"
+    )
+
     mesh_map_anti_aliasing: PointerProperty(
         type=RYMAT_mesh_map_anti_aliasing, 
         name="Mesh Map Anti Aliasing"
@@ -529,7 +822,7 @@ class RYMAT_baking_settings(bpy.types.PropertyGroup):
 
     cage_upscale: FloatProperty(
         name="Cage Upscale",
-        description="Upscales a duplicate of the low poly mesh by the specified amount to use as a cage for mesh map baking", 
+        description="Minimum distance a duplicate of the low poly mesh is extruded along it's normals to create a cage for mesh map baking. When a high poly object is defined, vertices are extruded further where required for the cage to enclose the high poly object", 
         default=0.01,
         min=0.0,
         soft_max=0.1,
@@ -537,6 +830,27 @@ class RYMAT_baking_settings(bpy.types.PropertyGroup):
         precision=4
     )
 
+    mesh_map_resample_filter: EnumProperty(
+        items=image_utilities.RESAMPLE_FILTERS,
+        name="Resample Filter",
+        description="Filter used when scaling anti-aliased or upscaled mesh maps to the texture set resolution",
+        default='BOX'
+    )
+
+    denoise_mesh_maps: BoolProperty(
+        name="Denoise Mesh Maps",
+        description="If on, ambient occlusion, curvature and thickness mesh maps are denoised after baking with an edge-aware filter guided by the world space normal mesh map. Denoising allows lower mesh map quality settings (fewer samples) to produce results close to higher quality settings",
+        default=False
+    )
+
+    denoise_radius: IntProperty(
+        name="Denoise Radius",
+        description="Radius in pixels of the filter used to denoise mesh maps. Higher values remove more noise, but can blur small details",
+        default=3,
+        min=1,
+        max=8
+    )
+
     uv_padding: IntProperty(
         name="UV Padding",
         description="Amount of padding in pixels to extend the baked data out of UV islands. This ensures there is no visible seams between UV splits",
@@ -545,6 +859,13 @@ class RYMAT_baking_settings(bpy.types.PropertyGroup):
         max=64
     )
 
+    uv_padding_method: EnumProperty(
+        items=UV_PADDING_METHODS,
+        name="UV Padding Method",
+        description="Method used to extend baked data out of UV islands",
+        default='DILATE'
+    )
+
     bake_normals: BoolProperty(
         name="Bake Normal", 
         description="Toggle for baking normal maps for baking as part of the batch baking operator", 
@@ -666,18 +987,39 @@ class RYMAT_baking_settings(bpy.types.PropertyGroup):
 class RYMAT_OT_batch_bake(Operator):
     bl_idname = "rymat.batch_bake"
     bl_label = "Batch Bake"
-    bl_description = "Bakes all checked mesh texture maps in succession. Note that this function can take a few minutes, especially on slower computers, or when using CPU for rendering. Textures are created at the defined texture set resolution"
+    bl_description = "Bakes all checked mesh texture maps in succession for the active object, or for all selected objects if baking selected objects is on. Note that this function can take a few minutes, especially on slower computers, or when using CPU for rendering. Textures are created at the defined texture set resolution"
 
     _timer = None
     _temp_bake_material_name = ""
     _mesh_map_image_index = 0
-    _mesh_map_group_node_name = ""
     _mesh_maps_to_bake = []
     _baked_mesh_map_count = 0
     _original_material_names = []
     _original_render_engine = None
     _start_bake_time = 0
     _exclude_layer_collections = []
+    _objects_to_bake = []
+    _object_index = 0
+    _baked_object_names = []
+    _skipped_object_names = []
+    _total_baked_mesh_map_count = 0
+    _shared_mesh_map_count = 0
+    _shared_mesh_maps = {}
+    _mesh_data_hashes = {}
+    _object_bake_failed = False
+    _use_journal = False
+    _resumed_mesh_map_count = 0
+    _original_active_object_name = ""
+    _original_selected_object_names = []
+    _original_high_poly_object_name = ""
+    _original_cage_object_name = ""
+
+    resume: BoolProperty(
+        name="Resume",
+        description="Continue an interrupted batch bake from the bake journal, skipping mesh maps that were already baked",
+        default=False,
+        options={'SKIP_SAVE'}
+    )
 
     # Users must have an object selected to call this operator.
     @ classmethod
@@ -693,58 +1035,20 @@ class RYMAT_OT_batch_bake(Operator):
         if event.type == 'TIMER':
             # If a mesh map isn't actively baking, move to the next mesh map, or end the function.
             if not bpy.app.is_job_running('OBJECT_BAKE'):
-                mesh_map_type = self._mesh_maps_to_bake[self._baked_mesh_map_count]
-                mesh_map_name = get_meshmap_name(bpy.context.active_object.name, mesh_map_type)
-                mesh_map_image = bpy.data.images.get(mesh_map_name)
-                if mesh_map_image:
-                    # Scale baked textures down to apply anti-aliasing.
-                    baking_settings = bpy.context.scene.rymat_baking_settings
-                    match getattr(baking_settings.mesh_map_anti_aliasing, mesh_map_type.lower() + "_anti_aliasing", '1X'):
-                        case '2X':
-                            mesh_map_image.scale(int(mesh_map_image.size[0] * 0.5), int(mesh_map_image.size[1] * 0.5))
-                        case '4X':                            
-                            mesh_map_image.scale(int(mesh_map_image.size[0] * 0.25), int(mesh_map_image.size[1] * 0.25))
-
-                    # Scale baked textures up to match the texture set resolution size.
-                    match baking_settings.mesh_map_upscaling_multiplier:
-                        case '1_75X':
-                            mesh_map_image.scale(int(round(mesh_map_image.size[0] * 1.333333)), int(round(mesh_map_image.size[1] * 1.333333)))
-                        case '2X':
-                            mesh_map_image.scale(int(mesh_map_image.size[0] * 2), int(mesh_map_image.size[1] * 2))
-
-                    # Save the mesh map to disk.
-                    mesh_map_image.save(quality=0)
-
-                # Log mesh map baking completion.
-                mesh_map_type = mesh_map_type.replace('_', ' ')
-                mesh_map_type = blender_addon_utils.capitalize_by_space(mesh_map_type)
-                debug_logging.log("Finished baking: {0}".format(mesh_map_type))
-                self._baked_mesh_map_count += 1
-
-                # Remove temporary bake materials and node groups.
-                temp_bake_material = bpy.data.materials.get(self._temp_bake_material_name)
-                if temp_bake_material:
-                    bpy.data.materials.remove(temp_bake_material)
-
-                bake_node_group = bpy.data.node_groups.get(self._mesh_map_group_node_name)
-                if bake_node_group:
-                    bpy.data.node_groups.remove(bake_node_group)
-
-                # Bake the next mesh map.
-                if self._baked_mesh_map_count < len(self._mesh_maps_to_bake):
-                    mesh_map_type = self._mesh_maps_to_bake[self._baked_mesh_map_count]
-                    baked_successfully = bake_mesh_map(mesh_map_type, bpy.context.active_object.name, self)
-
-                    # If there is an error with baking a mesh map, finish the operation.
-                    if baked_successfully == False:
-                        debug_logging.log("Baking error.")
+                self.finish_mesh_map_bake(context)
+
+                # Move to the next object once all mesh maps are baked for the current object.
+                # Finish the batch baking process if mesh maps are baked for all objects.
+                if not self.start_next_mesh_map_bake(context):
+                    self.finish_object_bake(context, apply_baked_mesh_maps=not self._object_bake_failed)
+                    if self._object_bake_failed:
+                        self._skipped_object_names.append(bpy.context.active_object.name)
+                    else:
+                        self._baked_object_names.append(bpy.context.active_object.name)
+                    self._object_index += 1
+                    if not self.start_next_object_bake(context):
                         self.finish(context)
                         return {'FINISHED'}
-
-                # Finish the batch baking process if all mesh maps are baked.
-                else:
-                    self.finish(context)
-                    return {'FINISHED'}
                 
         return {'PASS_THROUGH'}
 
@@ -767,30 +1071,58 @@ class RYMAT_OT_batch_bake(Operator):
             )
             return {'CANCELLED'}
 
-        # To help users avoid losing data to crashes that can occur when baking in Blender,
-        # save the blend file, and all textures before starting a bake.
-        bpy.ops.wm.save_mainfile()
-        image_utilities.save_all_textures()
+        # To avoid errors don't start baking if there is already a bake job running.
+        if bpy.app.is_job_running('OBJECT_BAKE') == True:
+            debug_logging.log_status("Bake job already in process.", self)
+            return {'CANCELLED'}
+
+        # Get a list of mesh maps to bake.
+        self._mesh_maps_to_bake = get_batch_bake_mesh_maps()
+        if len(self._mesh_maps_to_bake) <= 0:
+            debug_logging.log_status("No mesh maps checked for baking.", self, type='INFO')
+            return {'FINISHED'}
+
+        # Get a list of objects to bake.
+        baking_settings = bpy.context.scene.rymat_baking_settings
+        if baking_settings.bake_selected_objects:
+            self._objects_to_bake = [obj.name for obj in get_batch_bake_objects()]
+            if len(self._objects_to_bake) <= 0:
+                debug_logging.log_status("No selected mesh objects to bake.", self, type='INFO')
+                return {'FINISHED'}
+
+        else:
+            # Verify the active object can be baked to.
+            if blender_addon_utils.verify_bake_object(self) == False:
+                return {'CANCELLED'}
+            self._objects_to_bake = [bpy.context.active_object.name]
 
-        # Remove lingering mesh map assets if they exist.
+        # To help users avoid losing data to crashes that can occur when baking in Blender,
+        # save textures used by the objects being baked, and optionally the blend file, once before starting to bake all objects.
+        materials = set()
+        for object_name in self._objects_to_bake:
+            obj = bpy.data.objects.get(object_name)
+            if obj:
+                materials.update(material_slot.material for material_slot in obj.material_slots if material_slot.material)
+        blender_addon_utils.save_material_images(materials)
+
+        addon_preferences = bpy.context.preferences.addons[preferences.ADDON_NAME].preferences
+        if addon_preferences.save_blend_before_baking:
+            bpy.ops.wm.save_mainfile()
+
+        # Remove lingering mesh map assets if they exist, then append all assets required to bake the checked mesh maps once for all objects.
         clean_mesh_map_assets()
+        append_mesh_map_assets(self._mesh_maps_to_bake)
+
+        # Object UVs may have changed since the last bake, clear cached UV coverage masks.
+        image_utilities.clear_uv_coverage_cache()
 
         # Set the viewport shading mode to 'Material' 
         # this helps bake materials slightly faster while still being able to preview material changes.
         bpy.context.space_data.shading.type = 'MATERIAL'
-
-        # Verify the active object can be baked to.
-        if blender_addon_utils.verify_bake_object(self) == False:
-            return {'CANCELLED'}
-
-        # To avoid errors don't start baking if there is already a bake job running.
-        if bpy.app.is_job_running('OBJECT_BAKE') == True:
-            debug_logging.log_status("Bake job already in process.", self)
-            return {'CANCELLED'}
         
         # Pause auto-updates for this add-on while baking.
         bpy.context.scene.pause_auto_updates = True
-        debug_logging.log("Starting mesh map baking...", sub_process=False)
+        debug_logging.log("Starting mesh map baking for {0} object(s)...".format(len(self._objects_to_bake)), sub_process=False)
 
         # Record the starting time before baking.
         self._start_bake_time = time.time()
@@ -798,29 +1130,174 @@ class RYMAT_OT_batch_bake(Operator):
         # Ensure we start this operation in object mode.
         bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
 
-        # Get a list of mesh maps to bake.
-        self._mesh_maps_to_bake.clear()
-        self._mesh_maps_to_bake = get_batch_bake_mesh_maps()
-        if len(self._mesh_maps_to_bake) <= 0:
-            debug_logging.log_status("No mesh maps checked for baking.", self, type='INFO')
+        # Remember the selection, and high poly and cage objects so they can be restored after baking multiple objects.
+        self._original_active_object_name = bpy.context.active_object.name
+        self._original_selected_object_names = [obj.name for obj in bpy.context.selected_objects]
+        self._original_high_poly_object_name = baking_settings.high_poly_object.name if baking_settings.high_poly_object else ""
+        cage_object = bpy.context.scene.render.bake.cage_object
+        self._original_cage_object_name = cage_object.name if cage_object else ""
+
+        # Set render engine to Cycles (required for baking) and remember the original render engine so we can reset it after baking.
+        self._original_render_engine = bpy.context.scene.render.engine
+        bpy.context.scene.render.engine = 'CYCLES'
+
+        # Start baking mesh maps for the first object that can be baked.
+        self._object_index = 0
+        self._baked_object_names = []
+        self._skipped_object_names = []
+        self._total_baked_mesh_map_count = 0
+        self._shared_mesh_map_count = 0
+        self._shared_mesh_maps = {}
+        self._mesh_data_hashes = {}
+        self._resumed_mesh_map_count = 0
+
+        # Record progress to a journal so the batch bake can be resumed if it's interrupted.
+        addon_preferences = bpy.context.preferences.addons[preferences.ADDON_NAME].preferences
+        self._use_journal = addon_preferences.bake_journal
+        if self._use_journal:
+            bake_journal.start_journal('BATCH_BAKE', get_batch_bake_journal_settings(self._mesh_maps_to_bake), resume=self.resume)
+
+        if not self.start_next_object_bake(context):
+            if baking_settings.bake_selected_objects:
+                self.finish(context)
+            else:
+                self.restore_baking_context(context)
             return {'FINISHED'}
 
+        # Add a timer to provide periodic timer events.
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def finish_mesh_map_bake(self, context):
+        '''Post-processes and saves the mesh map that finished baking.'''
+        mesh_map_type = self._mesh_maps_to_bake[self._baked_mesh_map_count]
+        mesh_map_name = get_meshmap_name(bpy.context.active_object.name, mesh_map_type)
+        mesh_map_image = bpy.data.images.get(mesh_map_name)
+        if mesh_map_image:
+            # Resample the baked texture to the texture set resolution in a single pass, denoise it and pad it's UV islands.
+            # This scales down supersampled (anti-aliased) bakes, and scales up bakes made at a lower resolution for upscaling.
+            baking_settings = bpy.context.scene.rymat_baking_settings
+            resample_mesh_map(mesh_map_image, bpy.context.active_object, baking_settings, mesh_map_type)
+
+            # Save the mesh map to disk, and record it in the bake journal.
+            mesh_map_image.save(quality=0)
+            self._total_baked_mesh_map_count += 1
+            if self._use_journal:
+                job_key = "{0}/{1}".format(bpy.context.active_object.name, mesh_map_type)
+                bake_journal.record_job('BATCH_BAKE', job_key, bpy.path.abspath(mesh_map_image.filepath))
+
+            # Tag the mesh map with the mesh it was baked from so other objects using the same mesh can share it.
+            share_key = get_mesh_map_share_key(bpy.context.active_object, mesh_map_type, self._mesh_data_hashes)
+            if share_key:
+                mesh_map_image["rymat_mesh_map_key"] = share_key
+                self._shared_mesh_maps[share_key] = mesh_map_image.name
+            elif "rymat_mesh_map_key" in mesh_map_image:
+                del mesh_map_image["rymat_mesh_map_key"]
+
+            # The object now has its own mesh map, stop using a mesh map shared from another object.
+            shared_property = get_shared_meshmap_property(mesh_map_type)
+            if shared_property in bpy.context.active_object:
+                del bpy.context.active_object[shared_property]
+
+        # Log mesh map baking completion.
+        # Bake materials are kept for the following bakes, they are removed once all objects are baked.
+        mesh_map_type = mesh_map_type.replace('_', ' ')
+        mesh_map_type = blender_addon_utils.capitalize_by_space(mesh_map_type)
+        debug_logging.log("Finished baking: {0}".format(mesh_map_type))
+        self._baked_mesh_map_count += 1
+
+    def start_next_mesh_map_bake(self, context):
+        '''Starts baking the next mesh map for the active object. Mesh maps already baked in this batch for another object using the same mesh are shared instead of baked again. Returns false if there are no more mesh maps to bake for the object.'''
+        active_object = bpy.context.active_object
+        while self._baked_mesh_map_count < len(self._mesh_maps_to_bake):
+            mesh_map_type = self._mesh_maps_to_bake[self._baked_mesh_map_count]
+
+            # Share mesh maps between objects using the same mesh, removing the object's own outdated mesh map if it has one.
+            share_key = get_mesh_map_share_key(active_object, mesh_map_type, self._mesh_data_hashes)
+            shared_image_name = self._shared_mesh_maps.get(share_key, "")
+            if shared_image_name != "" and bpy.data.images.get(shared_image_name):
+                outdated_image = get_meshmap_image(active_object.name, mesh_map_type)
+                if outdated_image and outdated_image.name != shared_image_name:
+                    bpy.data.images.remove(outdated_image)
+                active_object[get_shared_meshmap_property(mesh_map_type)] = {"image": shared_image_name, "key": share_key}
+                debug_logging.log("Sharing mesh map {0} with {1}.".format(shared_image_name, active_object.name))
+                self._shared_mesh_map_count += 1
+                self._baked_mesh_map_count += 1
+                continue
+
+            # When resuming a batch bake, use mesh maps that were baked before the batch bake was interrupted.
+            if self._use_journal and self.resume:
+                job_key = "{0}/{1}".format(active_object.name, mesh_map_type)
+                cached_filepath = bake_journal.get_completed_job('BATCH_BAKE', job_key)
+                if cached_filepath and restore_mesh_map(active_object, mesh_map_type, cached_filepath):
+                    if share_key:
+                        restored_image = get_meshmap_image(active_object.name, mesh_map_type)
+                        restored_image["rymat_mesh_map_key"] = share_key
+                        self._shared_mesh_maps[share_key] = restored_image.name
+                    self._resumed_mesh_map_count += 1
+                    self._baked_mesh_map_count += 1
+                    continue
+
+            baked_successfully = bake_mesh_map(mesh_map_type, active_object.name, self)
+            if baked_successfully == False:
+                debug_logging.log("Baking error.")
+                self._object_bake_failed = True
+                self._baked_mesh_map_count = len(self._mesh_maps_to_bake)
+                return False
+            return True
+        return False
+
+    def start_next_object_bake(self, context):
+        '''Starts baking mesh maps for the next object that can be baked. Objects that can't be baked are skipped. Returns false if there are no more objects to bake.'''
+        while self._object_index < len(self._objects_to_bake):
+            if self.start_object_bake(context, self._objects_to_bake[self._object_index]):
+                if self.start_next_mesh_map_bake(context):
+                    return True
+
+                # All mesh maps for the object were shared from other objects, or failed to bake.
+                self.finish_object_bake(context, apply_baked_mesh_maps=not self._object_bake_failed)
+                if self._object_bake_failed:
+                    self._skipped_object_names.append(self._objects_to_bake[self._object_index])
+                else:
+                    self._baked_object_names.append(self._objects_to_bake[self._object_index])
+                self._object_index += 1
+                continue
+
+            # Baking multiple objects continues past objects that can't be baked, they are listed in the summary report.
+            self._skipped_object_names.append(self._objects_to_bake[self._object_index])
+            if not bpy.context.scene.rymat_baking_settings.bake_selected_objects:
+                return False
+            self._object_index += 1
+        return False
+
+    def start_object_bake(self, context, object_name):
+        '''Sets up the provided object for baking. Returns true if the object can be baked.'''
+        low_poly_object = bpy.data.objects.get(object_name)
+        if not low_poly_object:
+            return False
+
         baking_settings = bpy.context.scene.rymat_baking_settings
-        low_poly_object = bpy.context.active_object
+        blender_addon_utils.select_only(low_poly_object)
+
+        # When only baking the active object, it's verified before baking starts.
+        if baking_settings.bake_selected_objects and blender_addon_utils.verify_bake_object(self) == False:
+            return False
+
+        # When baking multiple objects, pair each object with a high poly object and cage object by name.
+        if baking_settings.bake_selected_objects:
+            baking_settings.high_poly_object = get_paired_high_poly_object(low_poly_object)
+            bpy.context.scene.render.bake.cage_object = bpy.data.objects.get(low_poly_object.name + "_Cage")
+
+        self._baked_mesh_map_count = 0
+        self._exclude_layer_collections.clear()
         high_poly_object = baking_settings.high_poly_object
 
         # If a high poly object is specified...
         if high_poly_object:
 
-            # Having a high poly object in an excluded layer collection causes baking errors. Make sure all layer collections a high poly object is in is not excluded from the view layer.
-            self._exclude_layer_collections.clear()
-            view_layer_collections = bpy.context.view_layer.layer_collection.children
-            user_collections = high_poly_object.users_collection
-            for collection in user_collections:
-                layer_collection = view_layer_collections.get(collection.name)
-                self._exclude_layer_collections.append(layer_collection.exclude)
-                layer_collection.exclude = False
-
             # Adjust settings based on the selected cage mode.
             match baking_settings.cage_mode:
                 case 'NO_CAGE':
@@ -832,8 +1309,8 @@ class RYMAT_OT_batch_bake(Operator):
                     # If a cage object isn't defined, ask the user to define one.
                     cage_object = bpy.context.scene.render.bake.cage_object
                     if cage_object == None:
-                        debug_logging.log_status("No cage object, please define a cage object.", self, type='INFO')
-                        return {'FINISHED'}
+                        debug_logging.log_status("No cage object for {0}, please define a cage object.".format(low_poly_object.name), self, type='INFO')
+                        return False
                         
                     # Abort if both a cage and high poly object is defined, 
                     # but the vertex count between the low poly and cage objects don't match.
@@ -844,7 +1321,15 @@ class RYMAT_OT_batch_bake(Operator):
                         debug_logging.log("High poly object vertex count: {0}".format(low_poly_object_vertex_count))
                         if len(cage_object.data.vertices) != len(low_poly_object.data.vertices):
                             debug_logging.log_status("Vertex count for low poly and cage object must match.", self, type='ERROR')
-                            return {'FINISHED'}
+                            return False
+
+            # Having a high poly object in an excluded layer collection causes baking errors. Make sure all layer collections a high poly object is in is not excluded from the view layer.
+            view_layer_collections = bpy.context.view_layer.layer_collection.children
+            user_collections = high_poly_object.users_collection
+            for collection in user_collections:
+                layer_collection = view_layer_collections.get(collection.name)
+                self._exclude_layer_collections.append(layer_collection.exclude)
+                layer_collection.exclude = False
 
             # Ensure the high poly object is visible for rendering.
             high_poly_object.hide_set(False)
@@ -864,53 +1349,81 @@ class RYMAT_OT_batch_bake(Operator):
                 else:
                     self._original_material_names.append("")
 
-        # Set render engine to Cycles (required for baking) and remember the original render engine so we can reset it after baking.
-        self._original_render_engine = bpy.context.scene.render.engine
-        bpy.context.scene.render.engine = 'CYCLES'
-
-        # Start baking the mesh map.
-        baked_successfully = bake_mesh_map(self._mesh_maps_to_bake[0], low_poly_object.name, self)    
-        if baked_successfully == False:
-            self.finish(context)
-            return {'FINISHED'}
-
-        # Add a timer to provide periodic timer events.
-        wm = context.window_manager
-        self._timer = wm.event_timer_add(0.5, window=context.window)
-        wm.modal_handler_add(self)
-
-        return {'RUNNING_MODAL'}
+        debug_logging.log("Baking mesh maps for: {0}".format(low_poly_object.name))
+        self._object_bake_failed = False
+        return True
 
-    def cancel(self, context):
-        # Remove the timer if it exists, it's no longer needed.
-        if self._timer:
-            wm = context.window_manager
-            wm.event_timer_remove(self._timer)
+    def finish_object_bake(self, context, apply_baked_mesh_maps=True):
+        '''Restores the materials and high poly object visibility for the object being baked, and applies it's baked mesh maps.'''
 
-        # High the high poly object, and re-exclude layer collections the high poly object belongs to.
+        # Hide the high poly object, and re-exclude layer collections the high poly object belongs to.
         high_poly_object = bpy.context.scene.rymat_baking_settings.high_poly_object
         if high_poly_object:
             high_poly_object.hide_set(True)
             high_poly_object.hide_render = True
-            
+
             view_layer_collections = bpy.context.view_layer.layer_collection.children
             user_collections = high_poly_object.users_collection
             for i, collection in enumerate(user_collections):
-                layer_collection = view_layer_collections.get(collection.name)
-                layer_collection.exclude = self._exclude_layer_collections[i]
+                if i < len(self._exclude_layer_collections):
+                    layer_collection = view_layer_collections.get(collection.name)
+                    layer_collection.exclude = self._exclude_layer_collections[i]
+        self._exclude_layer_collections.clear()
 
         # Re-apply the materials that were originally on the object and delete the temporary bake material.
         for i in range(0, len(self._original_material_names)):
             material = bpy.data.materials.get(self._original_material_names[i])
             if material:
                 bpy.context.object.material_slots[i].material = material
+        self._original_material_names.clear()
+
+        # Apply mesh maps to the existing material, mesh maps aren't applied for objects that failed to bake.
+        # The layer stack only reflects the originally active object, sync it to each object baked when baking multiple objects.
+        if apply_baked_mesh_maps:
+            if bpy.context.scene.rymat_baking_settings.bake_selected_objects:
+                material_layers.refresh_layer_stack()
+            material_layers.apply_mesh_maps()
+
+    def restore_baking_context(self, context):
+        '''Restores the render engine, selection and high poly and cage objects changed while baking.'''
+
+        # Remove the bake materials and node groups shared by all bakes.
+        clean_mesh_map_assets()
 
         # Reset the render engine.
         bpy.context.scene.render.engine = self._original_render_engine
 
-        # Unpause auto updates, unmark baking mesh maps toggle.
+        # Restore high poly and cage objects paired with each object when baking multiple objects, and the original selection.
+        if bpy.context.scene.rymat_baking_settings.bake_selected_objects:
+            bpy.context.scene.rymat_baking_settings.high_poly_object = bpy.data.objects.get(self._original_high_poly_object_name)
+            bpy.context.scene.render.bake.cage_object = bpy.data.objects.get(self._original_cage_object_name)
+
+            original_active_object = bpy.data.objects.get(self._original_active_object_name)
+            if original_active_object:
+                blender_addon_utils.select_only(original_active_object)
+            for object_name in self._original_selected_object_names:
+                obj = bpy.data.objects.get(object_name)
+                if obj:
+                    obj.select_set(True)
+            material_layers.refresh_layer_stack()
+
+        # Select only the low poly object.
+        else:
+            low_poly_object = bpy.context.active_object
+            if low_poly_object:
+                blender_addon_utils.select_only(low_poly_object)
+
+        # Unpause auto updates.
         bpy.context.scene.pause_auto_updates = False
 
+    def cancel(self, context):
+        # Remove the timer if it exists, it's no longer needed.
+        if self._timer:
+            wm = context.window_manager
+            wm.event_timer_remove(self._timer)
+
+        self.finish_object_bake(context, apply_baked_mesh_maps=False)
+        self.restore_baking_context(context)
         debug_logging.log_status("Baking mesh map was manually cancelled.", self, 'INFO')
 
     def finish(self, context):
@@ -919,42 +1432,33 @@ class RYMAT_OT_batch_bake(Operator):
             wm = context.window_manager
             wm.event_timer_remove(self._timer)
 
-        # High the high poly object, and re-exclude layer collections the high poly object belongs to.
-        high_poly_object = bpy.context.scene.rymat_baking_settings.high_poly_object
-        if high_poly_object:
-            high_poly_object.hide_set(True)
-            high_poly_object.hide_render = True
-
-            view_layer_collections = bpy.context.view_layer.layer_collection.children
-            user_collections = high_poly_object.users_collection
-            for i, collection in enumerate(user_collections):
-                layer_collection = view_layer_collections.get(collection.name)
-                layer_collection.exclude = self._exclude_layer_collections[i]
-
-        # Re-apply the materials that were originally on the object.
-        for i in range(0, len(self._original_material_names)):
-            material = bpy.data.materials.get(self._original_material_names[i])
-            if material:
-                bpy.context.object.material_slots[i].material = material
+        self.restore_baking_context(context)
 
-        # Select only the low poly object.
-        low_poly_object = bpy.context.active_object
-        if low_poly_object:
-            blender_addon_utils.select_only(low_poly_object)
-
-        # Reset the render engine.
-        bpy.context.scene.render.engine = self._original_render_engine
-
-        # Apply mesh maps to the existing material.
-        material_layers.apply_mesh_maps()
-
-        # Unpause auto updates, mark baking mesh maps as complete.
-        bpy.context.scene.pause_auto_updates = False
+        # The batch bake completed, it only needs to be resumed for objects that were skipped or failed to bake.
+        if self._use_journal:
+            if len(self._skipped_object_names) > 0:
+                baked_job_keys = ["{0}/{1}".format(object_name, mesh_map_type) for object_name in self._baked_object_names for mesh_map_type in self._mesh_maps_to_bake]
+                bake_journal.remove_jobs('BATCH_BAKE', baked_job_keys)
+            else:
+                bake_journal.delete_journal('BATCH_BAKE')
 
-        # Log the completion of baking mesh maps.
+        # Log a summary of the baked mesh maps and objects.
         end_bake_time = time.time()
         total_bake_time = end_bake_time - self._start_bake_time
-        debug_logging.log_status("Baking mesh map(s) completed, total bake time: {0} seconds.".format(round(total_bake_time), 1), self, 'INFO')
+        summary = "Baking mesh map(s) completed, baked {0} mesh map(s) for {1} object(s), total bake time: {2} seconds.".format(
+            self._total_baked_mesh_map_count,
+            len(self._baked_object_names),
+            round(total_bake_time, 1)
+        )
+        if self._resumed_mesh_map_count > 0:
+            summary += " Resumed {0} mesh map(s) baked before the batch bake was interrupted.".format(self._resumed_mesh_map_count)
+        if self._shared_mesh_map_count > 0:
+            summary += " Shared {0} mesh map(s) between objects using the same mesh.".format(self._shared_mesh_map_count)
+        if len(self._skipped_object_names) > 0:
+            summary += " Skipped {0} object(s): {1}".format(len(self._skipped_object_names), ", ".join(self._skipped_object_names))
+            debug_logging.log_status(summary, self, 'WARNING')
+        else:
+            debug_logging.log_status(summary, self, 'INFO')
 
 class RYMAT_OT_set_mesh_map_folder(Operator):
     bl_idname = "rymat.set_mesh_map_folder"
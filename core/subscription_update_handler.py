@@ -100,21 +100,21 @@ def on_active_material_name_changed():
 
     previous_material_name = bpy.types.Scene.previous_active_material_name
     active_material = bpy.context.active_object.active_material
-    layer_count = material_layers.count_layers(active_material)
+    layer_ids = material_layers.get_layer_ids(active_material)
 
     # Rename all layer group nodes related to the renamed material.
-    for i in range(0, layer_count):
-        layer_node_tree = bpy.data.node_groups.get("{0}_{1}".format(previous_material_name, i))
+    for layer_id in layer_ids:
+        layer_node_tree = bpy.data.node_groups.get(material_layers.format_layer_group_node_name(previous_material_name, layer_id))
         if layer_node_tree:
-            layer_node_tree.name = material_layers.format_layer_group_node_name(active_material.name, i)
+            layer_node_tree.name = material_layers.format_layer_group_node_name(active_material.name, layer_id)
 
         # Rename all mask group nodes related to the renamed material.
-        mask_count = layer_masks.count_masks(i, material_name=previous_material_name)
-        for c in range(0, mask_count):
-            mask_node_name = layer_masks.format_mask_name(i, c, previous_material_name)
+        mask_ids = layer_masks.read_mask_ids(layer_node_tree, layer_id, previous_material_name)
+        for mask_id in mask_ids:
+            mask_node_name = layer_masks.format_mask_name(layer_id, mask_id, previous_material_name)
             mask_node = active_material.node_tree.nodes.get(mask_node_name)
             if mask_node:
-                mask_node.name = layer_masks.format_mask_name(i, c, active_material.name)
+                mask_node.name = layer_masks.format_mask_name(layer_id, mask_id, active_material.name)
                 mask_node.node_tree.name = mask_node.name
 
     bpy.types.Scene.previous_active_material_name = active_material.name
@@ -0,0 +1,199 @@
+# This file contains a block compressor for saving exported textures directly in GPU texture formats (DDS with BC1 / BC3 / BC4 / BC5 compression).
+# Block compression runs on packed NumPy pixel buffers, all 4x4 pixel blocks in a chunk are compressed at once using vectorized NumPy operations.
+
+import os
+import struct
+import numpy
+from concurrent.futures import ThreadPoolExecutor
+from ..core import image_utilities
+from ..core import debug_logging
+
+# DXGI formats written to the DDS header for each block compression format, (linear format, sRGB format).
+BLOCK_COMPRESSION_FORMATS = {
+    'DDS_BC1': (71, 72),
+    'DDS_BC3': (77, 78),
+    'DDS_BC4': (80, 80),
+    'DDS_BC5': (83, 83)
+}
+
+# Size in bytes of a compressed 4x4 pixel block for each block compression format.
+BLOCK_SIZES = {
+    'DDS_BC1': 8,
+    'DDS_BC3': 16,
+    'DDS_BC4': 8,
+    'DDS_BC5': 16
+}
+
+# Number of 4x4 pixel blocks compressed at once, this limits the memory used by intermediate compression buffers.
+COMPRESSION_CHUNK_BLOCKS = 16384
+
+# Weights that move interpolated palette values between block endpoints (for BC4 blocks with 8 values, and BC1 blocks with 4 colors).
+BC4_PALETTE_WEIGHTS = numpy.array([0.0, 7.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0], dtype=numpy.float32) / 7.0
+BC1_PALETTE_WEIGHTS = numpy.array([0.0, 3.0, 1.0, 2.0], dtype=numpy.float32) / 3.0
+
+# DDS header flags.
+DDSD_FLAGS = 0x1 | 0x2 | 0x4 | 0x1000 | 0x20000 | 0x80000
+DDPF_FOURCC = 0x4
+DDSCAPS_FLAGS = 0x8 | 0x1000 | 0x400000
+DDS_RESOURCE_DIMENSION_TEXTURE2D = 3
+
+def is_block_compressed_format(file_format):
+    '''Returns true if the provided export file format is a block compressed GPU texture format.'''
+    return file_format in BLOCK_COMPRESSION_FORMATS
+
+def get_pixel_blocks(pixels):
+    '''Splits a (height, width, channels) pixel array into (block count, 16, channels) 4x4 pixel blocks. Images with sizes that aren't a multiple of 4 are padded by repeating edge pixels.'''
+    h, w, channels = pixels.shape
+    padded_height = (h + 3) // 4 * 4
+    padded_width = (w + 3) // 4 * 4
+    if padded_height != h or padded_width != w:
+        pixels = numpy.pad(pixels, ((0, padded_height - h), (0, padded_width - w), (0, 0)), mode='edge')
+    blocks = pixels.reshape(padded_height // 4, 4, padded_width // 4, 4, channels).swapaxes(1, 2)
+    return blocks.reshape(-1, 16, channels)
+
+def pack_block_indices(indices, bits):
+    '''Packs (block count, 16) palette indices into an unsigned integer per block, with the index of the first pixel in the lowest bits.'''
+    shifts = numpy.arange(16, dtype=numpy.uint64) * bits
+    return numpy.bitwise_or.reduce(indices.astype(numpy.uint64) << shifts, axis=1)
+
+def compress_bc4_blocks(values):
+    '''Compresses (block count, 16) single channel values in a 0 - 1 range into (block count, 8) BC4 blocks.'''
+    values = numpy.clip(values, 0.0, 1.0) * 255.0
+
+    # Use the range of values in each block as the block endpoints, the first endpoint must be larger to use 8 palette values.
+    endpoint_0 = numpy.round(values.max(axis=1)).astype(numpy.uint8)
+    endpoint_1 = numpy.round(values.min(axis=1)).astype(numpy.uint8)
+
+    # Map each value to the closest value in the block palette.
+    palette = endpoint_0[:, None].astype(numpy.float32) * (1.0 - BC4_PALETTE_WEIGHTS) + endpoint_1[:, None].astype(numpy.float32) * BC4_PALETTE_WEIGHTS
+    palette = numpy.floor(palette + 0.5)
+    palette[:, 1] = endpoint_1
+    indices = numpy.abs(values[:, :, None] - palette[:, None, :]).argmin(axis=2)
+    indices[endpoint_0 == endpoint_1] = 0
+
+    blocks = numpy.empty((values.shape[0], 8), dtype=numpy.uint8)
+    blocks[:, 0] = endpoint_0
+    blocks[:, 1] = endpoint_1
+    packed_indices = pack_block_indices(indices, 3)
+    blocks[:, 2:8] = packed_indices.astype('<u8')[:, None].view(numpy.uint8)[:, :6]
+    return blocks
+
+def encode_rgb565(colors):
+    '''Quantizes (count, 3) colors in a 0 - 1 range to 16-bit RGB 565 values.'''
+    colors = numpy.clip(colors, 0.0, 1.0)
+    r = numpy.round(colors[:, 0] * 31.0).astype(numpy.uint16)
+    g = numpy.round(colors[:, 1] * 63.0).astype(numpy.uint16)
+    b = numpy.round(colors[:, 2] * 31.0).astype(numpy.uint16)
+    return (r << 11) | (g << 5) | b
+
+def decode_rgb565(values):
+    '''Expands 16-bit RGB 565 values to (count, 3) colors in a 0 - 255 range, matching how GPUs decode block endpoints.'''
+    r = (values >> 11) & 31
+    g = (values >> 5) & 63
+    b = values & 31
+    return numpy.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=1).astype(numpy.float32)
+
+def compress_bc1_blocks(colors):
+    '''Compresses (block count, 16, 3) colors in a 0 - 1 range into (block count, 8) BC1 blocks.'''
+    colors = numpy.clip(colors, 0.0, 1.0).astype(numpy.float32)
+
+    # Find the principal axis of the colors in each block using a few power iterations on the color covariance.
+    mean = colors.mean(axis=1)
+    centered = colors - mean[:, None, :]
+    covariance = numpy.einsum('nki,nkj->nij', centered, centered)
+    axis = numpy.ones((colors.shape[0], 3), dtype=numpy.float32)
+    for i in range(4):
+        axis = numpy.einsum('nij,nj->ni', covariance, axis)
+        axis /= numpy.maximum(numpy.abs(axis).max(axis=1, keepdims=True), 1e-8)
+
+    # Use the colors with the largest and smallest projection onto the principal axis as the block endpoints.
+    projection = numpy.einsum('nki,ni->nk', centered, axis)
+    block_indices = numpy.arange(colors.shape[0])
+    endpoint_0 = encode_rgb565(colors[block_indices, projection.argmax(axis=1)])
+    endpoint_1 = encode_rgb565(colors[block_indices, projection.argmin(axis=1)])
+
+    # The first endpoint must be larger to use 4 palette colors, blocks with equal endpoints use the first palette color for all pixels.
+    swap = endpoint_0 < endpoint_1
+    endpoint_0, endpoint_1 = numpy.where(swap, endpoint_1, endpoint_0), numpy.where(swap, endpoint_0, endpoint_1)
+
+    # Map each color to the closest color in the block palette.
+    color_0 = decode_rgb565(endpoint_0)
+    color_1 = decode_rgb565(endpoint_1)
+    palette = color_0[:, None, :] * (1.0 - BC1_PALETTE_WEIGHTS[None, :, None]) + color_1[:, None, :] * BC1_PALETTE_WEIGHTS[None, :, None]
+    distances = ((colors[:, :, None, :] * 255.0 - palette[:, None, :, :]) ** 2).sum(axis=3)
+    indices = distances.argmin(axis=2)
+    indices[endpoint_0 == endpoint_1] = 0
+
+    blocks = numpy.empty((colors.shape[0], 8), dtype=numpy.uint8)
+    blocks[:, 0:2] = endpoint_0.astype('<u2')[:, None].view(numpy.uint8)
+    blocks[:, 2:4] = endpoint_1.astype('<u2')[:, None].view(numpy.uint8)
+    blocks[:, 4:8] = pack_block_indices(indices, 2).astype('<u4')[:, None].view(numpy.uint8)
+    return blocks
+
+def compress_blocks(blocks, file_format):
+    '''Compresses (block count, 16, 4) RGBA pixel blocks using the block compression format for the provided export file format.'''
+    match file_format:
+        case 'DDS_BC1':
+            return compress_bc1_blocks(blocks[:, :, :3])
+        case 'DDS_BC3':
+            return numpy.concatenate((compress_bc4_blocks(blocks[:, :, 3]), compress_bc1_blocks(blocks[:, :, :3])), axis=1)
+        case 'DDS_BC4':
+            return compress_bc4_blocks(blocks[:, :, 0])
+        case 'DDS_BC5':
+            return numpy.concatenate((compress_bc4_blocks(blocks[:, :, 0]), compress_bc4_blocks(blocks[:, :, 1])), axis=1)
+
+def compress_pixels(pixels, file_format, executor=None):
+    '''Compresses a (height, width, 4) pixel array (top row first) into block compressed data. Chunks of blocks are compressed in parallel when an executor is provided.'''
+    blocks = get_pixel_blocks(pixels)
+    chunks = [blocks[i:i + COMPRESSION_CHUNK_BLOCKS] for i in range(0, blocks.shape[0], COMPRESSION_CHUNK_BLOCKS)]
+    if executor:
+        compressed_chunks = list(executor.map(lambda chunk: compress_blocks(chunk, file_format), chunks))
+    else:
+        compressed_chunks = [compress_blocks(chunk, file_format) for chunk in chunks]
+    return numpy.concatenate(compressed_chunks, axis=0).tobytes()
+
+def get_mip_count(width, height):
+    '''Returns the number of mip levels in a full mip chain for a texture of the provided size.'''
+    return int(max(width, height)).bit_length()
+
+def get_dds_header(width, height, mip_count, file_format, srgb):
+    '''Returns the DDS file header (including the DX10 header extension) for a block compressed texture.'''
+    linear_size = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * BLOCK_SIZES[file_format]
+    header = struct.pack(
+        "<4s7I44x",
+        b"DDS ",
+        124,
+        DDSD_FLAGS,
+        height,
+        width,
+        linear_size,
+        0,
+        mip_count
+    )
+    header += struct.pack("<2I4s5I", 32, DDPF_FOURCC, b"DX10", 0, 0, 0, 0, 0)
+    header += struct.pack("<4I4x", DDSCAPS_FLAGS, 0, 0, 0)
+    dxgi_format = BLOCK_COMPRESSION_FORMATS[file_format][1 if srgb else 0]
+    header += struct.pack("<5I", dxgi_format, DDS_RESOURCE_DIMENSION_TEXTURE2D, 0, 1, 0)
+    return header
+
+def save_dds(filepath, pixels, file_format, srgb=False, generate_mipmaps=True):
+    '''Saves a (height, width, 4) pixel array (bottom row first, as stored in Blender images) to a block compressed DDS file, including a full mip chain.'''
+    height, width = pixels.shape[0], pixels.shape[1]
+    mip_count = get_mip_count(width, height) if generate_mipmaps else 1
+
+    # DDS files store the top row of pixels first.
+    mip_pixels = numpy.ascontiguousarray(pixels[::-1], dtype=numpy.float32)
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        with open(filepath, "wb") as dds_file:
+            dds_file.write(get_dds_header(width, height, mip_count, file_format, srgb))
+            for mip_level in range(mip_count):
+                dds_file.write(compress_pixels(mip_pixels, file_format, executor))
+
+                # Downsample the next mip level from the previous one, sRGB encoded colors are averaged in linear space.
+                if mip_level < mip_count - 1:
+                    mip_width = max(1, mip_pixels.shape[1] // 2)
+                    mip_height = max(1, mip_pixels.shape[0] // 2)
+                    mip_pixels = image_utilities.downsample_pixels(mip_pixels, mip_width, mip_height, srgb=srgb)
+
+    debug_logging.log("Saved block compressed texture ({0}, {1} mip levels): {2}".format(file_format, mip_count, filepath))
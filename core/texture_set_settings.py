@@ -76,6 +76,13 @@ def get_texture_height():
         case _:
             return 10
 
+def get_resolution_value(resolution):
+    '''Returns a numeric value for the provided texture set resolution enum.'''
+    for resolution_enum, resolution_name, resolution_description in TEXTURE_SET_RESOLUTIONS:
+        if resolution_enum == resolution:
+            return int(resolution_name)
+    return 10
+
 class RYMAT_texture_set_settings(PropertyGroup):
     image_width: EnumProperty(
         items=TEXTURE_SET_RESOLUTIONS, 
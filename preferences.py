@@ -61,6 +61,18 @@ class AddonPreferences(AddonPreferences):
         description="If on, debug info for secondary / smaller functions ran by this add-on will be printed to Blenders terminal"
     )
 
+    save_blend_before_baking: BoolProperty(
+        name="Save Blend Before Baking",
+        description="If on, the blend file is saved before batch baking mesh maps to avoid losing data if Blender crashes while baking. Saving large blend files can take a long time, images used by the objects being baked are always saved",
+        default=True
+    )
+
+    bake_journal: BoolProperty(
+        name="Bake Journal",
+        description="If on, progress of exporting textures and batch baking mesh maps is recorded to a journal next to the blend file after each baked texture, so the operation can be resumed if Blender crashes part way through. Baked material channels are cached to disk while exporting, which requires additional disk space until the export completes",
+        default=True
+    )
+
     thirty_two_bit: BoolProperty(
         name="32 Bit Color", 
         description="If on, images created using this add-on will be created with 32 bit color depth. 32-bit images will take up more memory, but will have significantly less color banding in gradients", 
@@ -79,4 +91,6 @@ class AddonPreferences(AddonPreferences):
         # Draw other preferences.
         layout.label(text="Other")
         layout.prop(self, "beginner_help")
-        layout.prop(self, "experimental_features")
\ No newline at end of file
+        layout.prop(self, "experimental_features")
+        layout.prop(self, "save_blend_before_baking")
+        layout.prop(self, "bake_journal")
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Checks compiled materials output the same material channel values as the layered materials they're compiled from.
+# These checks need Blender, run them with Blender's bundled Python with the add-on enabled, for example:
+#     blender --background --python-expr "import pytest; pytest.main(['tests'])"
+
+import pytest
+
+bpy = pytest.importorskip("bpy")
+pytest.importorskip("rymat")
+
+from rymat import api
+from rymat.core import material_compiler
+from rymat.core import shaders
+
+def describe_socket_source(socket):
+    '''Returns a nested tuple describing the nodes and values that feed the provided input socket.'''
+    source = material_compiler.get_socket_source(socket)
+    if not isinstance(source, bpy.types.NodeSocket):
+        return tuple(round(value, 4) for value in source) if hasattr(source, "__len__") else round(source, 4)
+
+    node = source.node
+    if node.bl_static_type in ('VALUE', 'RGB'):
+        return describe_socket_source(node.outputs[0])
+    node_settings = tuple(getattr(node, setting, None) for setting in ("operation", "blend_type", "data_type", "use_clamp", "clamp_factor"))
+    return (node.bl_idname, source.identifier, node_settings, tuple(describe_socket_source(input) for input in node.inputs if input.enabled))
+
+def compile_roughness(add_image_layer):
+    '''Compiles a material with a base layer with a distinct roughness value (and optionally an image layer above it), and returns a description of what feeds the compiled material's roughness.'''
+    material = api.create_material("CompilerTest")
+    base_layer = api.add_layer(material, name="Base")
+    roughness_channel = shaders.get_shader_channel_socket_name('ROUGHNESS')
+    api.get_channel_node(material, base_layer, roughness_channel).outputs[0].default_value = 0.37
+    if add_image_layer:
+        api.add_layer(material, 'IMAGE', name="Image")
+
+    compiled_material = material_compiler.compile_material(material)
+    shader_node = compiled_material.node_tree.nodes.get('SHADER_NODE')
+    return describe_socket_source(shader_node.inputs.get(roughness_channel))
+
+def test_image_layer_keeps_lower_layer_roughness():
+    '''Image layers disable all material channels except base color, compiling one must leave the roughness of the layer below it unchanged.'''
+    assert compile_roughness(add_image_layer=True) == compile_roughness(add_image_layer=False)
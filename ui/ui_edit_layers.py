@@ -8,6 +8,8 @@ from ..core import mesh_map_baking
 from ..core import blender_addon_utils
 from ..core import blender_addon_utils as bau
 from ..core import material_filters
+from ..core import material_compiler
+from ..core import layer_cache
 from . import bpy_ui_wrappers as bui
 from .. import preferences
 
@@ -185,8 +187,17 @@ def draw_material_properties(layout):
         column.operator("wm.url_open", text="Open Documentation").url = "https://loganfairbairn.github.io/rymat_documentation.html"
         return
 
-    # Print info for when the active material is invalid.
+    # Draw a button to return to editing layers when a compiled material is active.
     active_material = active_object.active_material
+    if material_compiler.get_compiled_source_material(active_material):
+        bau.print_aligned_text(layout, "Compiled Material", alignment='CENTER', label_icon='INFO')
+        bau.print_aligned_text(layout, "Compiled materials can't be edited.", alignment='CENTER')
+        row = layout.row()
+        row.scale_y = 1.5
+        row.operator("rymat.swap_compiled_materials", text="Edit Layers")
+        return
+
+    # Print info for when the active material is invalid.
     if bau.verify_addon_material(active_material) == False and active_material:
         bau.print_aligned_text(layout, "Material Format Invalid", alignment='CENTER', label_icon='ERROR')
         bau.print_aligned_text(layout, "Materials must be created with this add-on.", alignment='CENTER')
@@ -213,6 +224,8 @@ def draw_material_properties(layout):
         row.operator("rymat.merge_with_layer_below", icon='TRIA_DOWN_BAR', text="")
     row.operator("rymat.isolate_material_channel", text="", icon='MATERIAL')
     row.operator("rymat.show_compiled_material", text="", icon='SHADING_RENDERED')
+    row.operator("rymat.swap_compiled_materials", text="", icon='NODETREE')
+    row.operator("rymat.toggle_layer_cache", text="", icon='FREEZE', depress=layer_cache.layer_cache_exists(active_material))
     row.operator("rymat.delete_layer", icon='TRASH', text="")
 
     # Draw the layer stack.
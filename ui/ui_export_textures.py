@@ -2,10 +2,49 @@
 
 import bpy
 from ..core import material_layers
+from ..core import bake_journal
+from ..core import export_textures
 from ..core import blender_addon_utils as bau
 from . import bpy_ui_wrappers as bui
 from . import ui_render_devices
 
+def draw_export_statistics(layout, texture_export_settings):
+    '''Draws the time spent in each stage of the last export, and the slowest baked channels and written textures.'''
+    row = layout.row()
+    icon = 'TRIA_DOWN' if texture_export_settings.show_export_statistics else 'TRIA_RIGHT'
+    row.prop(texture_export_settings, "show_export_statistics", text="EXPORT STATISTICS", icon=icon, emboss=False)
+    if not texture_export_settings.show_export_statistics:
+        return
+
+    if not export_textures.export_manifest.get("textures"):
+        bau.print_aligned_text(layout, "No Export Statistics", alignment='CENTER')
+        return
+
+    total_time = export_textures.export_manifest["total_time"]
+    stage_times, item_times = export_textures.get_export_stage_times()
+    bytes_written = sum(texture.get("bytes_written", 0) for texture in export_textures.export_manifest["textures"].values())
+
+    split = layout.split(factor=0.4)
+    first_column = split.column()
+    second_column = split.column()
+
+    row = first_column.row()
+    row.label(text="Total")
+    row = second_column.row()
+    row.label(text="{0:.1f}s, {1:.1f} MB written".format(total_time, bytes_written / 1048576))
+
+    # Draw the share of the total export time for each stage.
+    for stage_name, stage_time in stage_times.items():
+        row = first_column.row()
+        row.label(text=stage_name)
+        row = second_column.row()
+        row.label(text="{0:.1f}s ({1:.0f}%)".format(stage_time, stage_time / max(total_time, 0.001) * 100))
+
+    # Draw the slowest individual channels and textures.
+    for label, item_time in item_times[:5]:
+        row = layout.row()
+        row.label(text="{0}: {1:.1f}s".format(label, item_time))
+
 def draw_export_textures_ui(self, context):
     '''Draws user interface for the export section.'''
     layout = self.layout
@@ -15,6 +54,12 @@ def draw_export_textures_ui(self, context):
     row.scale_y = 2.0
     row.operator("rymat.export", text="Export Textures")
 
+    # Draw a button to resume an interrupted export.
+    if bake_journal.journal_exists('EXPORT'):
+        row = layout.row(align=True)
+        operator = row.operator("rymat.export", text="Resume Export")
+        operator.resume = True
+
     # Display an info message if users can't export textures.
     active_object = bpy.context.view_layer.objects.active
     if not active_object:
@@ -81,10 +126,20 @@ def draw_export_textures_ui(self, context):
     row = second_column.row()
     row.prop(baking_settings, "uv_padding", text="")
 
+    row = first_column.row()
+    row.label(text="UV Padding Method")
+    row = second_column.row()
+    row.prop(baking_settings, "uv_padding_method", text="")
+
     row = first_column.row()
     row.label(text="Samples")
     row = second_column.row()
     row.prop(texture_export_settings, "samples", text="")
+
+    row = first_column.row()
+    row.label(text="Collapse Solid Textures")
+    row = second_column.row()
+    row.prop(texture_export_settings, "collapse_solid_textures", text="")
     
     active_object = bpy.context.active_object
     if active_object:
@@ -95,6 +150,26 @@ def draw_export_textures_ui(self, context):
             row = second_column.row()
             row.prop_search(export_uv_map_node, "uv_map", active_object.data, "uv_layers", text="")
 
+    # Draw additional resolutions textures are exported at.
+    row = first_column.row()
+    row.scale_y = 1.5
+    row.label(text="OUTPUT RESOLUTIONS")
+    row = second_column.row(align=True)
+    row.scale_x = 1.5
+    row.scale_y = 1.5
+    row.alignment = 'RIGHT'
+    row.operator("rymat.add_export_output_resolution", text="", icon='ADD')
+
+    for i, output_resolution in enumerate(texture_export_settings.output_resolutions):
+        row = first_column.row()
+        row.label(text=str(i + 1) + ".")
+        row = second_column.row(align=True)
+        row.prop(output_resolution, "resolution", text="")
+        row.prop(output_resolution, "name_suffix", text="")
+        row.prop(output_resolution, "image_format", text="")
+        op = row.operator("rymat.remove_export_output_resolution", icon='X', text="")
+        op.output_resolution_index = i
+
     # Draw export textures and their settings.
     row = first_column.row()
     row.scale_y = 1.5
@@ -177,4 +252,8 @@ def draw_export_textures_ui(self, context):
         row.alignment = 'CENTER'
         row.prop(texture.input_rgba_channels, "a_color_channel", text="")
         row.label(text="->")
-        row.prop(texture.output_rgba_channels, "a_color_channel", text="")
\ No newline at end of file
+        row.prop(texture.output_rgba_channels, "a_color_channel", text="")
+
+    # Draw statistics recorded for the last export.
+    bui.separator(layout, type='LINE')
+    draw_export_statistics(layout, texture_export_settings)
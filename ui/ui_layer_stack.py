@@ -5,6 +5,7 @@ from bpy.types import Menu
 import bpy.utils.previews       # Imported for loading texture previews as icons.
 from ..core import material_layers
 from ..core import layer_masks
+from ..core import layer_stack_model
 from ..core import blender_addon_utils
 
 class LayerBlendingModeSubMenu(Menu):
@@ -12,7 +13,7 @@ class LayerBlendingModeSubMenu(Menu):
     bl_label = "Layer Blending Mode Sub Menu"
 
     def draw(self, context):
-        layer_index = int(context.layer_node.name)
+        layer_index = material_layers.get_layer_index(context.layer_node.name)
         layout = self.layout
 
         operator = layout.operator("rymat.set_layer_blending_mode", text="Mix")
@@ -107,12 +108,12 @@ class RYMAT_UL_layer_list(bpy.types.UIList):
         self.use_filter_reverse = True
 
         if self.layout_type in {'DEFAULT', 'COMPACT'}:
-            layers = bpy.context.scene.rymat_layers
-            item_index = layers.find(item.name)
+            item_index = index
             layer_node = material_layers.get_material_layer_node('LAYER', item_index)
+            layer_model = layer_stack_model.get_layer_model(item_index)
 
             # Don't draw layer properties if there is no layer node.
-            if not layer_node:
+            if not layer_node or not layer_model:
                 return
             
             # Use a two column layout.
@@ -122,7 +123,7 @@ class RYMAT_UL_layer_list(bpy.types.UIList):
 
             # Draw the hide layer toggle button.
             row = first_column.row(align=True)
-            if blender_addon_utils.get_node_active(layer_node):
+            if layer_model.active:
                 operator = row.operator("rymat.toggle_hide_layer", text="", emboss=False, icon='HIDE_OFF')
                 operator.layer_index = item_index
 
@@ -131,8 +132,7 @@ class RYMAT_UL_layer_list(bpy.types.UIList):
                 operator.layer_index = item_index
 
             # If the layer is masked, draw a mask icon.
-            mask_node = layer_masks.get_mask_node('MASK', item_index, 0)
-            if mask_node:
+            if layer_model.masks:
                 row.label(text="", icon='MOD_MASK')
 
             # Draw the layer name.
@@ -150,14 +150,9 @@ class RYMAT_UL_layer_list(bpy.types.UIList):
                 row.prop(opacity_layer_node.inputs[0], "default_value", text="", emboss=True)
 
             # Draw layer blending mode.
-            mix_layer_node = material_layers.get_material_layer_node(
-                'MIX', 
-                item_index, 
-                channel_name=selected_material_channel_name
-            )
-            if mix_layer_node:
+            channel_model = layer_model.channels.get(selected_material_channel_name)
+            if channel_model:
                 row.context_pointer_set("layer_node", layer_node)
-                blending_mode = material_layers.get_layer_blending_mode(item_index)
-                blending_mode_label = blending_mode.replace('_', ' ')
+                blending_mode_label = channel_model.blending_mode.replace('_', ' ')
                 blending_mode_label = blender_addon_utils.capitalize_by_space(blending_mode_label)
                 row.menu('RYMAT_MT_layer_blending_mode_sub_menu', text=blending_mode_label)
\ No newline at end of file
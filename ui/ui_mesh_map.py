@@ -2,6 +2,7 @@
 
 import bpy
 from ..core import mesh_map_baking
+from ..core import bake_journal
 from ..core import blender_addon_utils as bau
 from . import bpy_ui_wrappers as bui
 from . import ui_render_devices
@@ -29,9 +30,9 @@ def draw_mesh_map_status(layout, baking_settings):
         col = row.column()
 
         if bpy.context.active_object:
-            mesh_map_name = mesh_map_baking.get_meshmap_name(bpy.context.active_object.name, mesh_map_type)
-            if bpy.data.images.get(mesh_map_name):
-                col.label(text=mesh_map_name)
+            mesh_map_image = mesh_map_baking.get_object_meshmap_image(bpy.context.active_object, mesh_map_type)
+            if mesh_map_image:
+                col.label(text=mesh_map_image.name)
             else:
                 col.label(text=null_meshmap_text)
         else:
@@ -94,23 +95,42 @@ def draw_mesh_map_settings(layout, baking_settings):
     first_column = split.column()
     second_column = split.column()
 
-    match baking_settings.cage_mode:
-        case 'NO_CAGE':
+    row = first_column.row()
+    row.label(text="Bake Selected")
+    row = second_column.row()
+    row.prop(baking_settings, "bake_selected_objects", text="")
+
+    # When baking selected objects, high poly and cage objects are paired with each object by name.
+    if baking_settings.bake_selected_objects:
+        row = first_column.row()
+        row.label(text="High Poly Suffix")
+        row = second_column.row()
+        row.prop(baking_settings, "high_poly_suffix", text="")
+
+        if baking_settings.cage_mode == 'NO_CAGE':
             row = first_column.row()
             row.label(text="Cage Extrusion")
             row = second_column.row()
             row.prop(bpy.context.scene.render.bake, "cage_extrusion", text="")
 
-        case 'MANUAL_CAGE':
-            row = first_column.row()
-            row.label(text="Cage Object")
-            row = second_column.row(align=True)
-            row.prop(bpy.context.scene.render.bake, "cage_object", text="")
-    
-    row = first_column.row()
-    row.label(text="High Poly Object")
-    row = second_column.row()
-    row.prop(baking_settings, "high_poly_object", text="", slider=True)
+    else:
+        match baking_settings.cage_mode:
+            case 'NO_CAGE':
+                row = first_column.row()
+                row.label(text="Cage Extrusion")
+                row = second_column.row()
+                row.prop(bpy.context.scene.render.bake, "cage_extrusion", text="")
+
+            case 'MANUAL_CAGE':
+                row = first_column.row()
+                row.label(text="Cage Object")
+                row = second_column.row(align=True)
+                row.prop(bpy.context.scene.render.bake, "cage_object", text="")
+        
+        row = first_column.row()
+        row.label(text="High Poly Object")
+        row = second_column.row()
+        row.prop(baking_settings, "high_poly_object", text="", slider=True)
 
     bui.separator(layout, type='NONE')
     row = layout.row()
@@ -137,16 +157,33 @@ def draw_mesh_map_settings(layout, baking_settings):
     row = second_column.row()
     row.prop(baking_settings, "mesh_map_upscaling_multiplier", text="")
 
+    row = first_column.row()
+    row.label(text="Resample Filter")
+    row = second_column.row()
+    row.prop(baking_settings, "mesh_map_resample_filter", text="")
+
     row = first_column.row()
     row.label(text="Mesh Map Quality")
     row = second_column.row()
     row.prop(baking_settings, "mesh_map_quality", text="")
 
+    row = first_column.row()
+    row.label(text="Denoise")
+    row = second_column.row()
+    row.prop(baking_settings, "denoise_mesh_maps", text="")
+    if baking_settings.denoise_mesh_maps:
+        row.prop(baking_settings, "denoise_radius", text="Radius")
+
     row = first_column.row()
     row.label(text="UV Padding")
     row = second_column.row()
     row.prop(baking_settings, "uv_padding", text="")
 
+    row = first_column.row()
+    row.label(text="UV Padding Method")
+    row = second_column.row()
+    row.prop(baking_settings, "uv_padding_method", text="")
+
     # Ambient Occlusion Settings
     bui.separator(layout, type='NONE')
     layout.label(text="AMBIENT OCCLUSION")
@@ -238,6 +275,12 @@ def draw_mesh_map_section_ui(self, context):
     row.scale_y = 2.0
     row.operator("rymat.batch_bake", text="Bake Mesh Maps")
 
+    # Draw a button to resume an interrupted batch bake.
+    if bake_journal.journal_exists('BATCH_BAKE'):
+        row = layout.row(align=True)
+        operator = row.operator("rymat.batch_bake", text="Resume Baking")
+        operator.resume = True
+
     ui_render_devices.draw_render_device_settings(layout)
 
     draw_mesh_map_status(layout, baking_settings)